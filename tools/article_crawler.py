@@ -1,9 +1,13 @@
+import sys
 from datetime import datetime
 
 
 import zeeguu.core
 from feed_retrieval import retrieve_articles_from_all_feeds
-from recompute_recommender_cache import clean_the_cache, recompute_for_users
+from recompute_recommender_cache import (
+    expire_old_articles_from_the_cache,
+    recompute_for_users,
+)
 
 import logging
 
@@ -15,9 +19,14 @@ logging.getLogger("zeeguu.core").setLevel(logging.INFO)
 start = datetime.now()
 zeeguu.core.log(f"started at: {datetime.now()}")
 
-retrieve_articles_from_all_feeds()
-clean_the_cache()
-recompute_for_users()
+# optionally, the number of concurrent requests of the crawl
+workers = int(sys.argv[1]) if len(sys.argv) > 1 else None
+retrieve_articles_from_all_feeds(workers)
+# the new articles were already added to the cache while crawling;
+# recompute_for_users only computes the preferences that are not cached yet
+expire_old_articles_from_the_cache()
+# without a checkpoint: the file of a manual run is not touched
+recompute_for_users(checkpoint=None)
 
 end = datetime.now()
 zeeguu.core.log(f"done at: {end}")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+"""
+
+   Compares the two ways of excluding the articles that contain
+   the keywords of the search filters of a user, on a synthetic
+   corpus of 100k articles in an in-memory sqlite:
+
+    - NOT (title LIKE '%k%' OR content LIKE '%k%'), which is what
+      _filter_subscribed_articles used to do for every keyword
+    - the article_token_index: the ids of the articles to exclude
+      are computed from the vocabulary and excluded with NOT IN
+
+   Also checks that the two give the same articles.
+
+   Usage: python benchmark_keyword_filter.py [article_count]
+
+"""
+
+import random
+import sqlite3
+import string
+import sys
+import time
+
+from zeeguu.core.content_recommender.article_token_index import TokenIndex
+
+ARTICLE_COUNT = 100000
+WORDS_IN_VOCABULARY = 50000
+WORDS_PER_ARTICLE = 300
+KEYWORDS = ["fodbold", "krig", "valg", "ball", "tion"]
+
+
+def _random_word():
+    return "".join(random.choices(string.ascii_lowercase, k=random.randint(3, 12)))
+
+
+def _synthetic_corpus(article_count):
+    vocabulary = [_random_word() for _ in range(WORDS_IN_VOCABULARY)]
+    # the keywords should match a few articles, not none
+    vocabulary += ["fodbold", "krigen", "valget", "football", "nation"]
+
+    for id in range(1, article_count + 1):
+        title = " ".join(random.choices(vocabulary, k=6))
+        content = " ".join(random.choices(vocabulary, k=WORDS_PER_ARTICLE))
+        yield id, title, content
+
+
+def _timed(message, f):
+    start = time.time()
+    result = f()
+    print(f"{message}: {time.time() - start:.3f}s")
+    return result
+
+
+def main(article_count):
+    random.seed(42)
+
+    db = sqlite3.connect(":memory:")
+    # LIKE is case sensitive in MySQL with the utf8_bin collation
+    db.execute("PRAGMA case_sensitive_like = ON")
+    db.execute("CREATE TABLE article (id INTEGER PRIMARY KEY, title, content)")
+
+    index = TokenIndex()
+
+    def fill():
+        for id, title, content in _synthetic_corpus(article_count):
+            db.execute("INSERT INTO article VALUES (?, ?, ?)", (id, title, content))
+            index.add(id, title, content)
+
+    _timed(f"creating and indexing {article_count} articles", fill)
+    print(f"tokens in the index: {len(index.postings)}")
+
+    for keywords in [KEYWORDS[:1], KEYWORDS]:
+        print(f"\nexcluding: {keywords}")
+
+        like = " AND ".join(
+            ["NOT (title LIKE ? OR content LIKE ?)"] * len(keywords)
+        )
+        like_arguments = [f"%{k}%" for k in keywords for _ in range(2)]
+        with_like = _timed(
+            "  LIKE",
+            lambda: db.execute(
+                f"SELECT id FROM article WHERE {like}", like_arguments
+            ).fetchall(),
+        )
+
+        def with_the_index():
+            _, _, ids_to_avoid = index.ids_containing_any(keywords)
+            db.execute("CREATE TEMP TABLE IF NOT EXISTS avoid (id INTEGER PRIMARY KEY)")
+            db.execute("DELETE FROM avoid")
+            db.executemany("INSERT INTO avoid VALUES (?)", [(i,) for i in ids_to_avoid])
+            return db.execute(
+                "SELECT id FROM article WHERE id NOT IN (SELECT id FROM avoid)"
+            ).fetchall()
+
+        with_index = _timed("  token index", with_the_index)
+
+        assert with_like == with_index
+        print(f"  same {len(with_like)} articles left")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else ARTICLE_COUNT)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+
+"""
+
+    Computes the fingerprints (see near_duplicates) of the articles
+    of the last WINDOW_DAYS that don't have one yet, e.g. the ones
+    that were crawled before the fingerprints were introduced,
+    such that the crawler recognizes their copies too.
+
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import load_only, joinedload
+
+import zeeguu.core
+from zeeguu.core.content_retriever.near_duplicates import simhash, WINDOW_DAYS
+from zeeguu.core.model import Article, ArticleFingerprint
+
+session = zeeguu.core.db.session
+
+BATCH_SIZE = 1000
+
+since = datetime.now() - timedelta(days=WINDOW_DAYS)
+articles = (
+    Article.query.outerjoin(ArticleFingerprint)
+    .filter(ArticleFingerprint.id == None)
+    .filter(Article.published_time >= since)
+    .options(load_only(Article.id, Article.content), joinedload(Article.language))
+    .order_by(Article.id)
+    .all()
+)
+
+print(f"{len(articles)} articles without fingerprints")
+
+for counter, article in enumerate(articles, start=1):
+    session.add(ArticleFingerprint(article, simhash(article.content)))
+    if counter % BATCH_SIZE == 0:
+        # not committing yet, which would expire the articles not processed yet
+        print(f"{counter} done. flushing... ")
+        session.flush()
+
+session.commit()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+"""
+
+    Reports on the crawls of the last --days days (see FeedCrawl):
+    the feeds that take the longest to crawl, and the ones that bring
+    the fewest new articles for the time that is spent on them.
+
+    Usage: python crawl_report.py [--days 7] [--top 20]
+
+"""
+
+import argparse
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+import zeeguu.core
+from zeeguu.core.model import FeedCrawl, RSSFeed
+
+session = zeeguu.core.db.session
+
+
+def feed_crawl_totals(days):
+    since = datetime.now() - timedelta(days=days)
+
+    return (
+        session.query(
+            RSSFeed,
+            func.count(FeedCrawl.id).label("crawls"),
+            func.sum(FeedCrawl.duration).label("duration"),
+            func.sum(FeedCrawl.fetch_seconds).label("fetch_seconds"),
+            func.sum(FeedCrawl.download_seconds).label("download_seconds"),
+            func.sum(FeedCrawl.parse_seconds).label("parse_seconds"),
+            func.sum(FeedCrawl.db_seconds).label("db_seconds"),
+            func.sum(FeedCrawl.items).label("items"),
+            func.sum(FeedCrawl.downloaded).label("downloaded"),
+            func.sum(FeedCrawl.skipped_low_quality).label("low_quality"),
+            func.sum(FeedCrawl.skipped_near_duplicate).label("near_duplicates"),
+            func.count(FeedCrawl.error).label("errors"),
+        )
+        .join(FeedCrawl, FeedCrawl.rss_feed_id == RSSFeed.id)
+        .filter(FeedCrawl.started >= since)
+        .group_by(RSSFeed.id)
+        .all()
+    )
+
+
+def print_feeds(title, rows):
+    print(f"\n{title}")
+    print(
+        f"{'feed':40} {'crawls':>6} {'avg s':>7} {'fetch':>6} {'dl':>6} "
+        f"{'parse':>6} {'db':>6} {'items':>6} {'new':>5} {'lowq':>5} "
+        f"{'dupl':>5} {'err':>4} {'new/min':>8}"
+    )
+    for row in rows:
+        print(
+            f"{row.RSSFeed.title[:40]:40} {row.crawls:>6} "
+            f"{_average_duration(row):>7.1f} {row.fetch_seconds or 0:>6.1f} "
+            f"{row.download_seconds or 0:>6.1f} {row.parse_seconds or 0:>6.1f} "
+            f"{row.db_seconds or 0:>6.1f} {row.items or 0:>6} "
+            f"{row.downloaded or 0:>5} {row.low_quality or 0:>5} "
+            f"{row.near_duplicates or 0:>5} {row.errors:>4} "
+            f"{_downloaded_per_minute(row):>8.2f}"
+        )
+
+
+def _average_duration(row):
+    return (row.duration or 0) / row.crawls
+
+
+def _downloaded_per_minute(row):
+    return (row.downloaded or 0) / max(row.duration or 0, 1) * 60
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reports on the recent crawls")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    totals = feed_crawl_totals(args.days)
+    print(f"{len(totals)} feeds crawled in the last {args.days} days")
+
+    print_feeds(
+        "Slowest feeds (average crawl duration)",
+        sorted(totals, key=_average_duration, reverse=True)[: args.top],
+    )
+    print_feeds(
+        "Least productive feeds (new articles per minute of crawling)",
+        sorted(totals, key=lambda row: (_downloaded_per_minute(row), -(row.duration or 0)))[
+            : args.top
+        ],
+    )
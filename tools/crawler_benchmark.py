@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+
+"""
+
+   Measures the throughput of every stage of the crawler on a recorded
+   crawl, such that changes to the crawler can be compared on the same
+   input, without the noise of (and without loading) the live sites.
+
+   First, record the traffic of crawling some of the active feeds:
+
+       python crawler_benchmark.py record crawl.warc --feeds 20
+
+   and then replay it, as many times as needed, even offline:
+
+       python crawler_benchmark.py replay crawl.warc
+
+   The stages are the ones of the crawler: fetching the feed, resolving
+   the redirects of its items, downloading them, and processing them
+   (see article_processing). The recorded feeds are listed next to the
+   recording, in crawl.warc.feeds.json, so the replay does not need
+   them in the DB.
+
+   Nothing is saved in the DB; the time that the real crawls spend
+   there is in their FeedCrawl metrics (see crawl_report.py).
+
+"""
+
+import argparse
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from zeeguu.core.content_retriever import fetch
+from zeeguu.core.content_retriever.article_downloader import _url_after_redirects
+from zeeguu.core.content_retriever.article_processing import (
+    download_html,
+    process_article,
+)
+from zeeguu.core.model import RSSFeed
+
+STAGES = ["feed", "redirect", "download", "process"]
+
+
+class StageTimes:
+    def __init__(self):
+        self.done = {stage: 0 for stage in STAGES}
+        self.failed = {stage: 0 for stage in STAGES}
+        self.seconds = {stage: 0.0 for stage in STAGES}
+
+    @contextmanager
+    def measure(self, stage):
+        start = time.monotonic()
+        try:
+            yield
+            self.done[stage] += 1
+        except Exception:
+            self.failed[stage] += 1
+            raise
+        finally:
+            self.seconds[stage] += time.monotonic() - start
+
+    def report(self):
+        print(f"{'stage':10} {'done':>6} {'failed':>6} {'seconds':>8} {'per s':>8}")
+        for stage in STAGES:
+            seconds = self.seconds[stage]
+            print(
+                f"{stage:10} {self.done[stage]:>6} {self.failed[stage]:>6} "
+                f"{seconds:>8.2f} {self.done[stage] / max(seconds, 0.001):>8.1f}"
+            )
+        total = sum(self.seconds.values())
+        print(f"{'total':10} {'':>6} {'':>6} {total:>8.2f}")
+
+
+def crawl(feeds, items_per_feed):
+    """
+    :param feeds: a list of dicts with the url and the language code of a feed
+    """
+    times = StageTimes()
+
+    for feed in feeds:
+        try:
+            with times.measure("feed"):
+                items = RSSFeed.feed_items_at(feed["url"])
+        except Exception as e:
+            print(f"- {feed['url']}: {e}")
+            continue
+
+        for feed_item in items[:items_per_feed]:
+            url = feed_item["url"]
+            try:
+                with times.measure("redirect"):
+                    url = _url_after_redirects(url)
+                with times.measure("download"):
+                    html = download_html(url)
+                with times.measure("process"):
+                    process_article(url, feed_item["summary"], feed["language"], html)
+            except Exception as e:
+                print(f"- {url}: {e}")
+
+    return times
+
+
+def feeds_to_record(count):
+    feeds = (
+        RSSFeed.query.filter((RSSFeed.deactivated == 0) | (RSSFeed.deactivated == None))
+        .order_by(RSSFeed.id)
+        .limit(count)
+        .all()
+    )
+    return [dict(url=each.url.as_string(), language=each.language.code) for each in feeds]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the crawler stages")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("recording", help="the WARC-like file of the crawl")
+    parser.add_argument("--feeds", type=int, default=20, help="feeds to record")
+    parser.add_argument("--items", type=int, default=10, help="items per feed")
+    args = parser.parse_args()
+
+    feeds_file = args.recording + ".feeds.json"
+
+    if args.mode == "record":
+        feeds = feeds_to_record(args.feeds)
+        with open(feeds_file, "w") as f:
+            json.dump(feeds, f, indent=1)
+        if os.path.exists(args.recording):
+            os.remove(args.recording)
+        fetch.record_to(args.recording)
+    else:
+        with open(feeds_file) as f:
+            feeds = json.load(f)
+        fetch.replay_from(args.recording)
+
+    print(f"{args.mode}: {len(feeds)} feeds, at most {args.items} items each")
+    crawl(feeds, args.items).report()
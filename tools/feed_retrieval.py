@@ -13,7 +13,8 @@
    in a given feed was done while serving the request for
    items to read. That was too slow.
 
-   To be called from a cron job.
+   To be called from a cron job. Every run crawls only the feeds
+   that are due (see crawl_schedule), unless --all is given.
 
 """
 import traceback
@@ -21,31 +22,109 @@ import traceback
 import zeeguu.core
 from zeeguu.core import log
 from zeeguu.core.content_retriever.article_downloader import download_from_feed
-from zeeguu.core.model import RSSFeed
+from zeeguu.core.content_retriever import lingo_rank_enrichment
+from zeeguu.core.content_retriever.concurrent_crawler import crawl_feeds
+from zeeguu.core.content_retriever.crawl_schedule import reschedule
+from zeeguu.core.elastic.bulk_indexer import BulkIndexer
+from zeeguu.core.model import RSSFeed, UrlRedirect
+from zeeguu.core.model.feed import feed_http_stats
 
 session = zeeguu.core.db.session
 
 
-def retrieve_articles_from_all_feeds():
-
+def retrieve_articles_from_all_feeds(workers=None, processes=None, all_feeds=False):
+    """
+    :param workers: if given, the feeds are crawled concurrently,
+    with at most this many requests at a time (see concurrent_crawler)
+    :param processes: the number of processes that parse the articles
+    of a concurrent crawl; by default, the number of CPUs
+    :param all_feeds: crawl all the active feeds, not only the due ones
+
+    The new articles of all the feeds are indexed in ES in bulk; at the
+    end, the crawl waits a while for their LingoRank difficulties (see
+    lingo_rank_enrichment) and indexes them again with those; the ones
+    that don't arrive in time are filled in by fill_lingo_ranks.py
+    """
+
+    if all_feeds:
+        feeds = [each for each in RSSFeed.query.all() if not each.deactivated]
+    else:
+        feeds = RSSFeed.due_for_crawling()
+    log(f"*** {len(feeds)} feeds to crawl")
+
+    # the indexer is closed, and its buffered documents sent, also
+    # when the crawl fails
+    with BulkIndexer(zeeguu.core.db.session) as indexer:
+        if workers:
+            stats = crawl_feeds(
+                feeds,
+                zeeguu.core.db.session,
+                max_workers=workers,
+                indexer=indexer,
+                processes=processes,
+            )
+            failed = {feed: bool(stats.feed_metrics[feed.id].error) for feed in feeds}
+        else:
+            failed = _crawl_one_feed_at_a_time(feeds, indexer)
+
+        lingo_rank_enrichment.wait(
+            zeeguu.core.db.session,
+            indexer,
+            timeout=lingo_rank_enrichment.WAIT_AT_THE_END,
+        )
+
+    reschedule(zeeguu.core.db.session, failed)
+
+    deleted = UrlRedirect.delete_older_than(zeeguu.core.db.session)
+    log(f"*** Deleted {deleted} old url redirects")
+
+
+def _crawl_one_feed_at_a_time(feeds, indexer):
+    """
+    :return: a dict telling for every feed whether its crawl failed
+    """
+    crawled = {}
     counter = 0
-    all_feeds = RSSFeed.query.all()
-    all_feeds_count = len(all_feeds)
-    for feed in all_feeds:
-        if feed.deactivated:
-            continue
-
+    all_feeds_count = len(feeds)
+    for feed in feeds:
         counter += 1
         try:
             msg = f"*** >>>>>>>>> {feed.title} ({counter}/{all_feeds_count}) <<<<<<<<<< "  # .encode('utf-8')
             log("")
             log(f"{msg}")
 
-            download_from_feed(feed, zeeguu.core.db.session)
+            metrics = download_from_feed(feed, zeeguu.core.db.session, indexer=indexer)
+            crawled[feed] = bool(metrics.error)
 
         except Exception as e:
             traceback.print_exc()
+            crawled[feed] = True
+
+    feed_http_stats.report()
+    return crawled
 
 
 if __name__ == "__main__":
-    retrieve_articles_from_all_feeds()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Crawls all the active feeds")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="crawl concurrently, with at most this many requests at a time",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="with --workers, parse the articles in this many processes",
+    )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="crawl all the active feeds, not only the ones that are due",
+    )
+    args = parser.parse_args()
+
+    retrieve_articles_from_all_feeds(args.workers, args.processes, args.all)
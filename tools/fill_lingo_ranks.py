@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+
+"""
+
+   Adds the LingoRank difficulty to the articles that don't have it
+   yet, e.g. because the service was down while they were crawled, or
+   because the crawler stopped before their rank arrived (see
+   lingo_rank_enrichment). The newest articles are ranked first, and
+   then indexed again in ES.
+
+   Usage: python fill_lingo_ranks.py [--limit 1000]
+
+"""
+
+import argparse
+
+import zeeguu.core
+from zeeguu.core.content_retriever import lingo_rank_enrichment
+from zeeguu.core.elastic.bulk_indexer import BulkIndexer
+from zeeguu.core.model import Article, DifficultyLingoRank, Language
+
+session = zeeguu.core.db.session
+
+
+def articles_without_rank(limit):
+    return (
+        Article.query.join(Language)
+        .outerjoin(DifficultyLingoRank, DifficultyLingoRank.article_id == Article.id)
+        .filter(Language.code.in_(lingo_rank_enrichment.LANGUAGES))
+        .filter(DifficultyLingoRank.id == None)
+        .order_by(Article.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def fill_lingo_ranks(limit):
+    articles = articles_without_rank(limit)
+    print(f"{len(articles)} articles without a LingoRank difficulty")
+
+    ranked = 0
+    with BulkIndexer(session) as indexer:
+        for count, article in enumerate(articles, start=1):
+            lingo_rank_enrichment.enqueue(article)
+            if count % 100 == 0:
+                ranked += lingo_rank_enrichment.save_finished(session, indexer)
+                print(f"{count} enqueued, {ranked} ranked")
+        ranked += lingo_rank_enrichment.wait(session, indexer)
+
+    print(f"{ranked} ranked, {len(articles) - ranked} failed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fills in the LingoRank difficulties")
+    parser.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    fill_lingo_ranks(args.limit)
@@ -0,0 +1,14 @@
+use zeeguu_test;
+
+CREATE TABLE article_fingerprint
+(
+    id          INT AUTO_INCREMENT PRIMARY KEY,
+    article_id  INT NULL,
+    language_id INT NULL,
+    simhash     BIGINT NULL,
+    CONSTRAINT article_id UNIQUE (article_id),
+    CONSTRAINT article_fingerprint_ibfk_1 FOREIGN KEY (article_id) REFERENCES article (id),
+    CONSTRAINT article_fingerprint_ibfk_2 FOREIGN KEY (language_id) REFERENCES language (id)
+);
+
+CREATE INDEX ix_article_fingerprint_language_id ON article_fingerprint (language_id);
@@ -0,0 +1,12 @@
+use zeeguu_test;
+
+alter table articles_cache add hash_digest char(40);
+update articles_cache set hash_digest = sha1(content_hash);
+
+# the race in _recompute_recommender_cache left duplicates behind
+delete a from articles_cache a
+    join articles_cache b
+    on a.hash_digest = b.hash_digest and a.article_id = b.article_id and a.id > b.id;
+
+alter table articles_cache add index ix_articles_cache_hash_digest (hash_digest);
+alter table articles_cache add constraint _hash_article_unique unique (hash_digest, article_id);
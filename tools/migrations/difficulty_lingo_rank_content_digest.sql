@@ -0,0 +1,4 @@
+use zeeguu_test;
+
+alter table difficulty_lingo_rank add content_digest char(40);
+create index ix_difficulty_lingo_rank_content_digest on difficulty_lingo_rank (content_digest);
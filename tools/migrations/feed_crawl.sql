@@ -0,0 +1,30 @@
+use zeeguu_test;
+
+CREATE TABLE feed_crawl
+(
+    id                     INT AUTO_INCREMENT PRIMARY KEY,
+    rss_feed_id            INT NULL,
+    started                DATETIME NULL,
+    duration               FLOAT NULL,
+    fetch_seconds          FLOAT NULL,
+    bytes                  INT NULL,
+    not_modified           TINYINT(1) NULL,
+    error                  VARCHAR(512) NULL,
+    items                  INT NULL,
+    downloaded             INT NULL,
+    skipped_already_in_db  INT NULL,
+    skipped_low_quality    INT NULL,
+    skipped_too_old        INT NULL,
+    skipped_near_duplicate INT NULL,
+    skipped_banned         INT NULL,
+    failed                 INT NULL,
+    download_seconds       FLOAT NULL,
+    parse_seconds          FLOAT NULL,
+    difficulty_seconds     FLOAT NULL,
+    db_seconds             FLOAT NULL,
+    es_seconds             FLOAT NULL,
+    CONSTRAINT feed_crawl_ibfk_1 FOREIGN KEY (rss_feed_id) REFERENCES rss_feed (id)
+);
+
+CREATE INDEX ix_feed_crawl_rss_feed_id ON feed_crawl (rss_feed_id);
+CREATE INDEX ix_feed_crawl_started ON feed_crawl (started);
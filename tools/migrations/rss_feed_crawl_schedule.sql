@@ -0,0 +1,4 @@
+use zeeguu_test;
+
+alter table rss_feed add next_crawl_time datetime;
+alter table rss_feed add crawl_failures integer;
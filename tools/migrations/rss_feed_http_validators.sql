@@ -0,0 +1,5 @@
+use zeeguu_test;
+
+alter table rss_feed add etag varchar(512);
+alter table rss_feed add last_modified varchar(64);
+alter table rss_feed add last_response_size integer;
@@ -0,0 +1,11 @@
+use zeeguu_test;
+
+CREATE TABLE url_redirect
+(
+    id              INT AUTO_INCREMENT PRIMARY KEY,
+    original_digest CHAR(40) NULL,
+    original        VARCHAR(2083) NULL,
+    final           VARCHAR(2083) NULL,
+    resolved_time   DATETIME NULL,
+    CONSTRAINT original_digest UNIQUE (original_digest)
+) COLLATE = utf8_bin;
@@ -0,0 +1,4 @@
+use zeeguu_test;
+
+-- the old redirects are deleted after every crawl
+CREATE INDEX ix_url_redirect_resolved_time ON url_redirect (resolved_time);
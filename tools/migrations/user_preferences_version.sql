@@ -0,0 +1,3 @@
+use zeeguu_test;
+
+alter table user add preferences_version integer not null default 0;
@@ -1,60 +1,384 @@
-# coding=utf-8
-import sqlalchemy as database
-from zeeguu.core.elastic.indexing import create_or_update, document_from_article
+#!/usr/bin/env python
+
+"""
+
+   Indexes all the articles of the DB in ES.
+
+   The ids are split in ranges of --chunk-size, which are indexed, from
+   the most recent to the oldest, by a pool of --processes processes.
+   Every process loads the articles of its range in pages, with their
+   topics, url, and language eagerly loaded, and sends them to ES in
+   bulk (see BulkIndexer).
+
+   The chunks that are done are saved in a checkpoint file, such that a
+   killed run continues where it stopped; the file is removed at the end.
+
+   With --new-index the articles are indexed in a new index, and only
+   when all of them are there, the ES_ZINDEX alias is moved to it, such
+   that the searches use the old index until the new one is complete.
+   Meanwhile, the crawler keeps writing to the old index; so before the
+   alias is moved, a catch-up pass indexes in the new index the articles
+   that were added, or got their LingoRank difficulty, since the start,
+   and deletes from it the articles that were deleted from the DB.
+   Other changes of the articles during the rebuild (e.g. their topics
+   being edited) can't be found in the DB, and are not caught up.
+
+   When ES_ZINDEX is a concrete index rather than an alias, it has to
+   be deleted to make room for the alias; this is only done with
+   --delete-old-index.
+
+   Usage: python mysql_to_elastic.py [--processes 4] [--new-index]
+          [--delete-old-index] [--fresh]
+
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from elasticsearch.helpers import bulk, scan
 from sqlalchemy import func
-from elasticsearch import Elasticsearch
+from sqlalchemy.orm import joinedload, selectinload
+
 import zeeguu.core
-from sqlalchemy.orm import sessionmaker
-from zeeguu.core.model import Article
-import sys
-from datetime import datetime
-from sqlalchemy.orm.exc import NoResultFound
-
-from zeeguu.core.elastic.settings import ES_ZINDEX, ES_CONN_STRING
-
-es = Elasticsearch([ES_CONN_STRING])
-DB_URI = zeeguu.core.app.config["SQLALCHEMY_DATABASE_URI"]
-engine = database.create_engine(DB_URI)
-Session = sessionmaker(bind=engine)
-session = Session()
-
-
-def main(starting_index):
-
-    max_id = session.query(func.max(Article.id)).first()[0]
-    min_id = session.query(func.min(Article.id)).first()[0]
-    print(f"starting import at: {starting_index}")
-    print(f"max id in db: {max_id}")
-
-    for i in range(max_id, min_id,-1):
-        print("article id...")
-        print(i)
-        try:
-            article = Article.find_by_id(i)
-            if article:
-                print(article.title)
-                print(article.id)
-                res = create_or_update(article, session)
-                print(res)
-        except NoResultFound:
-            print(f"fail for: {i}")
-        except:
-            print("fail for " + str(i))
-            # import traceback
-            # traceback.print_exc()
+from zeeguu.core.elastic.bulk_indexer import BulkIndexer
+from zeeguu.core.elastic.client import es_client
+from zeeguu.core.elastic.indexing import documents_from_articles, put_card_mapping
+from zeeguu.core.elastic.settings import ES_ZINDEX, ES_CARDS_FROM_INDEX
+from zeeguu.core.model import Article, DifficultyLingoRank, Url
 
+session = zeeguu.core.db.session
 
-if __name__ == "__main__":
+DEFAULT_PROCESSES = os.cpu_count() or 1
+CHUNK_SIZE = 10000
+# the articles of a chunk that are loaded and sent to ES at once
+BATCH_SIZE = 500
+# the catch-up stops when a pass finds nothing new, or after this many
+MAX_CATCH_UP_PASSES = 5
 
+CHECKPOINT_FILE = os.path.join(tempfile.gettempdir(), "mysql_to_elastic.checkpoint")
 
-    print("waiting for the ES process to boot up")
-  
-    print(f"started at: {datetime.now()}")
-    starting_index = 0
-    
 
-    if len(sys.argv) > 1:
-        starting_index = int(sys.argv[1])
+def reindex(
+    processes=DEFAULT_PROCESSES,
+    chunk_size=CHUNK_SIZE,
+    new_index=False,
+    checkpoint=CHECKPOINT_FILE,
+    delete_old_index=False,
+):
+    """
+    :return: the ids of the articles that failed
+    """
+    state = _load_checkpoint(checkpoint)
+    if state is None:
+        index = f"{ES_ZINDEX}_{datetime.now():%Y%m%d%H%M%S}" if new_index else ES_ZINDEX
+        min_id, max_id = session.query(
+            func.min(Article.id), func.max(Article.id)
+        ).one()
+        state = {
+            "index": index,
+            "chunk_size": chunk_size,
+            "done": [],
+            # what the bulk pass indexes; the rest is for the catch-up
+            "min_id": min_id,
+            "max_id": max_id,
+            "max_lingo_rank_id": _max_lingo_rank_id(),
+        }
+        if new_index:
+            es_client().indices.create(index=index)
+        if ES_CARDS_FROM_INDEX:
+            put_card_mapping(index)
+        _save_checkpoint(checkpoint, state)
+
+    index, chunk_size = state["index"], state["chunk_size"]
+    min_id, max_id = state["min_id"], state["max_id"]
+    done = set(state["done"])
+
+    if min_id is None:
+        os.remove(checkpoint)
+        return []
+
+    todo = [
+        (index, start, start + chunk_size)
+        for start in range(min_id - min_id % chunk_size, max_id + 1, chunk_size)
+        if start not in done
+    ][::-1]
+    zeeguu.core.logp(
+        f"indexing ids {min_id}..{max_id} in {index}: {len(done)} chunks "
+        f"already done, {len(todo)} to do with {processes} processes"
+    )
+
+    failed = []
+    indexed = 0
+    incomplete = False
+    start_time = time.time()
+
+    if processes > 1:
+        # the processes are forked: the connections of the parent
+        # can not be shared and must not be reused by the children
+        session.remove()
+        zeeguu.core.db.engine.dispose()
+        pool = multiprocessing.Pool(processes, initializer=_init_worker)
+        results = pool.imap_unordered(_index_chunk, todo)
+    else:
+        pool = None
+        results = map(_index_chunk, todo)
+
+    try:
+        for count, (start, chunk_indexed, chunk_failed, error) in enumerate(
+            results, start=1
+        ):
+            if error:
+                zeeguu.core.logp(f"Failed for the chunk at {start}: {error}")
+                incomplete = True
+                continue
+
+            indexed += chunk_indexed
+            failed.extend(chunk_failed)
+            done.add(start)
+            _save_checkpoint(checkpoint, dict(state, done=sorted(done)))
+
+            elapsed = time.time() - start_time
+            zeeguu.core.logp(
+                f"{count}/{len(todo)} chunks done, {indexed} articles "
+                f"({indexed / max(elapsed, 0.001):.1f}/s), {len(failed)} failed"
+            )
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    if incomplete:
+        zeeguu.core.logp("Some chunks failed; run again to retry them")
+        return failed
+
+    if index != ES_ZINDEX:
+        failed.extend(_catch_up(index, state))
+        if not _point_alias_to(index, delete_old_index):
+            return failed
+
+    os.remove(checkpoint)
+    return failed
+
+
+def _max_lingo_rank_id():
+    return session.query(func.max(DifficultyLingoRank.id)).scalar() or 0
+
+
+def _catch_up(index, state):
+    """
+    Indexes in :param index the articles that the crawler added to the
+    old index since the bulk pass started, and the ones that got their
+    LingoRank difficulty since then, and deletes from it the articles
+    that were deleted from the DB
+
+    :return: the ids of the articles that failed
+    """
+    after_id = state["max_id"]
+    after_lingo_rank_id = state["max_lingo_rank_id"]
+    failed = []
+
+    for _ in range(MAX_CATCH_UP_PASSES):
+        max_id = session.query(func.max(Article.id)).scalar()
+        max_lingo_rank_id = _max_lingo_rank_id()
+
+        ids = {
+            id
+            for (id,) in session.query(Article.id).filter(
+                Article.id > after_id, Article.id <= max_id
+            )
+        }
+        ids.update(
+            id
+            for (id,) in session.query(DifficultyLingoRank.article_id).filter(
+                DifficultyLingoRank.id > after_lingo_rank_id,
+                DifficultyLingoRank.id <= max_lingo_rank_id,
+            )
+        )
+        if not ids:
+            break
 
-    main(starting_index)
+        indexed, pass_failed = _index_articles(
+            index, Article.query.filter(Article.id.in_(ids))
+        )
+        failed.extend(pass_failed)
+        zeeguu.core.logp(f"catch-up: {indexed} articles indexed again")
+
+        after_id, after_lingo_rank_id = max_id, max_lingo_rank_id
+
+    _delete_the_deleted_articles(index)
+    return failed
+
+
+def _delete_the_deleted_articles(index):
+    es = es_client()
+    in_the_index = {
+        int(hit["_id"])
+        for hit in scan(es, index=index, query={"_source": False}, size=5000)
+    }
+    in_the_db = {id for (id,) in session.query(Article.id)}
+
+    deleted = in_the_index - in_the_db
+    bulk(
+        es,
+        ({"_op_type": "delete", "_index": index, "_id": id} for id in deleted),
+        raise_on_error=False,
+    )
+    zeeguu.core.logp(f"catch-up: {len(deleted)} deleted articles removed")
+
+
+def _point_alias_to(index, delete_old_index=False):
+    """
+    Atomically makes ES_ZINDEX an alias of :param index. The indices
+    that the alias pointed to until now are not deleted, only listed.
+
+    When ES_ZINDEX is a concrete index, it can only be replaced by the
+    alias by deleting it, which is done only if :param delete_old_index
+
+    :return: whether ES_ZINDEX points to :param index now
+    """
+    es = es_client()
+
+    if es.indices.exists_alias(name=ES_ZINDEX):
+        previous = list(es.indices.get_alias(name=ES_ZINDEX))
+        actions = [
+            {"remove": {"index": each, "alias": ES_ZINDEX}} for each in previous
+        ]
+    elif es.indices.exists(index=ES_ZINDEX):
+        if not delete_old_index:
+            zeeguu.core.logp(
+                f"{ES_ZINDEX} is an index, not an alias; {index} is complete, "
+                f"run again with --delete-old-index to replace {ES_ZINDEX} with it"
+            )
+            return False
+        previous = []
+        actions = [{"remove_index": {"index": ES_ZINDEX}}]
+        zeeguu.core.logp(f"deleting the index {ES_ZINDEX}")
+    else:
+        previous = []
+        actions = []
+
+    actions.append({"add": {"index": index, "alias": ES_ZINDEX}})
+    es.indices.update_aliases(body={"actions": actions})
+
+    zeeguu.core.logp(f"{ES_ZINDEX} now points to {index}")
+    for each in previous:
+        zeeguu.core.logp(f"the previous index, {each}, can be deleted")
+    return True
+
+
+def _init_worker():
+    # every process gets its own connections; the engine of the
+    # parent was disposed before forking, so the pool starts empty
+    zeeguu.core.db.engine.dispose()
+
+
+def _index_chunk(index_start_end):
+    """
+    :return: (start, indexed, ids that failed, error)
+    """
+    index, start, end = index_start_end
+    try:
+        indexed, failed = _index_articles(
+            index, Article.query.filter(Article.id >= start, Article.id < end)
+        )
+        return start, indexed, failed, None
+    except Exception as e:
+        session.rollback()
+        return start, 0, [], repr(e)
+    finally:
+        session.remove()
+
+
+def _index_articles(index, query):
+    """
+    Loads the articles of :param query in pages of BATCH_SIZE, by id;
+    every page is read completely before the queries for its documents
+    (their lingo ranks, cards) are made, since MySQL can not run them
+    while a streamed result is still being read
+
+    :return: (indexed, ids that failed)
+    """
+    query = query.options(
+        selectinload(Article.topics),
+        joinedload(Article.url).joinedload(Url.domain),
+        joinedload(Article.language),
+    ).order_by(Article.id)
+
+    indexer = BulkIndexer(
+        session, max_docs=BATCH_SIZE, max_seconds=float("inf"), index=index
+    )
+    with indexer:
+        last_id = None
+        while True:
+            page = query
+            if last_id is not None:
+                page = page.filter(Article.id > last_id)
+            batch = page.limit(BATCH_SIZE).all()
+            if not batch:
+                break
+            _add(indexer, batch)
+            last_id = batch[-1].id
+
+    return indexer.indexed, indexer.failed_ids
+
+
+def _add(indexer, articles):
+    if not articles:
+        return
+    for id, doc in documents_from_articles(articles, session).items():
+        indexer.add_document(id, doc)
+
+
+def _load_checkpoint(checkpoint):
+    if not os.path.exists(checkpoint):
+        return None
+    with open(checkpoint) as f:
+        return json.load(f)
+
+
+def _save_checkpoint(checkpoint, state):
+    # write and rename, such that a kill never leaves a half written file
+    with open(checkpoint + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(checkpoint + ".tmp", checkpoint)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indexes all the articles in ES")
+    parser.add_argument("--processes", type=int, default=DEFAULT_PROCESSES)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument(
+        "--new-index",
+        action="store_true",
+        help=f"build a new index and then point the {ES_ZINDEX} alias to it",
+    )
+    parser.add_argument(
+        "--delete-old-index",
+        action="store_true",
+        help=f"with --new-index, delete {ES_ZINDEX} if it is an index, not an alias",
+    )
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="ignore the checkpoint of a previous, unfinished run",
+    )
+    args = parser.parse_args()
+
+    if args.fresh and os.path.exists(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
+
+    print(f"started at: {datetime.now()}")
+    failed = reindex(
+        args.processes,
+        args.chunk_size,
+        args.new_index,
+        delete_old_index=args.delete_old_index,
+    )
     print(f"ended at: {datetime.now()}")
+    if failed:
+        print(f"{len(failed)} articles failed: {sorted(failed)}")
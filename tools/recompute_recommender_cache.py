@@ -8,6 +8,13 @@
 
 """
 
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
 import zeeguu.core
 from zeeguu.core.content_recommender.mysql_recommender import (
     _reading_preferences_hash,
@@ -17,6 +24,14 @@ from zeeguu.core.model import User, ArticlesCache
 
 session = zeeguu.core.db.session
 
+# articles older than this drop out of the cached recommendations
+CACHED_ARTICLES_MAX_AGE_IN_DAYS = 30
+
+DEFAULT_PROCESSES = os.cpu_count() or 1
+CHECKPOINT_FILE = os.path.join(
+    tempfile.gettempdir(), "recompute_recommender_cache.checkpoint"
+)
+
 
 def hashes_of_existing_cached_preferences():
     """
@@ -26,9 +41,7 @@ def hashes_of_existing_cached_preferences():
 
     :return:
     """
-    query = session.query(ArticlesCache.content_hash.distinct())
-    distinct_hashes = [each[0] for each in query.all()]
-    return distinct_hashes
+    return ArticlesCache.all_hashes()
 
 
 def clean_the_cache():
@@ -36,51 +49,146 @@ def clean_the_cache():
     session.commit()
 
 
-def recompute_for_users():
+def expire_old_articles_from_the_cache(days=CACHED_ARTICLES_MAX_AGE_IN_DAYS):
     """
 
-        recomputes only those caches that are already in the table
-        and belong to a user. if multiple users have the same preferences
-        the computation is done only for the first because this is how
-        _recompute_recommender_cache_if_needed does.
+        new articles are added to the cache as they are crawled
+        (see add_to_matching_recommender_caches); so instead of wiping
+        the whole cache after every crawl it's enough to drop the old ones
 
-        To think about:
-        - what happens when this script is triggered simultaneously
-        with triggering _recompute_recommender_cache_if_needed from
-        the UI? will there end up be duplicated recommendations?
-        should we add a uninque constraint on (hash x article)?
+    """
+    deleted = ArticlesCache.delete_for_articles_older_than(session, days)
+    zeeguu.core.logp(f"Removed {deleted} old articles from the cache")
 
-        Note:
 
-        in theory, the recomputing should be doable independent of users
-        in practice, the _recompute_recommender_cache takes the user as input.
-        for that function to become independent of the user we need to be
-        able to recover the ids of the languages, topics, searchers, etc. from the
-        content_hash
-        to do this their ids would need to be comma separated
+def group_users_by_preferences_hash(user_ids):
+    """
 
-        OTOH, in the future we might still want to have a per-user cache
-        because the recommendations might be different for each user
-        since every user has different language levels!!!
+        users with the same reading preferences share the same cache;
+        it's enough to compute it for one of them
 
-    :param existing_hashes:
-    :return:
+    :return: dict from hash to the ids of the users that have it
     """
-    already_done = []
-    for user_id in User.all_recent_user_ids():
+    users_by_hash = {}
+    for user_id in user_ids:
         try:
             user = User.find_by_id(user_id)
-            reading_pref_hash = _reading_preferences_hash(user)
-            if reading_pref_hash not in already_done:
-                _recompute_recommender_cache_if_needed(user, session)
-                zeeguu.core.logp(f"Success for {reading_pref_hash} and {user}")
-                already_done.append(reading_pref_hash)
-            else:
-                zeeguu.core.logp(
-                    f"nno need to do for {user}. hash {reading_pref_hash} already done"
-                )
+            users_by_hash.setdefault(_reading_preferences_hash(user), []).append(
+                user_id
+            )
         except Exception as e:
-            zeeguu.core.logp(f"Failed for user {user}")
+            zeeguu.core.logp(f"Failed to compute the hash for user {user_id}: {e}")
+    return users_by_hash
+
+
+def recompute_for_users(processes=DEFAULT_PROCESSES, checkpoint=CHECKPOINT_FILE):
+    """
+
+        recomputes the caches of the recently active users; each distinct
+        hash is computed once, by one of the processes in the pool.
+
+        the hashes that are done are saved in the :param checkpoint file,
+        such that a killed run continues where it stopped; the file
+        is removed once all the hashes are done. With checkpoint=None
+        nothing is saved (e.g. for the runs after a crawl, which must
+        not resume, nor be resumed by, a manual run).
+
+        When this script runs simultaneously with a
+        _recompute_recommender_cache_if_needed triggered from the UI
+        there are no duplicated recommendations: the (hash x article)
+        pairs are unique and the computation is locked per hash.
+
+        Note: the recomputing could in theory be done independent of
+        users; in practice, _recompute_recommender_cache takes the user
+        as input.
+
+    :return: the hashes that failed
+    """
+    users_by_hash = group_users_by_preferences_hash(User.all_recent_user_ids())
+
+    done = _load_checkpoint(checkpoint)
+    todo = [
+        (hash, user_ids[0])
+        for hash, user_ids in users_by_hash.items()
+        if hash not in done
+    ]
+    zeeguu.core.logp(
+        f"{len(users_by_hash)} distinct preferences; {len(done)} already done, "
+        f"{len(todo)} to do with {processes} processes"
+    )
+
+    failed = []
+    start = time.time()
+
+    if processes > 1:
+        # the processes are forked: the connections of the parent
+        # can not be shared and must not be reused by the children
+        session.remove()
+        zeeguu.core.db.engine.dispose()
+        pool = multiprocessing.Pool(processes, initializer=_init_worker)
+        results = pool.imap_unordered(_recompute_for_hash, todo)
+    else:
+        pool = None
+        results = map(_recompute_for_hash, todo)
+
+    try:
+        for count, (hash, error) in enumerate(results, start=1):
+            if error:
+                failed.append(hash)
+                zeeguu.core.logp(f"Failed for {hash}: {error}")
+            else:
+                done.add(hash)
+                _save_checkpoint(checkpoint, done)
+
+            elapsed = max(time.time() - start, 0.001)
+            zeeguu.core.logp(
+                f"{count}/{len(todo)} done, {len(failed)} failed "
+                f"({count / elapsed:.2f} hashes/s)"
+            )
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    if not failed and checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    return failed
+
+
+def _init_worker():
+    # every process gets its own connections; the engine of the
+    # parent was disposed before forking, so the pool starts empty
+    zeeguu.core.db.engine.dispose()
+
+
+def _recompute_for_hash(hash_and_user_id):
+    hash, user_id = hash_and_user_id
+    try:
+        user = User.find_by_id(user_id)
+        _recompute_recommender_cache_if_needed(user, session)
+        return hash, None
+    except Exception as e:
+        session.rollback()
+        return hash, repr(e)
+    finally:
+        session.remove()
+
+
+def _load_checkpoint(checkpoint):
+    if not checkpoint or not os.path.exists(checkpoint):
+        return set()
+    with open(checkpoint) as f:
+        return set(json.load(f))
+
+
+def _save_checkpoint(checkpoint, done):
+    if not checkpoint:
+        return
+    # write and rename, such that a kill never leaves a half written file
+    with open(checkpoint + ".tmp", "w") as f:
+        json.dump(sorted(done), f)
+    os.replace(checkpoint + ".tmp", checkpoint)
 
 
 def recompute_for_topics_and_languages():
@@ -94,5 +202,20 @@ def recompute_for_topics_and_languages():
 
 
 if __name__ == "__main__":
-    clean_the_cache()
-    recompute_for_users()
+    parser = argparse.ArgumentParser(description="Recomputes the ArticlesCache")
+    parser.add_argument("--processes", type=int, default=DEFAULT_PROCESSES)
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="ignore the checkpoint of a previous, unfinished run",
+    )
+    args = parser.parse_args()
+
+    if args.fresh and os.path.exists(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
+
+    # a run that resumes must not throw away what was already computed
+    if not os.path.exists(CHECKPOINT_FILE):
+        clean_the_cache()
+
+    recompute_for_users(args.processes)
@@ -97,7 +97,8 @@ def delete_articles_older_than(DAYS, print_progress_for_every_article=False, del
             from zeeguu.core.elastic.indexing import remove_from_index
 
             if delete_from_ES:
-                remove_from_index(each)
+                if remove_from_index(each):
+                    deleted_from_es += 1
 
             if i % BATCH_COMMIT_SIZE == 0:
                 print(
@@ -2,36 +2,54 @@
 
 """
 
-    goes through all the articles in the DB 
+    goes through all the articles in the DB
     by language and associates them with the
     corresponding topics
-    
+
+    the articles are matched against all the topics
+    of their language in one pass (see topic_matcher);
+    only their id, title, url, and topics are loaded,
+    and the new associations are inserted in batches
 
 """
 
+from sqlalchemy.orm import load_only, joinedload, selectinload
+
 import zeeguu.core
-from zeeguu.core.model import Article, Language, LocalizedTopic
+from zeeguu.core.content_retriever.topic_matcher import matcher_for
+from zeeguu.core.model import Article, Language, Url
+from zeeguu.core.model.article import article_topic_map
 
 session = zeeguu.core.db.session
 
-counter = 0
+BATCH_SIZE = 1000
 
 languages = Language.available_languages()
 
 for language in languages:
-    articles = Article.query.filter(Article.language == language).order_by(Article.id.desc()).all()
+    matcher = matcher_for(language)
+
+    articles = (
+        Article.query.filter(Article.language == language)
+        .options(
+            load_only(Article.id, Article.title),
+            joinedload(Article.url).joinedload(Url.domain),
+            selectinload(Article.topics),
+        )
+        .order_by(Article.id.desc())
+        .all()
+    )
+
+    new_associations = []
+    for article in articles:
+        existing = set(each.id for each in article.topics)
+        for topic_id in matcher.topic_ids_of(article) - existing:
+            new_associations.append({"article_id": article.id, "topic_id": topic_id})
 
-    loc_topics = LocalizedTopic.all_for_language(language)
+    print(f"{language.code}: {len(articles)} articles, {len(new_associations)} new tags")
 
-    total_articles = len(articles)
-    for article in articles:
-        counter += 1
-        for loc_topic in loc_topics:
-            if loc_topic.matches_article(article):
-                article.add_topic(loc_topic.topic)
-                #print(f" #{loc_topic.topic_translated}: {article.url.as_string()}")
-        session.add(article)
-        if counter % 1000 == 0:
-            percentage = (100 * counter / total_articles) / 100
-            print(f"{counter} dorticles done ({percentage}%). last article id: {article.id}. comitting... ")
-            session.commit()
+    for start in range(0, len(new_associations), BATCH_SIZE):
+        batch = new_associations[start : start + BATCH_SIZE]
+        session.connection().execute(article_topic_map.insert(), batch)
+        session.commit()
+        print(f"{start + len(batch)} tags added. comitting... ")
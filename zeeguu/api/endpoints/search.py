@@ -6,7 +6,10 @@ from zeeguu.core.model.search_filter import SearchFilter
 from zeeguu.core.model.search_subscription import SearchSubscription
 from zeeguu.core.model.user_article import UserArticle
 
-from zeeguu.core.content_recommender import article_search_for_user
+from zeeguu.core.content_recommender import (
+    article_search_for_user,
+    recommendation_cache,
+)
 
 from .utils.route_wrappers import cross_domain, with_session
 from .utils.json_result import json_result
@@ -41,6 +44,8 @@ def subscribe_to_search(search_terms):
     """
     search = Search.find_or_create(session, search_terms)
     SearchSubscription.find_or_create(session, flask.g.user, search)
+    recommendation_cache.invalidate_for_user(flask.g.user)
+    session.commit()
 
     return json_result(search.as_dictionary())
 
@@ -64,6 +69,7 @@ def unsubscribe_from_search():
         session.delete(to_delete)
         to_delete2 = Search.find_by_id(search_id)
         session.delete(to_delete2)
+        recommendation_cache.invalidate_for_user(flask.g.user)
         session.commit()
 
     except Exception as e:
@@ -120,6 +126,8 @@ def filter_search(search_terms):
 
     search = Search.find_or_create(session, search_terms)
     SearchFilter.find_or_create(session, flask.g.user, search)
+    recommendation_cache.invalidate_for_user(flask.g.user)
+    session.commit()
 
     return json_result(search.as_dictionary())
 
@@ -142,6 +150,7 @@ def unfilter_search():
         session.delete(to_delete)
         to_delete = Search.find_by_id(search_id)
         session.delete(to_delete)
+        recommendation_cache.invalidate_for_user(flask.g.user)
         session.commit()
 
     except Exception as e:
@@ -201,6 +210,6 @@ def search_for_search_terms(search_terms):
     """
 
     articles = article_search_for_user(flask.g.user, 20, search_terms)
-    article_infos = [UserArticle.user_article_info(flask.g.user, a) for a in articles]
+    article_infos = UserArticle.user_article_infos(flask.g.user, articles)
 
     return json_result(article_infos)
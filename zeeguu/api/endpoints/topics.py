@@ -9,6 +9,7 @@ from zeeguu.core.model import (
     UserLanguage,
     Language,
 )
+from zeeguu.core.content_recommender import recommendation_cache
 
 from .utils.route_wrappers import cross_domain, with_session
 from .utils.json_result import json_result
@@ -41,6 +42,8 @@ def subscribe_to_topic_with_id():
 
     topic_object = Topic.find_by_id(topic_id)
     TopicSubscription.find_or_create(session, flask.g.user, topic_object)
+    recommendation_cache.invalidate_for_user(flask.g.user)
+    session.commit()
 
     return "OK"
 
@@ -62,6 +65,7 @@ def unsubscribe_from_topic():
     try:
         to_delete = TopicSubscription.with_topic_id(topic_id, flask.g.user)
         session.delete(to_delete)
+        recommendation_cache.invalidate_for_user(flask.g.user)
         session.commit()
     except Exception as e:
         from sentry_sdk import capture_exception
@@ -153,6 +157,8 @@ def subscribe_to_filter_with_id():
 
     filter_object = Topic.find_by_id(filter_id)
     TopicFilter.find_or_create(session, flask.g.user, filter_object)
+    recommendation_cache.invalidate_for_user(flask.g.user)
+    session.commit()
 
     return "OK"
 
@@ -173,6 +179,7 @@ def unsubscribe_from_filter():
     try:
         to_delete = TopicFilter.with_topic_id(filter_id, flask.g.user)
         session.delete(to_delete)
+        recommendation_cache.invalidate_for_user(flask.g.user)
         session.commit()
     except Exception as e:
         from sentry_sdk import capture_exception
@@ -217,7 +224,10 @@ def cache_articles(code):
     if code != zeeguu.core.app.config.get("PRIVATE_API_CODE"):
         return "Nope"
 
-    from zeeguu.core.model import Topic, Language
+    from zeeguu.core.model import Topic, Language, cached_article_ids
+
+    # called after the crawls, which happen in another process
+    cached_article_ids.clear()
 
     for each in Topic.get_all_topics():
         each.all_articles()
@@ -1,6 +1,12 @@
 import flask
 
-from zeeguu.core.content_recommender import article_recommendations_for_user, topic_filter_for_user
+from zeeguu.core.content_recommender import (
+    article_recommendations_for_user,
+    article_recommendation_cards_for_user,
+    topic_filter_for_user,
+    topic_filter_cards_for_user,
+)
+from zeeguu.core.elastic.settings import ES_CARDS_FROM_INDEX
 from zeeguu.core.model import UserArticle
 
 from .utils.route_wrappers import cross_domain, with_session
@@ -20,8 +26,12 @@ def user_articles_recommended(count: int = 20):
     recommendations for all languages
     """
 
+    if ES_CARDS_FROM_INDEX:
+        cards = article_recommendation_cards_for_user(flask.g.user, count)
+        return json_result(_user_article_infos_from_cards(cards))
+
     articles = article_recommendations_for_user(flask.g.user, count)
-    article_infos = [UserArticle.user_article_info(flask.g.user, a) for a in articles]
+    article_infos = UserArticle.user_article_infos(flask.g.user, articles)
 
     return json_result(article_infos)
 
@@ -43,11 +53,23 @@ def user_articles_topic_filtered():
     max_duration = request.form.get("max_duration", None)
     min_duration = request.form.get("min_duration", None)
     difficulty_level = request.form.get("difficulty_level", None)
-    
-    
+
+    if ES_CARDS_FROM_INDEX:
+        cards = topic_filter_cards_for_user(
+            flask.g.user,
+            MAX_ARTICLES_PER_TOPIC,
+            newer_than,
+            media_type,
+            max_duration,
+            min_duration,
+            difficulty_level,
+            topic,
+        )
+        return json_result(_user_article_infos_from_cards(cards))
+
     articles = topic_filter_for_user(flask.g.user, MAX_ARTICLES_PER_TOPIC, newer_than, 
     media_type, max_duration, min_duration, difficulty_level,topic)
-    article_infos = [UserArticle.user_article_info(flask.g.user, a) for a in articles]
+    article_infos = UserArticle.user_article_infos(flask.g.user, articles)
 
     return json_result(article_infos)
 
@@ -74,3 +96,7 @@ def user_articles_cohort():
     """
 
     return json_result(flask.g.user.cohort_articles_for_user())
+
+
+def _user_article_infos_from_cards(cards):
+    return UserArticle.user_article_infos_from_cards(flask.g.user, cards)
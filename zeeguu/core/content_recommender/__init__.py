@@ -1,5 +1,7 @@
 from .elastic_recommender import (
     article_recommendations_for_user,
+    article_recommendation_cards_for_user,
     article_search_for_user,
-    topic_filter_for_user
+    topic_filter_for_user,
+    topic_filter_cards_for_user,
 )
@@ -0,0 +1,163 @@
+"""
+
+    In-process index of the tokens in the title and content of the
+    recent articles, used to apply the search filters of a user
+    (i.e. the keywords they don't want to see) without scanning the
+    whole content column with LIKE '%keyword%'.
+
+    A keyword occurs in a text exactly when it occurs in one of the
+    tokens of the text, as long as it is made only of word characters:
+    such a keyword can not span two tokens. So the articles to exclude
+    are the union of the ids of all the tokens that contain the keyword;
+    scanning the vocabulary is much cheaper than scanning the content.
+    Keywords with other characters (e.g. "new york") can not be answered
+    by the index; for those the caller keeps the LIKE.
+
+    Only the MAX_INDEXED_ARTICLES most recent articles of a language are
+    indexed: the refresh adds the articles crawled since, and forgets
+    as many of the oldest ones, such that neither the index nor the
+    list of ids to exclude keeps growing. The older articles are below
+    first_id and must be filtered with the LIKE too.
+
+"""
+
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+import zeeguu.core
+
+MAX_INDEXED_ARTICLES = 10000
+
+# how often the index looks for newly crawled articles
+REFRESH_INTERVAL = 10 * 60  # seconds
+
+_TOKEN = re.compile(r"\w+")
+# _ and % are wildcards in a LIKE
+_INDEXABLE_KEYWORD = re.compile(r"^[^\W_]+$")
+
+
+def can_be_answered_by_index(keyword):
+    return bool(_INDEXABLE_KEYWORD.match(keyword))
+
+
+def tokens(text):
+    return set(_TOKEN.findall(text or ""))
+
+
+class TokenIndex:
+    """
+    Maps every token to the ascending ids of the articles that contain it
+    """
+
+    def __init__(self):
+        self.postings = {}  # token -> array of article ids
+        self.article_ids = array("i")
+        self.first_id = None
+        self.last_id = 0
+        self.lock = threading.Lock()
+
+    def add(self, article_id, title, content):
+        # the ids must be added in ascending order
+        for token in tokens(title) | tokens(content):
+            ids = self.postings.get(token)
+            if ids is None:
+                ids = self.postings[token] = array("i")
+            ids.append(article_id)
+
+        self.article_ids.append(article_id)
+        self.first_id = self.article_ids[0]
+        self.last_id = article_id
+
+    def keep_most_recent(self, count):
+        """
+        Forgets all the articles but the :param count most recent ones
+        """
+        if len(self.article_ids) <= count:
+            return
+
+        first_kept = self.article_ids[-count]
+        for token, ids in list(self.postings.items()):
+            older = bisect_left(ids, first_kept)
+            if older == len(ids):
+                del self.postings[token]
+            elif older:
+                del ids[:older]
+
+        del self.article_ids[:-count]
+        self.first_id = first_kept
+
+    def ids_containing(self, keyword):
+        result = set()
+        for token, ids in self.postings.items():
+            if keyword in token:
+                result.update(ids)
+        return result
+
+    def ids_containing_any(self, keywords):
+        """
+        :return: the first and last indexed id, and the ids
+        of the articles which contain any of the :param keywords
+        """
+        with self.lock:
+            result = set()
+            for keyword in keywords:
+                result |= self.ids_containing(keyword)
+            return self.first_id, self.last_id, result
+
+
+class _LanguageTokenIndex(TokenIndex):
+    def __init__(self, language_id):
+        super().__init__()
+        self.language_id = language_id
+        self.last_refresh = 0
+
+    def refresh_if_needed(self):
+        with self.lock:
+            if time.time() - self.last_refresh > REFRESH_INTERVAL:
+                self.refresh()
+
+    def refresh(self):
+        from zeeguu.core.model import Article
+
+        query = zeeguu.core.db.session.query(
+            Article.id, Article.title, Article.content
+        ).filter(Article.language_id == self.language_id)
+
+        if self.first_id is None:
+            # the first time, only the most recent articles
+            recent = query.order_by(Article.id.desc()).limit(MAX_INDEXED_ARTICLES)
+            rows = reversed(recent.all())
+        else:
+            rows = query.filter(Article.id > self.last_id).order_by(Article.id)
+
+        for article_id, title, content in rows:
+            self.add(article_id, title, content)
+        self.keep_most_recent(MAX_INDEXED_ARTICLES)
+
+        self.last_refresh = time.time()
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def index_for(language):
+    """
+    :return: the index of :param language, with the
+    articles crawled until now
+    """
+    with _indexes_lock:
+        if language.id not in _indexes:
+            _indexes[language.id] = _LanguageTokenIndex(language.id)
+        index = _indexes[language.id]
+
+    index.refresh_if_needed()
+    return index
+
+
+def clear():
+    with _indexes_lock:
+        _indexes.clear()
@@ -0,0 +1,191 @@
+"""
+
+    In-process inverted index of the article_word_map, used by the
+    MySQL search when ES is not available.
+
+    Per language it maps every ArticleWord to the (ascending) ids of
+    the articles that contain it, stored as int arrays. A search term
+    matches all the words that it is a prefix of (the same as the
+    LIKE 'term%' in ArticleWord.get_articles_for_word) and several terms
+    must all match. Only the ids of the final page are loaded as
+    Article objects.
+
+    The index is built on first use and then refreshed incrementally:
+    every REFRESH_INTERVAL it only loads the map rows of the articles
+    that were crawled since (i.e. with a larger id). Only the
+    MAX_INDEXED_ARTICLES most recent articles of a language are
+    indexed; every refresh forgets the oldest ones, such that the
+    index does not keep growing. The search is for the most recent
+    matches anyway.
+
+"""
+
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+import zeeguu.core
+
+MAX_INDEXED_ARTICLES = 20000
+
+# how often the index looks for newly crawled articles
+REFRESH_INTERVAL = 10 * 60  # seconds
+
+# larger than any character in a word; bounds the range of a prefix
+_MAX_CHAR = "\U0010ffff"
+
+
+class _LanguageIndex:
+    def __init__(self, language_id):
+        self.language_id = language_id
+        self.postings = {}  # word -> array of article ids
+        # article id -> published timestamp, in ascending order of the ids
+        self.published = {}
+        self.sorted_words = []
+        self.last_article_id = 0
+        self.last_refresh = 0
+        self.lock = threading.Lock()
+
+    def refresh_if_needed(self):
+        with self.lock:
+            if time.time() - self.last_refresh > REFRESH_INTERVAL:
+                self.refresh()
+
+    def refresh(self):
+        from zeeguu.core.model import Article, ArticleWord
+        from zeeguu.core.model.article_word import article_word_map
+
+        rows = (
+            zeeguu.core.db.session.query(
+                ArticleWord.word,
+                article_word_map.c.article_id,
+                Article.published_time,
+            )
+            .join(article_word_map, article_word_map.c.word_id == ArticleWord.id)
+            .join(Article, Article.id == article_word_map.c.article_id)
+            .filter(Article.language_id == self.language_id)
+            .filter(Article.broken == 0)
+            .filter(Article.word_count > Article.MINIMUM_WORD_COUNT)
+            .filter(article_word_map.c.article_id >= self._first_id_to_load())
+            .order_by(article_word_map.c.article_id)
+        )
+
+        new_words = False
+        for word, article_id, published_time in rows:
+            ids = self.postings.get(word)
+            if ids is None:
+                ids = self.postings[word] = array("i")
+                new_words = True
+            # the rows are ordered by article id; the arrays stay sorted
+            if not ids or ids[-1] != article_id:
+                ids.append(article_id)
+
+            if article_id not in self.published:
+                self.published[article_id] = (
+                    published_time.timestamp() if published_time else 0
+                )
+            self.last_article_id = max(self.last_article_id, article_id)
+
+        if self._keep_most_recent(MAX_INDEXED_ARTICLES):
+            new_words = True
+        if new_words:
+            self.sorted_words = sorted(self.postings)
+        self.last_refresh = time.time()
+
+    def _first_id_to_load(self):
+        from zeeguu.core.model import Article
+
+        if self.last_article_id:
+            return self.last_article_id + 1
+
+        # the first time, only the most recent articles
+        oldest_recent = (
+            zeeguu.core.db.session.query(Article.id)
+            .filter(Article.language_id == self.language_id)
+            .order_by(Article.id.desc())
+            .offset(MAX_INDEXED_ARTICLES - 1)
+            .limit(1)
+            .scalar()
+        )
+        return oldest_recent or 0
+
+    def _keep_most_recent(self, count):
+        """
+        :return: True if some words were forgotten
+        """
+        if len(self.published) <= count:
+            return False
+
+        ids = list(self.published)
+        first_kept = ids[-count]
+        for article_id in ids[:-count]:
+            del self.published[article_id]
+
+        forgotten_words = False
+        for word, ids in list(self.postings.items()):
+            older = bisect_left(ids, first_kept)
+            if older == len(ids):
+                del self.postings[word]
+                forgotten_words = True
+            elif older:
+                del ids[:older]
+        return forgotten_words
+
+    def ids_for_prefix(self, prefix):
+        start = bisect_left(self.sorted_words, prefix)
+        end = bisect_left(self.sorted_words, prefix + _MAX_CHAR)
+
+        result = set()
+        for word in self.sorted_words[start:end]:
+            result.update(self.postings[word])
+        return result
+
+    def search(self, terms, count):
+        matches = None
+        # the narrowest terms first, such that the intersections stay small
+        for ids in sorted((self.ids_for_prefix(term) for term in terms), key=len):
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+
+        most_recent = sorted(
+            matches or [], key=lambda id: self.published[id], reverse=True
+        )
+        return most_recent[:count]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _index_for(language):
+    with _indexes_lock:
+        if language.id not in _indexes:
+            _indexes[language.id] = _LanguageIndex(language.id)
+        index = _indexes[language.id]
+
+    index.refresh_if_needed()
+    return index
+
+
+def article_ids_for_search(language, search, count):
+    """
+
+    :param search: one or more space separated terms; each of them
+    is a prefix of a word of the articles that are found
+
+    :return: the ids of the :param count most recent articles
+    in :param language that match all the terms of the search
+
+    """
+    terms = search.lower().split()
+    if not terms:
+        return []
+
+    return _index_for(language).search(terms, count)
+
+
+def clear():
+    with _indexes_lock:
+        _indexes.clear()
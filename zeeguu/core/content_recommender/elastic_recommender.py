@@ -7,7 +7,6 @@
 
 """
 
-from elasticsearch import Elasticsearch
 from elasticsearch_dsl import Search, Q, SF
 
 from zeeguu.core.model import (
@@ -20,12 +19,19 @@ from zeeguu.core.model import (
     Language,
 )
 
+from elasticsearch.exceptions import TransportError
+
 from zeeguu.core.elastic.elastic_query_builder import (
-    build_elastic_recommender_query,
-    build_elastic_search_query,
+    build_elastic_recommender_queries,
+    build_elastic_search_queries,
 )
 from zeeguu.core.util.timer_logging_decorator import time_this
-from zeeguu.core.elastic.settings import ES_CONN_STRING, ES_ZINDEX
+from zeeguu.core.content_recommender import recommendation_cache
+from zeeguu.core.elastic.client import es_client
+from zeeguu.core.elastic.settings import ES_ZINDEX, ES_SEARCH_TIMEOUT
+
+# the part of the ES documents needed to render the article cards
+CARD_SOURCE = ["card"]
 
 
 def _prepare_user_constraints(user):
@@ -98,42 +104,57 @@ def article_recommendations_for_user(
 
     """
 
-    final_article_mix = []
+    hit_list = _recommendation_hits(user, count, es_scale, es_decay, es_weight)
 
-    (
-        language,
-        upper_bounds,
-        lower_bounds,
-        topics_to_include,
-        topics_to_exclude,
-        wanted_user_topics,
-        unwanted_user_topics,
-    ) = _prepare_user_constraints(user)
+    articles = [a for a in _to_articles_from_ES_hits(hit_list) if not a.broken]
 
-    # build the query using elastic_query_builder
-    query_body = build_elastic_recommender_query(
-        count,
-        topics_to_include,
-        topics_to_exclude,
-        wanted_user_topics,
-        unwanted_user_topics,
-        language,
-        upper_bounds,
-        lower_bounds,
-        es_scale,
-        es_decay,
-        es_weight,
+    sorted_articles = sorted(articles, key=lambda x: x.published_time, reverse=True)
+
+    return sorted_articles
+
+
+def article_recommendation_cards_for_user(
+    user,
+    count,
+    es_scale="3d",
+    es_decay=0.8,
+    es_weight=4.2,
+):
+    """
+
+            Same as article_recommendations_for_user, but returns
+            the article_info dicts as stored in the index, without
+            going to the DB (see ES_CARDS_FROM_INDEX)
+
+    """
+
+    hit_list = _recommendation_hits(
+        user, count, es_scale, es_decay, es_weight, source=CARD_SOURCE
     )
 
-    es = Elasticsearch(ES_CONN_STRING)
-    res = es.search(index=ES_ZINDEX, body=query_body)
+    cards = _to_cards_from_ES_hits(hit_list)
+
+    return sorted(cards, key=lambda x: x.get("published", ""), reverse=True)
 
-    hit_list = res["hits"].get("hits")
-    final_article_mix.extend(_to_articles_from_ES_hits(hit_list))
 
-    if len(final_article_mix) == 0:
-        # build the query using elastic_query_builder
-        query_body = build_elastic_recommender_query(
+def _recommendation_hits(user, count, es_scale, es_decay, es_weight, source=False):
+    constraints, preferences_hash = recommendation_cache.user_constraints(
+        user, _prepare_user_constraints
+    )
+
+    def compute():
+        (
+            language,
+            upper_bounds,
+            lower_bounds,
+            topics_to_include,
+            topics_to_exclude,
+            wanted_user_topics,
+            unwanted_user_topics,
+        ) = constraints
+
+        # both the query and its fallback go in a single round trip
+        query_body, fallback_query_body = build_elastic_recommender_queries(
             count,
             topics_to_include,
             topics_to_exclude,
@@ -145,18 +166,12 @@ def article_recommendations_for_user(
             es_scale,
             es_decay,
             es_weight,
-            second_try=True,
         )
-        res = es.search(index=ES_ZINDEX, body=query_body)
-
-    hit_list = res["hits"].get("hits")
-    final_article_mix.extend(_to_articles_from_ES_hits(hit_list))
-
-    articles = [a for a in final_article_mix if a is not None and not a.broken]
 
-    sorted_articles = sorted(articles, key=lambda x: x.published_time, reverse=True)
+        return _search_with_fallback(query_body, fallback_query_body, source)
 
-    return sorted_articles
+    variant = (count, es_scale, es_decay, es_weight, repr(source))
+    return recommendation_cache.recommendations(preferences_hash, variant, compute)
 
 
 @time_this
@@ -169,8 +184,6 @@ def article_search_for_user(
     es_weight=4.2,
 ):
 
-    final_article_mix = []
-
     (
         language,
         upper_bounds,
@@ -181,8 +194,8 @@ def article_search_for_user(
         unwanted_user_topics,
     ) = _prepare_user_constraints(user)
 
-    # build the query using elastic_query_builder
-    query_body = build_elastic_search_query(
+    # both the query and its fallback go in a single round trip
+    query_body, fallback_query_body = build_elastic_search_queries(
         count,
         search_terms,
         topics_to_include,
@@ -197,91 +210,163 @@ def article_search_for_user(
         es_weight,
     )
 
-    es = Elasticsearch(ES_CONN_STRING)
-    res = es.search(index=ES_ZINDEX, body=query_body)
+    hit_list = _search_with_fallback(query_body, fallback_query_body)
 
-    hit_list = res["hits"].get("hits")
-    final_article_mix.extend(_to_articles_from_ES_hits(hit_list))
+    return [a for a in _to_articles_from_ES_hits(hit_list) if not a.broken]
 
-    if len(final_article_mix) == 0:
-        # build the query using elastic_query_builder
-        query_body = build_elastic_search_query(
-            count,
-            search_terms,
-            topics_to_include,
-            topics_to_exclude,
-            wanted_user_topics,
-            unwanted_user_topics,
-            language,
-            upper_bounds,
-            lower_bounds,
-            es_scale,
-            es_decay,
-            es_weight,
-            second_try=True,
-        )
-        res = es.search(index=ES_ZINDEX, body=query_body)
 
-        hit_list = res["hits"].get("hits")
-        final_article_mix.extend(_to_articles_from_ES_hits(hit_list))
+def topic_filter_for_user(
+    user,
+    count,
+    newer_than,
+    media_type,
+    max_duration,
+    min_duration,
+    difficulty_level,
+    topic,
+):
+    hit_list = _topic_filter_hits(
+        user,
+        count,
+        newer_than,
+        media_type,
+        max_duration,
+        min_duration,
+        difficulty_level,
+        topic,
+    )
 
-    return [a for a in final_article_mix if a is not None and not a.broken]
+    return [a for a in _to_articles_from_ES_hits(hit_list) if not a.broken]
 
 
-def topic_filter_for_user(user, 
+def topic_filter_cards_for_user(
+    user,
     count,
-    newer_than, 
-    media_type, 
-    max_duration, 
-    min_duration, 
+    newer_than,
+    media_type,
+    max_duration,
+    min_duration,
     difficulty_level,
-    topic):
+    topic,
+):
+    """
 
-    es = Elasticsearch(ES_CONN_STRING)
-    
-    s=Search().query(Q("term", language=user.learned_language.code()))
-    
-    if newer_than:
-        s=s.filter("range", published_time={"gte": f"now-{newer_than}d/d"})
+        Same as topic_filter_for_user, but returns the article_info
+        dicts as stored in the index (see ES_CARDS_FROM_INDEX)
+
+    """
+    hit_list = _topic_filter_hits(
+        user,
+        count,
+        newer_than,
+        media_type,
+        max_duration,
+        min_duration,
+        difficulty_level,
+        topic,
+        source=CARD_SOURCE,
+    )
+
+    return _to_cards_from_ES_hits(hit_list)
+
+
+def _topic_filter_hits(
+    user,
+    count,
+    newer_than,
+    media_type,
+    max_duration,
+    min_duration,
+    difficulty_level,
+    topic,
+    source=False,
+):
+    # the language is indexed as its (analyzed) name, e.g. "french"
+    s = Search().query(Q("term", language=user.learned_language.name.lower()))
 
+    if newer_than:
+        s = s.filter("range", published_time={"gte": f"now-{newer_than}d/d"})
 
     AVERAGE_WORDS_PER_MINUTE = 70
 
     if max_duration:
-        s=s.filter("range", word_count={"lte": int(max_duration) * AVERAGE_WORDS_PER_MINUTE})
+        s = s.filter(
+            "range", word_count={"lte": int(max_duration) * AVERAGE_WORDS_PER_MINUTE}
+        )
 
     if min_duration:
-        s=s.filter("range", word_count={"gte": int(min_duration) * AVERAGE_WORDS_PER_MINUTE})
+        s = s.filter(
+            "range", word_count={"gte": int(min_duration) * AVERAGE_WORDS_PER_MINUTE}
+        )
 
-    
     if media_type:
         if media_type == "video":
-            s=s.filter("term", video=1)
-        else: 
-            s=s.filter("term", video=0)
+            s = s.filter("term", video=1)
+        else:
+            s = s.filter("term", video=0)
 
     if topic != None and topic != "all":
-        s=s.filter("match", topics=topic.lower())
-    
+        s = s.filter("match", topics=topic.lower())
+
     if difficulty_level:
-        lower_bounds, upper_bounds = _difficuty_level_bounds()
-        s = s.filter("range", fk_difficulty={"gte": lower_bounds, 
-            "lte": upper_bounds})
+        lower_bounds, upper_bounds = _difficuty_level_bounds(difficulty_level)
+        s = s.filter(
+            "range", fk_difficulty={"gte": lower_bounds, "lte": upper_bounds}
+        )
 
     query = s.query
 
-    query_with_size = {"size": count, 
-        "query":query.to_dict(),
-        "sort" : [{ "published_time" : "desc" }]}
+    query_with_size = {
+        "size": count,
+        "query": query.to_dict(),
+        "sort": [{"published_time": "desc"}],
+    }
+
+    return _search(query_with_size, source)
 
-    res = es.search(index=ES_ZINDEX, body=query_with_size)
 
-    hit_list = res["hits"].get("hits")
-    
+def _search(query_body, source=False):
+    """
+    :param source: which part of the documents to bring back; by default
+    nothing, since the articles are then loaded from the DB anyway and the
+    _source includes the whole content of the article
+    """
+    res = es_client().search(
+        index=ES_ZINDEX,
+        body=query_body,
+        _source=source,
+        request_timeout=ES_SEARCH_TIMEOUT,
+    )
+
+    return res["hits"].get("hits")
+
+
+def _search_with_fallback(query_body, fallback_query_body, source=False):
+    """
+    Sends both queries in one _msearch; the hits of the fallback
+    are used only when the first query does not find anything
+    """
+    body = []
+    for each in [query_body, fallback_query_body]:
+        body.append({"index": ES_ZINDEX})
+        body.append(dict(each, _source=source))
+
+    res = es_client().msearch(body=body, request_timeout=ES_SEARCH_TIMEOUT)
+    primary, fallback = res["responses"]
 
-    final_article_mix  = _to_articles_from_ES_hits(hit_list)
+    hit_list = _hits_from_msearch_response(primary)
+    if len(hit_list) == 0:
+        hit_list = _hits_from_msearch_response(fallback)
 
-    return [a for a in final_article_mix if a is not None and not a.broken]
+    return hit_list
+
+
+def _hits_from_msearch_response(response):
+    # in a _msearch every query fails or succeeds on its own
+    if "error" in response:
+        raise TransportError(response.get("status", "N/A"), response["error"])
+
+    return response["hits"].get("hits")
 
 
 def _list_to_string(input_list):
@@ -289,10 +374,47 @@ def _list_to_string(input_list):
 
 
 def _to_articles_from_ES_hits(hits):
-    articles = []
-    for hit in hits:
-        articles.append(Article.find_by_id(hit.get("_id")))
-    return articles
+    # one query for all the hits instead of one per hit;
+    # the articles come back in the ES score order
+    return Article.find_by_ids([hit.get("_id") for hit in hits])
+
+
+def _to_cards_from_ES_hits(hits):
+    """
+    Articles indexed before the cards were stored in the index
+    don't have one; those are rendered from the DB instead
+
+    The index does not know about the articles that were deleted, or
+    voted broken, after they were indexed; these are looked up in one
+    query, on the id and broken columns only, and dropped
+    """
+    ids = [str(hit.get("_id")) for hit in hits]
+    if not ids:
+        return []
+
+    usable = {
+        str(id)
+        for id, broken in Article.query.with_entities(Article.id, Article.broken)
+        .filter(Article.id.in_(ids))
+        .all()
+        if not broken
+    }
+
+    cards = {}
+    for id, hit in zip(ids, hits):
+        card = hit.get("_source", {}).get("card")
+        if card and id in usable:
+            cards[id] = card
+
+    ids = [id for id in ids if id in usable]
+
+    missing = [id for id in ids if id not in cards]
+    for article in Article.find_by_ids(missing):
+        if not article.broken:
+            cards[str(article.id)] = article.article_info()
+
+    return [cards[id] for id in ids if id in cards]
+
 
 def _difficuty_level_bounds(level):
 
@@ -6,8 +6,8 @@
 
 """
 
-from sqlalchemy import not_, or_
-from zeeguu.core import info, logger
+from sqlalchemy import and_, not_, or_
+from zeeguu.core import logger
 from zeeguu.core.model import (
     Article,
     TopicFilter,
@@ -18,10 +18,18 @@ from zeeguu.core.model import (
     ArticlesCache,
     CohortArticleMap,
     Language,
+    Search,
 )
 
 from sortedcontainers import SortedList
 
+from zeeguu.core.content_recommender import article_token_index, article_word_index
+
+# the hashes are loaded for every new article, such that a hash stored
+# in the meantime gets its articles too; what a hash stands for never
+# changes, so its parsed preferences are kept
+_parsed_preferences = {}
+
 
 def article_recommendations_for_user(user, count):
     """
@@ -49,13 +57,8 @@ def article_recommendations_for_user(user, count):
     reading_pref_hash = _reading_preferences_hash(user)
     _recompute_recommender_cache_if_needed(user, zeeguu.core.db.session)
 
-    # two fast calls ot /articles/recommended might result in a race condition
-    # in _recompute_recommender_cache;
-    # race condition in _recompute_recommender_cache might result in
-    # duplicates in the db; since this is being sunset for the elastic search
-    # it's not worth fixing the race condition; instead we're simply
-    # ensuring that duplicate articles are removed at this point
-    all_articles = set(ArticlesCache.get_articles_for_hash(reading_pref_hash, count))
+    # the (hash, article) pairs are unique, so there are no duplicates
+    all_articles = ArticlesCache.get_articles_for_hash(reading_pref_hash, count)
 
     all_articles = [
         each for each in all_articles if (not each.broken and each.published_time)
@@ -76,19 +79,13 @@ def article_search_for_user(user, count, search):
 
     """
 
-    all_articles = _get_user_articles_sources_languages(user, 2500)
-    # We are just using the first and second word of the user's search now
-    search_articles = _get_articles_for_search_term(search)
+    # the ids come from the in-memory index of the article words;
+    # only the articles that are returned are loaded from the DB
+    ids = []
+    for language in Language.all_reading_for_user(user):
+        ids += article_word_index.article_ids_for_search(language, search, count)
 
-    if search_articles is None:
-        final = []
-    else:
-        s = set(all_articles)
-        final = [article for article in search_articles if article in s]
-        if len(final) < 5:
-            all_articles = _get_user_articles_sources_languages(user)
-            s = set(all_articles)
-            final = [article for article in search_articles if article in s]
+    final = [each for each in Article.find_by_ids(ids) if not each.broken]
 
     # Sort them, so the first 'count' articles will be the most recent ones
     final.sort(key=lambda each: each.published_time, reverse=True)
@@ -112,14 +109,24 @@ def _recompute_recommender_cache_if_needed(user, session):
     reading_pref_hash = _reading_preferences_hash(user)
     logger.info(f"Pref hash: {reading_pref_hash}")
 
-    articles_hash_obj = ArticlesCache.check_if_hash_exists(reading_pref_hash)
+    if ArticlesCache.check_if_hash_exists(reading_pref_hash):
+        logger.info("No need to recomputed recommender cache.")
+        return
+
+    # two fast calls to /articles/recommended should not both recompute;
+    # the second waits for the first and then finds the cache filled in
+    with ArticlesCache.lock_for_hash(reading_pref_hash) as acquired:
+        if not acquired:
+            logger.info("Recommender cache is being recomputed by someone else.")
+            return
+
+        if ArticlesCache.check_if_hash_exists(reading_pref_hash):
+            logger.info("Recommender cache was just recomputed.")
+            return
 
-    if articles_hash_obj is False:
         logger.info("Recomputing recommender cache...")
         _recompute_recommender_cache(reading_pref_hash, session, user)
 
-    logger.info("No need to recomputed recommender cache.")
-
 
 def _recompute_recommender_cache(
     reading_preferences_hash_code, session, user, article_limit=42
@@ -137,10 +144,115 @@ def _recompute_recommender_cache(
     """
     all_articles = _find_articles_for_user(user)
 
-    for art in all_articles:
-        cache_obj = ArticlesCache(art, reading_preferences_hash_code)
-        session.add(cache_obj)
-        session.commit()
+    ArticlesCache.add_all(
+        session,
+        [(reading_preferences_hash_code, art.id) for art in all_articles],
+    )
+
+
+def add_to_matching_recommender_caches(article, session):
+    """
+
+            Called for every newly crawled article: appends it to the
+            cache of every stored preference hash that it fits, such
+            that the cache does not need to be wiped and recomputed
+            after every crawl. The fitting is the same as the one in
+            _filter_subscribed_articles
+
+    :return: the number of hashes the article was added to
+
+    """
+
+    if article.broken or article.uploader_id is not None:
+        return 0
+
+    article_topic_ids = set(each.id for each in article.topics)
+    article_words = [each.word for each in article.words]
+
+    matching_hashes = [
+        content_hash
+        for content_hash, preferences in _all_stored_preferences()
+        if _article_fits_preferences(
+            article, article_topic_ids, article_words, preferences
+        )
+    ]
+
+    ArticlesCache.add_all(
+        session, [(content_hash, article.id) for content_hash in matching_hashes]
+    )
+    return len(matching_hashes)
+
+
+def _all_stored_preferences():
+    global _parsed_preferences
+
+    search_keywords = {}
+
+    def keywords(search_ids):
+        for id in search_ids:
+            if id not in search_keywords:
+                search = Search.find_by_id(id)
+                search_keywords[id] = search.keywords if search else None
+        return [search_keywords[id] for id in search_ids if search_keywords[id]]
+
+    parsed = {}
+    for content_hash in ArticlesCache.all_hashes():
+        if content_hash in _parsed_preferences:
+            parsed[content_hash] = _parsed_preferences[content_hash]
+            continue
+
+        preferences = ArticlesCache.preferences_from_hash(content_hash)
+        if preferences:
+            preferences["search_keywords"] = keywords(preferences["search_ids"])
+            preferences["filter_keywords"] = keywords(
+                preferences["search_filter_ids"]
+            )
+        parsed[content_hash] = preferences
+
+    # hashes whose articles were all deleted are forgotten as well
+    _parsed_preferences = parsed
+
+    return [
+        (content_hash, preferences)
+        for content_hash, preferences in parsed.items()
+        if preferences
+    ]
+
+
+def _article_fits_preferences(article, article_topic_ids, article_words, preferences):
+    if article.language.code != preferences["language_code"]:
+        return False
+
+    # 0. Appropriate difficulty
+    lower_bounds = preferences["level_min"] * 10
+    upper_bounds = preferences["level_max"] * 10
+    if article.fk_difficulty is None or not (
+        lower_bounds < article.fk_difficulty < upper_bounds
+    ):
+        return False
+
+    # 1. Keywords to exclude
+    for keyword_to_avoid in preferences["filter_keywords"]:
+        if keyword_to_avoid in article.title or keyword_to_avoid in article.content:
+            return False
+
+    # 2. Topics to exclude
+    if article_topic_ids.intersection(preferences["filter_ids"]):
+        return False
+
+    # 3. & 4. Topics and searches to include; if any,
+    # the article must be in one of the topics or match one of the searches
+    if preferences["topic_ids"] or preferences["search_keywords"]:
+        in_topics = article_topic_ids.intersection(preferences["topic_ids"])
+        in_searches = any(
+            word.startswith(keyword.lower())
+            for keyword in preferences["search_keywords"]
+            for word in article_words
+        )
+        if not (in_topics or in_searches):
+            return False
+
+    return True
 
 
 def _find_articles_for_user(user):
@@ -216,15 +328,7 @@ def _filter_subscribed_articles(
         keywords_to_avoid.append(user_search_filter.search.keywords)
     print(f"keywords to exclude: {keywords_to_avoid}")
 
-    for keyword_to_avoid in keywords_to_avoid:
-        query = query.filter(
-            not_(
-                or_(
-                    Article.title.contains(keyword_to_avoid),
-                    Article.content.contains(keyword_to_avoid),
-                )
-            )
-        )  # title does not contain keywords
+    query = _exclude_articles_containing(query, language, keywords_to_avoid)
 
     # 2. Topics to exclude / filter out
     # =================================
@@ -275,40 +379,54 @@ def _filter_subscribed_articles(
     return final_article_mix
 
 
-def _get_user_articles_sources_languages(user, limit=1000):
+def _exclude_articles_containing(query, language, keywords_to_avoid):
     """
 
-    This method is used to get all the user articles for the sources if there are any
-    selected sources for the user, and it otherwise gets all the articles for the
-    current learning languages for the user.
-
-    :param user: the user for which the articles should be fetched
-    :param limit: the amount of articles for each source or language
-    :return: a list of articles based on the parameters
+        The recent articles which contain any of the keywords are looked up
+        in the token index; the LIKE, which scans the whole content, is
+        only needed for the articles outside the index and for the
+        keywords which the index can't answer
 
     """
 
-    user_languages = Language.all_reading_for_user(user)
-    all_articles = []
-
-    for language in user_languages:
-        info(f"Getting articles for {language}")
-        new_articles = language.get_articles(most_recent_first=True)
-        all_articles.extend(new_articles)
-        info(f"Added {len(new_articles)} articles for {language}")
-
-    return all_articles
-
-
-def _get_articles_for_search_term(search_term):
-    search_terms = search_term.lower().split()
+    def _contains(keyword):
+        return or_(
+            Article.title.contains(keyword),
+            Article.content.contains(keyword),
+        )
 
-    individual_term_results = []
+    if not keywords_to_avoid:
+        return query
 
-    for each in search_terms:
-        individual_term_results.append(set(ArticleWord.get_articles_for_word(each)))
+    indexed_keywords = [
+        each
+        for each in keywords_to_avoid
+        if article_token_index.can_be_answered_by_index(each)
+    ]
+    if indexed_keywords:
+        index = article_token_index.index_for(language)
+        first_id, last_id, ids_to_avoid = index.ids_containing_any(indexed_keywords)
+        if first_id is None:
+            # nothing indexed for this language
+            indexed_keywords = []
+
+    other_keywords = [each for each in keywords_to_avoid if each not in indexed_keywords]
+
+    for keyword_to_avoid in other_keywords:
+        query = query.filter(not_(_contains(keyword_to_avoid)))
+
+    if indexed_keywords:
+        in_index = Article.id.between(first_id, last_id)
+        if ids_to_avoid:
+            in_index = and_(in_index, not_(Article.id.in_(ids_to_avoid)))
+        # older articles, and the ones crawled since the last refresh
+        not_in_index = and_(
+            not_(Article.id.between(first_id, last_id)),
+            *[not_(_contains(each)) for each in indexed_keywords],
+        )
+        query = query.filter(or_(in_index, not_in_index))
 
-    return individual_term_results[0].intersection(*individual_term_results[1:])
+    return query
 
 
 def _reading_preferences_hash(user):
@@ -0,0 +1,93 @@
+"""
+
+    In-process cache for the recommendations of /user_articles/recommended.
+
+    Two levels:
+     - per user: the constraints derived from the reading preferences
+       (i.e. the result of _prepare_user_constraints, which takes six or
+       more queries to compute) together with their hash
+     - per preference hash: the ranked list of ES hits for those
+       preferences; users with the same preferences share it
+
+    The per user entries are kept together with the preferences_version
+    of the user, which the endpoints that change the preferences
+    increment (see invalidate_for_user). The version is saved with the
+    change itself, when the caller commits, so every process notices it
+    at the next request of the user, and none of them caches the old
+    preferences under the new version. Both levels also expire after a
+    while, since new articles are crawled all the time.
+
+"""
+
+from zeeguu.core.util.hash import text_hash
+from zeeguu.core.util.ttl_cache import TTLCache
+
+MAX_CACHED_USERS = 10000
+USER_PREFERENCES_TTL = 30 * 60  # seconds
+
+MAX_CACHED_RECOMMENDATIONS = 2000
+RECOMMENDATIONS_TTL = 10 * 60  # seconds
+
+
+_user_preferences = TTLCache(MAX_CACHED_USERS, USER_PREFERENCES_TTL)
+_recommendations = TTLCache(MAX_CACHED_RECOMMENDATIONS, RECOMMENDATIONS_TTL)
+
+
+def user_constraints(user, compute):
+    """
+    :param compute: called with the user when the constraints are not cached;
+    must return a tuple that starts with the learned language of the user
+    :return: the constraints and their hash
+
+    The language is a model object, which can't outlive the DB session
+    it was loaded in, so it's not cached but taken from the user.
+    """
+    version = user.preferences_version
+    cached = _user_preferences.get(user.id)
+    if cached is None or cached[0] != version:
+        language, *rest = compute(user)
+        preferences_hash = text_hash(repr((language.code, *rest)))
+        cached = (version, tuple(rest), preferences_hash)
+        _user_preferences.put(user.id, cached)
+
+    _, rest, preferences_hash = cached
+    return (user.learned_language, *rest), preferences_hash
+
+
+def recommendations(preferences_hash, variant, compute):
+    """
+    :param variant: whatever else, besides the preferences, the results
+    depend on (e.g. count, scoring parameters); must be hashable
+    :param compute: called without arguments when the results are not cached
+    """
+    key = (preferences_hash, variant)
+
+    cached = _recommendations.get(key)
+    if cached is not None:
+        return cached
+
+    result = compute()
+    _recommendations.put(key, result)
+    return result
+
+
+def invalidate_for_user(user):
+    """
+    To be called in the transaction that changes the preferences of
+    :param user; takes effect when the caller commits it
+    """
+    # the recommendations cached for the old preferences hash
+    # can stay; they are still right for other users that have it
+    user.preferences_version = (user.preferences_version or 0) + 1
+
+
+def clear():
+    _user_preferences.clear()
+    _recommendations.clear()
+
+
+def cache_stats():
+    return dict(
+        user_preferences=_user_preferences.stats(),
+        recommendations=_recommendations.stats(),
+    )
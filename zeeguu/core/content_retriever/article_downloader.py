@@ -8,29 +8,30 @@
 
 import newspaper
 import re
+import time
 
 from pymysql import DataError
+from sqlalchemy import inspect
 
 import zeeguu.core
 from zeeguu.core import log, debug
 
 from zeeguu.core import model
-from zeeguu.core.content_retriever.content_cleaner import cleanup_non_content_bits
-from zeeguu.core.content_retriever.quality_filter import sufficient_quality
-from zeeguu.core.content_retriever.unicode_normalization import (
-    flatten_composed_unicode_characters,
-)
-from zeeguu.core.model import Url, RSSFeed, LocalizedTopic, ArticleWord
+from zeeguu.core.content_retriever.article_processing import process_article
+from zeeguu.core.content_retriever.crawl_metrics import CrawlMetrics
+from zeeguu.core.content_retriever.fetch import new_session
+from zeeguu.core.content_retriever import lingo_rank_enrichment
+from zeeguu.core.content_retriever.near_duplicates import near_duplicate_of
+from zeeguu.core.content_retriever.topic_matcher import matcher_for
+from zeeguu.core.model import Url, RSSFeed, Topic, ArticleWord, UrlRedirect
+from zeeguu.core.model import ArticleFingerprint
+from zeeguu.core.model.feed import HEADERS
 import requests
 
-from elasticsearch import Elasticsearch
-from zeeguu.core.elastic.settings import ES_CONN_STRING, ES_ZINDEX
 from zeeguu.core.elastic.indexing import document_from_article
-from zeeguu.core.model.article import MAX_CHAR_COUNT_IN_SUMMARY
 
-from zeeguu.core.model.difficulty_lingo_rank import DifficultyLingoRank
 from sentry_sdk import capture_exception as capture_to_sentry
-from zeeguu.core.elastic.indexing import index_in_elasticsearch
+from zeeguu.core.elastic.bulk_indexer import BulkIndexer
 
 
 LOG_CONTEXT = "FEED RETRIEVAL"
@@ -49,12 +50,63 @@ class SkippedAlreadyInDB(Exception):
     pass
 
 
+class SkippedAsNearDuplicate(Exception):
+    def __init__(self, canonical_article_id):
+        self.canonical_article_id = canonical_article_id
+
+
+# resolving the redirects of the feed items of a host (often the same
+# tracking or shortening service) reuses the connections of this session
+_http_session = new_session(HEADERS)
+
+REDIRECT_TIMEOUT = 10  # seconds
+
+
 def _url_after_redirects(url):
-    # solve redirects and save the clean url
-    response = requests.get(url)
+    # solve redirects and save the clean url; a HEAD is enough for that,
+    # but some servers refuse it, in which case we fall back to a GET
+    # of which we only read the headers
+    try:
+        response = _http_session.head(
+            url, allow_redirects=True, timeout=REDIRECT_TIMEOUT
+        )
+        if response.status_code < 400:
+            return response.url
+    except requests.exceptions.TooManyRedirects:
+        raise
+    except requests.exceptions.RequestException:
+        pass
+
+    response = _http_session.get(url, stream=True, timeout=REDIRECT_TIMEOUT)
+    response.close()
     return response.url
 
 
+def url_after_redirects(session, url):
+    """
+    Like _url_after_redirects, but every url is resolved only once:
+    the result is remembered in the UrlRedirect table
+    """
+    final = UrlRedirect.final_url(url)
+    if final is None:
+        final = _url_after_redirects(url)
+        UrlRedirect.remember(session, url, final)
+    return final
+
+
+def known_article(url):
+    """
+    True if there is already an article at :param url, which is the url of a
+    feed item, either as it is, or after its (previously resolved) redirects;
+    checked before anything is requested for the item
+    """
+    if model.Article.find(url):
+        return True
+
+    final = UrlRedirect.final_url(url)
+    return final is not None and final != url and model.Article.find(final) is not None
+
+
 def _date_in_the_future(time):
     from datetime import datetime
 
@@ -72,11 +124,18 @@ def banned_url(url):
     return False
 
 
-def download_from_feed(feed: RSSFeed, session, limit=1000, save_in_elastic=True):
+def download_from_feed(
+    feed: RSSFeed, session, limit=1000, save_in_elastic=True, indexer=None
+):
     """
 
     Session is needed because this saves stuff to the DB.
 
+    :param indexer: the BulkIndexer of the new articles, when crawling
+    several feeds; if not given, one is used for this feed only
+
+    :return: the CrawlMetrics of the crawl
+
 
     last_crawled_time is useful because otherwise there would be a lot of time
     wasted trying to retrieve the same articles, especially the ones which
@@ -85,11 +144,13 @@ def download_from_feed(feed: RSSFeed, session, limit=1000, save_in_elastic=True)
 
     """
 
+    if save_in_elastic and indexer is None:
+        with BulkIndexer(session) as indexer:
+            return download_from_feed(feed, session, limit, save_in_elastic, indexer)
+
     print(feed.url)
 
-    downloaded = 0
-    skipped_due_to_low_quality = 0
-    skipped_already_in_db = 0
+    metrics = CrawlMetrics(feed)
 
     last_retrieval_time_from_DB = None
     last_retrieval_time_seen_this_crawl = None
@@ -98,19 +159,27 @@ def download_from_feed(feed: RSSFeed, session, limit=1000, save_in_elastic=True)
         last_retrieval_time_from_DB = feed.last_crawled_time
         log(f"LAST CRAWLED::: {last_retrieval_time_from_DB}")
 
+    validators = feed.http_validators()
     try:
-        items = feed.feed_items(last_retrieval_time_from_DB)
+        items = feed.feed_items_at(
+            feed.url.as_string(), last_retrieval_time_from_DB, validators, metrics
+        )
     except Exception as e:
         capture_to_sentry(e)
-        return
+        metrics.error = repr(e)
+        metrics.save(session)
+        return metrics
 
     for feed_item in items:
 
-        skipped_already_in_db = 0
-
-        if downloaded >= limit:
+        if metrics.downloaded >= limit:
             break
 
+        if indexer:
+            indexer.flush_if_due()
+
+        metrics.items += 1
+
         feed_item_timestamp = feed_item["published_datetime"]
 
         if _date_in_the_future(feed_item_timestamp):
@@ -128,44 +197,61 @@ def download_from_feed(feed: RSSFeed, session, limit=1000, save_in_elastic=True)
                 f"+updated feed's last crawled time to {last_retrieval_time_seen_this_crawl}"
             )
 
+        if known_article(feed_item["url"]):
+            metrics.skipped("already_in_db")
+            log(" - Already in DB")
+            continue
+
         try:
             log("before redirects")
             log(feed_item["url"])
-            url = _url_after_redirects(feed_item["url"])
+            url = url_after_redirects(session, feed_item["url"])
             log("after redirects")
             log(url)
 
+        # a broken item does not make the crawl of the feed fail (that
+        # would back off the crawls of the feed; see crawl_schedule)
         except requests.exceptions.TooManyRedirects:
-            raise Exception(f"- Too many redirects")
-        except Exception:
-            raise Exception(
-                f"- Could not get url after redirects for {feed_item['url']}"
-            )
+            log(f"- Too many redirects for {feed_item['url']}")
+            metrics.failed += 1
+            continue
+        except Exception as e:
+            log(f"- Could not get url after redirects for {feed_item['url']}: {e}")
+            metrics.failed += 1
+            continue
 
         if banned_url(url):
             log("Banned Url")
+            metrics.skipped("banned")
             continue
 
         session.add(feed)
         session.commit()
 
         try:
-            new_article = download_feed_item(session, feed, feed_item, url)
-            downloaded += 1
+            new_article = download_feed_item(
+                session, feed, feed_item, url, metrics=metrics
+            )
         except SkippedForTooOld:
             log("- Article too old")
+            metrics.skipped("too_old")
             continue
         except SkippedForLowQuality as e:
             log(f" - Low quality: {e.reason}")
-            skipped_due_to_low_quality += 1
+            metrics.skipped("low_quality")
             continue
         except SkippedAlreadyInDB:
-            skipped_already_in_db += 1
+            metrics.skipped("already_in_db")
             log(" - Already in DB")
             continue
+        except SkippedAsNearDuplicate as e:
+            metrics.skipped("near_duplicate")
+            log(f" - Near duplicate of article {e.canonical_article_id}")
+            continue
 
         except Exception as e:
             capture_to_sentry(e)
+            metrics.failed += 1
 
             if hasattr(e, "message"):
                 log(e.message)
@@ -173,18 +259,38 @@ def download_from_feed(feed: RSSFeed, session, limit=1000, save_in_elastic=True)
                 log(e)
             continue
 
+        if not new_article:
+            metrics.failed += 1
+            continue
+
+        metrics.downloaded += 1
         if save_in_elastic:
-            if new_article:
-                index_in_elasticsearch(new_article, session)
+            with metrics.timed("es_seconds"):
+                indexer.add(new_article)
+
+        lingo_rank_enrichment.save_finished(session, indexer)
+    else:
+        # all the items were crawled; until the feed changes, the next
+        # crawl can skip it (the metrics are saved in the same commit)
+        feed.update_http_validators(validators)
+        session.add(feed)
+
+    metrics.log_summary()
+    metrics.save(session)
+    return metrics
 
-    log(f"*** Downloaded: {downloaded} From: {feed.title}")
-    log(f"*** Low Quality: {skipped_due_to_low_quality}")
-    log(f"*** Already in DB: {skipped_already_in_db}")
-    log(f"*** ")
 
+def download_feed_item(session, feed, feed_item, url, processed=None, metrics=None):
+    """
+
+    :param processed: the ProcessedArticle at url, if it was
+    already downloaded and processed (see concurrent_crawler)
 
-def download_feed_item(session, feed, feed_item, url):
+    :param metrics: the CrawlMetrics of the crawl of the feed
+
+    """
     new_article = None
+    metrics = metrics or CrawlMetrics(feed)
 
     title = feed_item["title"]
 
@@ -205,48 +311,36 @@ def download_feed_item(session, feed, feed_item, url):
 
     try:
 
-        art = newspaper.Article(url)
-        art.download()
-        art.parse()
+        processed = processed or process_article(
+            url, feed_item["summary"], feed.language.code
+        )
 
         debug("- Succesfully parsed")
+        metrics.processed(processed)
 
-        cleaned_up_text = cleanup_non_content_bits(art.text)
-
-        cleaned_up_text = flatten_composed_unicode_characters(cleaned_up_text)
+        if processed.low_quality_reason:
+            raise SkippedForLowQuality(processed.low_quality_reason)
 
-        is_quality_article, reason = sufficient_quality(art)
+        duplicate_of = near_duplicate_of(feed.language, processed.simhash)
+        if duplicate_of:
+            raise SkippedAsNearDuplicate(duplicate_of)
 
-        if not is_quality_article:
-            raise SkippedForLowQuality(reason)
+        db_start = time.monotonic()
 
-        summary = feed_item["summary"]
-        # however, this is not so easy... there have been cases where
-        # the summary is just malformed HTML... thus we try to extract
-        # the text:
-        from bs4 import BeautifulSoup
-
-        soup = BeautifulSoup(summary, "lxml")
-        summary = soup.get_text()
-        # then there are cases where the summary is huge... so we clip it
-        summary = summary[:MAX_CHAR_COUNT_IN_SUMMARY]
-        # and if there is still no summary, we simply use the beginning of
-        # the article
-        if len(summary) < 10:
-            summary = cleaned_up_text[:MAX_CHAR_COUNT_IN_SUMMARY]
-
-            # Create new article and save it to DB
+        # Create new article and save it to DB
         new_article = zeeguu.core.model.Article(
             Url.find_or_create(session, url),
             title,
-            ", ".join(art.authors),
-            cleaned_up_text,
-            summary,
+            processed.authors,
+            processed.content,
+            processed.summary,
             published_datetime,
             feed,
             feed.language,
+            fk_difficulty=processed.fk_difficulty,
         )
         session.add(new_article)
+        session.add(ArticleFingerprint(new_article, processed.simhash))
 
         topics = add_topics(new_article, session)
         log(f" Topics ({topics})")
@@ -254,24 +348,32 @@ def download_feed_item(session, feed, feed_item, url):
         add_searches(title, url, new_article, session)
         debug(" Added keywords")
 
-        # compute extra difficulties for french articles
+        session.commit()
+        log(f"SUCCESS for: {new_article.title}")
+
+        # the extra difficulties (e.g. for french articles) come from an
+        # external service; they are saved later, see save_finished
         try:
-            if new_article.language.code == "fr":
-                from zeeguu.core.language.services.lingo_rank_service import (
-                    retrieve_lingo_rank,
-                )
-
-                df = DifficultyLingoRank(
-                    new_article, retrieve_lingo_rank(new_article.content)
-                )
-                session.add(df)
+            lingo_rank_enrichment.enqueue(new_article)
         except Exception as e:
             capture_to_sentry(e)
 
-        session.commit()
-        log(f"SUCCESS for: {new_article.title}")
+        # keep the recommender cache up to date instead of recomputing
+        # it from scratch after every crawl
+        try:
+            from zeeguu.core.content_recommender.mysql_recommender import (
+                add_to_matching_recommender_caches,
+            )
 
-    except SkippedForLowQuality as e:
+            added_to = add_to_matching_recommender_caches(new_article, session)
+            debug(f" Added to {added_to} cached recommendations")
+        except Exception as e:
+            capture_to_sentry(e)
+            session.rollback()
+
+        metrics.db_seconds += time.monotonic() - db_start
+
+    except (SkippedForLowQuality, SkippedAsNearDuplicate) as e:
         raise e
 
     except newspaper.ArticleException as e:
@@ -279,6 +381,7 @@ def download_feed_item(session, feed, feed_item, url):
 
     except DataError as e:
         zeeguu.core.log(f"Data error for: {url}")
+        session.rollback()
 
     except Exception as e:
         capture_to_sentry(e)
@@ -288,18 +391,23 @@ def download_feed_item(session, feed, feed_item, url):
         )
         session.rollback()
 
+    if new_article is not None and not inspect(new_article).persistent:
+        # its save was rolled back; it's not in the DB
+        return None
+
     return new_article
 
 
 def add_topics(new_article, session):
+    topic_ids = matcher_for(new_article.language).topic_ids_of(new_article)
+    if not topic_ids:
+        return []
+
     topics = []
-    for loc_topic in LocalizedTopic.query.all():
-        if loc_topic.language == new_article.language and loc_topic.matches_article(
-            new_article
-        ):
-            topics.append(loc_topic.topic.title)
-            new_article.add_topic(loc_topic.topic)
-            session.add(new_article)
+    for topic in Topic.query.filter(Topic.id.in_(topic_ids)).order_by(Topic.id):
+        topics.append(topic.title)
+        new_article.add_topic(topic)
+    session.add(new_article)
     return topics
 
 
@@ -307,7 +415,8 @@ def add_searches(title, url, new_article, session):
     """
     This method takes the relevant keywords from the title
     and URL, and tries to properly clean them.
-    It finally adds the ArticleWord to the session, to be committed as a whole.
+    It finally associates the ArticleWords with the article, in the
+    session, to be committed as a whole.
     :param title: The title of the article
     :param url: The url of the article
     :param new_article: The actual new article
@@ -323,6 +432,7 @@ def add_searches(title, url, new_article, session):
     all_words += re.split(r"; |, |\*|-|%20|/", parsed_url.path)
     all_words += parsed_url.netloc.split(".")[0]
 
+    words = []
     for word in all_words:
         # Strip the unwanted characters
         word = strip_article_title_word(word)
@@ -335,12 +445,10 @@ def add_searches(title, url, new_article, session):
         ):
             continue
         else:
-            # Find or create the ArticleWord and add it to the session
-            article_word_obj = ArticleWord.find_by_word(word)
-            if article_word_obj is None:
-                article_word_obj = ArticleWord(word)
-            article_word_obj.add_article(new_article)
-            session.add(article_word_obj)
+            words.append(word)
+
+    # Find or create the ArticleWords and associate them with the article
+    ArticleWord.add_words_of_article(session, words, new_article)
 
 
 def strip_article_title_word(word: str):
@@ -0,0 +1,137 @@
+"""
+
+    The CPU bound part of saving a feed item: parsing the html,
+    cleaning up the text, checking its quality, extracting the summary,
+    estimating the difficulty, and fingerprinting the text.
+
+    It does not touch the DB, and its result is a plain dataclass, so
+    the concurrent crawler can run it in a pool of processes and leave
+    only the saving to the single DB writer (see download_feed_item).
+
+"""
+
+import time
+from collections import namedtuple
+from dataclasses import dataclass
+from typing import Optional
+
+import newspaper
+import requests
+from bs4 import BeautifulSoup
+
+from zeeguu.core.content_retriever.content_cleaner import cleanup_non_content_bits
+from zeeguu.core.content_retriever.fetch import new_session
+from zeeguu.core.content_retriever.near_duplicates import simhash
+from zeeguu.core.content_retriever.quality_filter import sufficient_quality
+from zeeguu.core.content_retriever.unicode_normalization import (
+    flatten_composed_unicode_characters,
+)
+from zeeguu.core.language.difficulty_estimator_factory import (
+    DifficultyEstimatorFactory,
+)
+from zeeguu.core.model.article import MAX_CHAR_COUNT_IN_SUMMARY
+from zeeguu.core.model.feed import HEADERS
+
+# the difficulty estimator only needs the code of the language,
+# and the processes of the pool can't use Language, which is in the DB
+_LanguageCode = namedtuple("_LanguageCode", "code")
+
+# the articles are downloaded through the crawler's fetch layer rather
+# than by newspaper itself, such that their traffic can be replayed
+_http_session = new_session(HEADERS)
+DOWNLOAD_TIMEOUT = 10  # seconds
+
+
+@dataclass
+class ProcessedArticle:
+    url: str
+    authors: str
+    content: str
+    summary: str
+    fk_difficulty: int
+    # if set, the article should not be saved
+    low_quality_reason: Optional[str] = None
+    # see near_duplicates
+    simhash: Optional[int] = None
+    # seconds; see CrawlMetrics
+    download_seconds: float = 0.0
+    parse_seconds: float = 0.0
+    difficulty_seconds: float = 0.0
+
+
+def process_article(url, feed_summary, language_code, html=None):
+    """
+    :param feed_summary: the summary of the item in the feed, possibly html
+    :param html: the html at :param url, if it was already downloaded;
+    otherwise it is downloaded here
+    """
+    start = time.monotonic()
+    if not html:
+        html = download_html(url)
+    art = newspaper.Article(url)
+    art.download(input_html=html)
+    download_seconds = time.monotonic() - start
+
+    start = time.monotonic()
+    art.parse()
+
+    cleaned_up_text = cleanup_non_content_bits(art.text)
+
+    cleaned_up_text = flatten_composed_unicode_characters(cleaned_up_text)
+
+    is_quality_article, reason = sufficient_quality(art)
+
+    if not is_quality_article:
+        return ProcessedArticle(
+            url,
+            "",
+            "",
+            "",
+            0,
+            low_quality_reason=reason,
+            download_seconds=download_seconds,
+            parse_seconds=time.monotonic() - start,
+        )
+
+    # however, this is not so easy... there have been cases where
+    # the summary is just malformed HTML... thus we try to extract
+    # the text:
+    summary = BeautifulSoup(feed_summary, "lxml").get_text()
+    # then there are cases where the summary is huge... so we clip it
+    summary = summary[:MAX_CHAR_COUNT_IN_SUMMARY]
+    # and if there is still no summary, we simply use the beginning of
+    # the article
+    if len(summary) < 10:
+        summary = cleaned_up_text[:MAX_CHAR_COUNT_IN_SUMMARY]
+
+    fingerprint = simhash(cleaned_up_text)
+    parse_seconds = time.monotonic() - start
+
+    start = time.monotonic()
+    fk_estimator = DifficultyEstimatorFactory.get_difficulty_estimator("fk")
+    fk_difficulty = fk_estimator.estimate_difficulty(
+        cleaned_up_text, _LanguageCode(language_code), None
+    )["grade"]
+    difficulty_seconds = time.monotonic() - start
+
+    return ProcessedArticle(
+        url,
+        ", ".join(art.authors),
+        cleaned_up_text,
+        summary,
+        fk_difficulty,
+        simhash=fingerprint,
+        download_seconds=download_seconds,
+        parse_seconds=parse_seconds,
+        difficulty_seconds=difficulty_seconds,
+    )
+
+
+def download_html(url):
+    try:
+        response = _http_session.get(url, timeout=DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        raise newspaper.ArticleException(str(e))
+    # decodes the response the same way newspaper does
+    return newspaper.network.get_html_2XX_only(url, response=response)
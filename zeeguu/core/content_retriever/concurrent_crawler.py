@@ -0,0 +1,473 @@
+"""
+
+    Crawls the feeds concurrently: the requests (for the feeds, for
+    resolving the redirects of their items, and for downloading the
+    articles) are done by a pool of threads, at most max_workers at a
+    time, and at most one every min_interval seconds for each domain.
+    The spacing is enforced by the calling thread, which hands a request
+    to the pool only when its domain is free (see DomainRateLimiter), so
+    the workers never sleep, and the requests to a busy domain never
+    keep the requests to the other domains waiting.
+
+    The downloaded html is parsed, cleaned up, and has its difficulty
+    estimated by a pool of processes (see article_processing), such
+    that the CPU bound work uses all the cores.
+
+    Everything that touches the DB is done by the calling thread,
+    which is the single writer: it decides what to download, and
+    saves the processed articles through download_feed_item.
+
+    The items that are already in the DB, and the items whose redirects
+    were resolved in a previous crawl (see UrlRedirect), skip the
+    redirect stage.
+
+    The metrics of every feed are collected while it is crawled, and
+    saved as a FeedCrawl at the end (see CrawlMetrics).
+
+"""
+
+import heapq
+import os
+import time
+from collections import deque
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+    FIRST_COMPLETED,
+)
+from urllib.parse import urlparse
+
+import newspaper
+from sentry_sdk import capture_exception as capture_to_sentry
+
+from zeeguu.core import log
+from zeeguu.core.content_retriever.article_downloader import (
+    SkippedAlreadyInDB,
+    SkippedAsNearDuplicate,
+    SkippedForLowQuality,
+    SkippedForTooOld,
+    _date_in_the_future,
+    _url_after_redirects,
+    banned_url,
+    download_feed_item,
+    known_article,
+)
+from zeeguu.core.content_retriever.article_processing import (
+    download_html,
+    process_article,
+)
+from zeeguu.core.content_retriever import lingo_rank_enrichment
+from zeeguu.core.content_retriever.crawl_metrics import CrawlMetrics
+from zeeguu.core.elastic.bulk_indexer import BulkIndexer
+from zeeguu.core.model import Article, RSSFeed, UrlRedirect
+from zeeguu.core.model.feed import feed_http_stats
+
+MAX_WORKERS = 16
+MIN_SECONDS_BETWEEN_REQUESTS_TO_A_DOMAIN = 1.0
+
+# the stages of crawling a feed item
+_FEED = "feed"
+_REDIRECT = "redirect"
+_DOWNLOAD = "download"
+_PROCESS = "process"
+
+
+class DomainRateLimiter:
+    """
+    Holds the requests until their domain is free: the requests to the
+    same domain are taken in the order in which they were added, at
+    least min_interval apart. Not thread safe; used by the crawl loop.
+    """
+
+    def __init__(self, min_interval, clock=time.monotonic):
+        self.min_interval = min_interval
+        self.clock = clock
+        self._next_free_slot = {}
+        # domain -> the requests waiting for it
+        self._waiting = {}
+        # (when the domain is free, domain) for every domain in _waiting
+        self._domains = []
+
+    def add(self, url, request):
+        domain = urlparse(url).netloc
+        if domain not in self._waiting:
+            self._waiting[domain] = deque()
+            heapq.heappush(
+                self._domains, (self._next_free_slot.get(domain, 0), domain)
+            )
+        self._waiting[domain].append(request)
+
+    def take(self):
+        """
+        :return: a request whose domain is free now, or None
+        """
+        if not self._domains or self._domains[0][0] > self.clock():
+            return None
+
+        _, domain = heapq.heappop(self._domains)
+        requests = self._waiting[domain]
+        request = requests.popleft()
+
+        self._next_free_slot[domain] = self.clock() + self.min_interval
+        if requests:
+            heapq.heappush(self._domains, (self._next_free_slot[domain], domain))
+        else:
+            del self._waiting[domain]
+        return request
+
+    def seconds_until_next(self):
+        """
+        :return: how long until a request can be taken, or None if none waits
+        """
+        if not self._domains:
+            return None
+        return max(0.0, self._domains[0][0] - self.clock())
+
+
+class _InlineExecutor:
+    """
+    Runs the submitted functions right away, in the calling thread
+    """
+
+    def submit(self, function, *args):
+        future = Future()
+        try:
+            future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        pass
+
+
+def _started_process_pool(processes):
+    """
+    The pool forks all its processes at the first submit. That's done
+    here, before the threads of the crawl are started, since a process
+    that is forked while another thread holds a lock (e.g. the one of
+    the logging) can deadlock. The processes never use the DB
+    connections they inherit.
+    """
+    pool = ProcessPoolExecutor(processes)
+    pool.submit(_nothing).result()
+    return pool
+
+
+def _nothing():
+    pass
+
+
+class CrawlStats:
+    def __init__(self):
+        self.start = time.time()
+        self.feeds = 0
+        self.items = 0
+        self.downloaded = 0
+        self.low_quality = 0
+        self.already_in_db = 0
+        self.near_duplicates = 0
+        self.failed = 0
+        # feed id -> CrawlMetrics
+        self.feed_metrics = {}
+
+    def report(self):
+        duration = time.time() - self.start
+        log(
+            f"*** Crawled {self.feeds} feeds in {duration:.1f}s: "
+            f"{self.items} items ({self.items / max(duration, 0.001):.2f} items/s), "
+            f"{self.downloaded} downloaded, {self.low_quality} low quality, "
+            f"{self.already_in_db} already in DB, "
+            f"{self.near_duplicates} near duplicates, {self.failed} failed"
+        )
+
+
+def crawl_feeds(
+    feeds,
+    session,
+    max_workers=MAX_WORKERS,
+    min_interval=MIN_SECONDS_BETWEEN_REQUESTS_TO_A_DOMAIN,
+    limit=1000,
+    save_in_elastic=True,
+    indexer=None,
+    processes=None,
+):
+    """
+
+        The concurrent version of calling download_from_feed for
+        each of the :param feeds
+
+    :param processes: the size of the pool that processes the downloaded
+    articles; by default, the number of CPUs; if 0, they are processed
+    by the calling thread
+
+    :return: CrawlStats
+
+    """
+    if save_in_elastic and indexer is None:
+        with BulkIndexer(session) as indexer:
+            return crawl_feeds(
+                feeds,
+                session,
+                max_workers=max_workers,
+                min_interval=min_interval,
+                limit=limit,
+                indexer=indexer,
+                processes=processes,
+            )
+
+    if processes is None:
+        processes = os.cpu_count()
+
+    limiter = DomainRateLimiter(min_interval)
+    stats = CrawlStats()
+    feeds_by_id = {feed.id: feed for feed in feeds}
+    scheduled_downloads = {feed.id: 0 for feed in feeds}
+    # the feeds that had more new items than the limit
+    limited_feeds = set()
+    metrics = stats.feed_metrics
+    for feed in feeds:
+        metrics[feed.id] = CrawlMetrics(feed)
+
+    process_pool = _started_process_pool(processes) if processes else _InlineExecutor()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool, process_pool:
+        pending = {}
+        requests_in_flight = 0
+
+        def submit(stage, feed, feed_item, url, function, *args):
+            limiter.add(url, (stage, feed, feed_item, url, function, args))
+
+        def dispatch():
+            # only as many requests as there are free workers are handed
+            # to the pool; the others wait for their domain in the limiter
+            nonlocal requests_in_flight
+            while requests_in_flight < max_workers:
+                request = limiter.take()
+                if request is None:
+                    return
+                stage, feed, feed_item, url, function, args = request
+                if stage == _FEED:
+                    metrics[feed.id].start()
+                future = pool.submit(function, *args)
+                pending[future] = (stage, feed.id, feed_item, url)
+                requests_in_flight += 1
+
+        def submit_processing(feed, feed_item, url, html):
+            future = process_pool.submit(
+                process_article, url, feed_item["summary"], feed.language.code, html
+            )
+            pending[future] = (_PROCESS, feed.id, feed_item, url)
+
+        def schedule_download(feed, feed_item, url):
+            if banned_url(url):
+                log("Banned Url")
+                metrics[feed.id].skipped("banned")
+                return
+            if Article.find(url):
+                stats.already_in_db += 1
+                metrics[feed.id].skipped("already_in_db")
+                return
+            if scheduled_downloads[feed.id] >= limit:
+                limited_feeds.add(feed.id)
+                return
+            scheduled_downloads[feed.id] += 1
+            submit(_DOWNLOAD, feed, feed_item, url, _download, url)
+
+        validators = {}
+        for feed in feeds:
+            feed_url = feed.url.as_string()
+            validators[feed.id] = feed.http_validators()
+            submit(
+                _FEED,
+                feed,
+                None,
+                feed_url,
+                _fetch_feed_items,
+                feed_url,
+                feed.last_crawled_time,
+                validators[feed.id],
+                metrics[feed.id],
+            )
+
+        while True:
+            dispatch()
+
+            next_request = limiter.seconds_until_next()
+            if requests_in_flight == max_workers:
+                next_request = None
+            if not pending:
+                if next_request is None:
+                    break
+                time.sleep(next_request)
+                continue
+
+            done, _ = wait(pending, timeout=next_request, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, feed_id, feed_item, url = pending.pop(future)
+                if stage != _PROCESS:
+                    requests_in_flight -= 1
+                feed = feeds_by_id[feed_id]
+                feed_metrics = metrics[feed_id]
+                feed_metrics.done()
+
+                try:
+                    result = future.result()
+                except newspaper.ArticleException:
+                    log(f"can't download article at: {url}")
+                    stats.failed += 1
+                    feed_metrics.failed += 1
+                    continue
+                except Exception as e:
+                    capture_to_sentry(e)
+                    log(f"- {stage} failed for {url}: {e}")
+                    stats.failed += 1
+                    if stage == _FEED:
+                        feed_metrics.error = repr(e)
+                    else:
+                        feed_metrics.failed += 1
+                    continue
+
+                if stage == _FEED:
+                    stats.feeds += 1
+                    for each in _items_to_crawl(feed, result, session):
+                        stats.items += 1
+                        feed_metrics.items += 1
+                        if known_article(each["url"]):
+                            stats.already_in_db += 1
+                            feed_metrics.skipped("already_in_db")
+                            continue
+                        final_url = UrlRedirect.final_url(each["url"])
+                        if final_url is not None:
+                            schedule_download(feed, each, final_url)
+                        else:
+                            submit(
+                                _REDIRECT, feed, each, each["url"], _resolve, each["url"]
+                            )
+
+                elif stage == _REDIRECT:
+                    UrlRedirect.remember(session, url, result)
+                    schedule_download(feed, feed_item, result)
+
+                elif stage == _DOWNLOAD:
+                    html, seconds = result
+                    feed_metrics.download_seconds += seconds
+                    submit_processing(feed, feed_item, url, html)
+
+                elif stage == _PROCESS:
+                    _save(
+                        session,
+                        feed,
+                        feed_item,
+                        url,
+                        result,
+                        stats,
+                        indexer,
+                        feed_metrics,
+                    )
+                    feed_metrics.done()
+
+            lingo_rank_enrichment.save_finished(session, indexer)
+            if indexer:
+                indexer.flush_if_due()
+
+    # like download_from_feed, the validators are saved only once the
+    # items are crawled; they changed only for the feeds that were fetched
+    for feed in feeds:
+        if feed.id not in limited_feeds:
+            feed.update_http_validators(validators[feed.id])
+            session.add(feed)
+
+    for each in metrics.values():
+        each.save(session)
+
+    stats.report()
+    feed_http_stats.report()
+    return stats
+
+
+def _fetch_feed_items(feed_url, last_crawled_time, validators, metrics):
+    return RSSFeed.feed_items_at(feed_url, last_crawled_time, validators, metrics)
+
+
+def _resolve(url):
+    return _url_after_redirects(url)
+
+
+def _download(url):
+    """
+    :return: (html, seconds it took to download it)
+    """
+    start = time.monotonic()
+    html = download_html(url)
+    return html, time.monotonic() - start
+
+
+def _items_to_crawl(feed, feed_items, session):
+    """
+    Also updates the last crawled time of the feed, like download_from_feed
+    """
+    items = []
+    for feed_item in feed_items:
+        published = feed_item["published_datetime"]
+
+        if _date_in_the_future(published):
+            log("Article from the future!")
+            continue
+
+        if not feed.last_crawled_time or published > feed.last_crawled_time:
+            feed.last_crawled_time = published
+
+        items.append(feed_item)
+
+    session.add(feed)
+    session.commit()
+    return items
+
+
+def _save(session, feed, feed_item, url, processed, stats, indexer, metrics):
+    try:
+        new_article = download_feed_item(
+            session, feed, feed_item, url, processed=processed, metrics=metrics
+        )
+    except SkippedForTooOld:
+        log("- Article too old")
+        metrics.skipped("too_old")
+        return
+    except SkippedForLowQuality as e:
+        log(f" - Low quality: {e.reason}")
+        stats.low_quality += 1
+        metrics.skipped("low_quality")
+        return
+    except SkippedAlreadyInDB:
+        log(" - Already in DB")
+        stats.already_in_db += 1
+        metrics.skipped("already_in_db")
+        return
+    except SkippedAsNearDuplicate as e:
+        log(f" - Near duplicate of article {e.canonical_article_id}")
+        stats.near_duplicates += 1
+        metrics.skipped("near_duplicate")
+        return
+    except Exception as e:
+        capture_to_sentry(e)
+        log(e)
+        stats.failed += 1
+        metrics.failed += 1
+        return
+
+    if not new_article:
+        stats.failed += 1
+        metrics.failed += 1
+        return
+
+    stats.downloaded += 1
+    metrics.downloaded += 1
+    if indexer:
+        with metrics.timed("es_seconds"):
+            indexer.add(new_article)
@@ -0,0 +1,119 @@
+"""
+
+    Collects the metrics of crawling a feed (see FeedCrawl) while the
+    crawl goes on, and saves them as a FeedCrawl when it is done.
+
+    The request for the feed may be done in another thread (see
+    concurrent_crawler); everything else is recorded by the thread
+    that saves the articles.
+
+"""
+
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from zeeguu.core import log
+
+SKIP_REASONS = ["already_in_db", "low_quality", "too_old", "near_duplicate", "banned"]
+
+_COUNTERS = ["items", "downloaded", "failed"] + [
+    "skipped_" + each for each in SKIP_REASONS
+]
+_TIMES = [
+    "download_seconds",
+    "parse_seconds",
+    "difficulty_seconds",
+    "db_seconds",
+    "es_seconds",
+]
+
+
+class CrawlMetrics:
+    def __init__(self, feed):
+        self.feed = feed
+        self.start()
+        self._end = None
+        self.duration = 0.0
+
+        self.fetch_seconds = 0.0
+        self.bytes = 0
+        self.not_modified = False
+        self.error = None
+
+        for each in _COUNTERS:
+            setattr(self, each, 0)
+        for each in _TIMES:
+            setattr(self, each, 0.0)
+
+    def start(self):
+        """
+        Starts the clock of the crawl; the concurrent crawler calls it
+        when the request for the feed is made, such that the time the
+        feed waited for its turn is not counted
+        """
+        self.started = datetime.now()
+        self._start = time.monotonic()
+
+    def fetched(self, seconds, size, not_modified=False):
+        self.fetch_seconds = seconds
+        self.bytes = size
+        self.not_modified = not_modified
+
+    def skipped(self, reason):
+        assert reason in SKIP_REASONS, reason
+        name = "skipped_" + reason
+        setattr(self, name, getattr(self, name) + 1)
+
+    @contextmanager
+    def timed(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            setattr(self, name, getattr(self, name) + time.monotonic() - start)
+
+    def processed(self, processed_article):
+        """
+        Adds the times measured while processing an article
+        (possibly in another process; see article_processing)
+        """
+        self.download_seconds += processed_article.download_seconds
+        self.parse_seconds += processed_article.parse_seconds
+        self.difficulty_seconds += processed_article.difficulty_seconds
+
+    def done(self):
+        """
+        Called by the concurrent crawler after every step of the crawl
+        of the feed, since its metrics are saved only when all the feeds
+        are crawled; the last call ends the crawl
+        """
+        self._end = time.monotonic()
+
+    def log_summary(self):
+        log(f"*** Downloaded: {self.downloaded} From: {self.feed.title}")
+        log(f"*** Low Quality: {self.skipped_low_quality}")
+        log(f"*** Already in DB: {self.skipped_already_in_db}")
+        log(f"*** Near duplicates: {self.skipped_near_duplicate}")
+        log(f"*** ")
+
+    def save(self, session):
+        """
+        Without a call to done, the crawl ends now, e.g. for the
+        sequential crawler, also when it stops before the articles
+        """
+        from zeeguu.core.model import FeedCrawl
+
+        self.duration = (self._end or time.monotonic()) - self._start
+
+        metrics = {
+            name: getattr(self, name)
+            for name in ["duration", "fetch_seconds", "bytes", "not_modified"]
+            + _COUNTERS
+            + _TIMES
+        }
+        if self.error:
+            metrics["error"] = self.error[:512]
+
+        session.add(FeedCrawl(self.feed, self.started, **metrics))
+        session.commit()
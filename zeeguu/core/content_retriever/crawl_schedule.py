@@ -0,0 +1,87 @@
+"""
+
+    Decides when every feed should be crawled again, such that the
+    feeds that publish every hour are crawled often, and the ones that
+    publish once a month do not cost a crawl every run.
+
+    The publication rate of a feed is learned from the articles it
+    published in the last WINDOW_DAYS; a feed whose last item (see
+    RSSFeed.last_crawled_time) is older than that is crawled about as
+    rarely as it publishes, up to MAX_INTERVAL.
+
+    The interval is clamped to [MIN_INTERVAL, MAX_INTERVAL], and it is
+    doubled for every crawl in a row that failed, up to MAX_BACKOFF.
+
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+WINDOW_DAYS = 14
+# how many times we look at a feed, on average, between two of its articles
+CRAWLS_PER_ARTICLE = 2
+
+MIN_INTERVAL = timedelta(minutes=30)
+MAX_INTERVAL = timedelta(days=1)
+MAX_BACKOFF = timedelta(days=7)
+
+
+def crawl_interval(recent_articles, last_crawled_time, now):
+    """
+    :param recent_articles: the number of articles of the feed
+    published in the last WINDOW_DAYS
+    :param last_crawled_time: the time of the newest item of the feed
+    """
+    if recent_articles:
+        between_articles = timedelta(days=WINDOW_DAYS) / recent_articles
+    elif last_crawled_time:
+        between_articles = now - last_crawled_time
+    else:
+        return MAX_INTERVAL
+
+    interval = between_articles / CRAWLS_PER_ARTICLE
+    return max(MIN_INTERVAL, min(MAX_INTERVAL, interval))
+
+
+def backoff(interval, failures):
+    if not failures:
+        return interval
+    return min(MAX_BACKOFF, interval * 2 ** min(failures, 16))
+
+
+def recent_article_counts(session, feeds, now):
+    """
+    :return: feed id -> number of articles published in the last WINDOW_DAYS
+    """
+    from zeeguu.core.model import Article
+
+    since = now - timedelta(days=WINDOW_DAYS)
+    return dict(
+        session.query(Article.rss_feed_id, func.count(Article.id))
+        .filter(Article.rss_feed_id.in_([each.id for each in feeds]))
+        .filter(Article.published_time >= since)
+        .group_by(Article.rss_feed_id)
+        .all()
+    )
+
+
+def reschedule(session, crawled, now=None):
+    """
+    Sets the next crawl time of every crawled feed
+
+    :param crawled: feed -> whether its crawl failed
+    """
+    if not crawled:
+        return
+
+    now = now or datetime.now()
+    counts = recent_article_counts(session, crawled, now)
+
+    for feed, failed in crawled.items():
+        feed.crawl_failures = (feed.crawl_failures or 0) + 1 if failed else 0
+        interval = crawl_interval(counts.get(feed.id, 0), feed.last_crawled_time, now)
+        feed.next_crawl_time = now + backoff(interval, feed.crawl_failures)
+        session.add(feed)
+
+    session.commit()
@@ -0,0 +1,184 @@
+"""
+
+    All the HTTP requests of the crawler (for the feeds, for resolving
+    the redirects of their items, and for downloading the articles) are
+    made by the sessions of new_session, such that the traffic of a
+    crawl can be recorded, and then replayed offline, e.g. to profile
+    the crawler on the same input (see tools/crawler_benchmark.py):
+
+    - live(): the default; the requests go to the web
+    - record_to(path): they go to the web, and every response is also
+      appended to the file at path
+    - replay_from(path): they are answered from the file at path; the
+      requests that were not recorded fail with a ConnectionError
+
+    The file is WARC-like: a sequence of records, each of them a block
+    of WARC headers followed by the HTTP response (status line, headers,
+    and decoded body) of a request. When the same request was recorded
+    several times, the last response is replayed.
+
+"""
+
+import io
+import threading
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+# sized for the concurrent crawler
+POOL_SIZE = 32
+
+# they describe how the body was sent, and don't apply to the decoded body
+_TRANSFER_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+_sessions = []
+_adapter = None
+
+
+def new_session(headers):
+    session = requests.Session()
+    session.headers.update(headers)
+    _mount(session)
+    _sessions.append(session)
+    return session
+
+
+def live():
+    _use(None)
+
+
+def record_to(path):
+    _use(RecordingAdapter(WarcFile(path)))
+
+
+def replay_from(path):
+    _use(ReplayAdapter(WarcFile(path)))
+
+
+def _use(adapter):
+    global _adapter
+    _adapter = adapter
+    for session in _sessions:
+        _mount(session)
+
+
+def _mount(session):
+    # in live mode every session keeps its own connections
+    adapter = _adapter or HTTPAdapter(pool_maxsize=POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+
+class WarcFile:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, method, url, response, body):
+        http_headers = [f"HTTP/1.1 {response.status_code} {response.reason or ''}"]
+        http_headers += [
+            f"{name}: {value}"
+            for name, value in response.headers.items()
+            if name.lower() not in _TRANSFER_HEADERS
+        ]
+        http_headers.append(f"Content-Length: {len(body)}")
+        block = _head(http_headers) + body
+
+        warc_headers = [
+            "WARC/1.0",
+            "WARC-Type: response",
+            f"WARC-Target-URI: {url}",
+            f"WARC-Method: {method}",
+            f"WARC-Date: {datetime.utcnow().isoformat()}Z",
+            f"Content-Length: {len(block)}",
+        ]
+
+        with self._lock, open(self.path, "ab") as f:
+            f.write(_head(warc_headers) + block + b"\r\n\r\n")
+
+    def records(self):
+        """
+        :return: generator of (method, url, status, reason, headers, body)
+        """
+        with open(self.path, "rb") as f:
+            while True:
+                warc_headers = _read_headers(f)
+                if not warc_headers:
+                    return
+                block = f.read(int(warc_headers["Content-Length"]))
+                f.read(4)
+
+                head, body = block.split(b"\r\n\r\n", 1)
+                status_line, *lines = head.decode("utf-8").split("\r\n")
+                _, status, reason = status_line.split(" ", 2)
+                headers = dict(line.split(": ", 1) for line in lines)
+
+                yield (
+                    warc_headers["WARC-Method"],
+                    warc_headers["WARC-Target-URI"],
+                    int(status),
+                    reason,
+                    headers,
+                    body,
+                )
+
+
+def _head(lines):
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8")
+
+
+def _read_headers(f):
+    headers = {}
+    for line in iter(f.readline, b""):
+        line = line.decode("utf-8").rstrip("\r\n")
+        if not line:
+            return headers
+        if ": " in line:
+            name, value = line.split(": ", 1)
+            headers[name] = value
+    return headers
+
+
+class RecordingAdapter(HTTPAdapter):
+    def __init__(self, warc_file):
+        super().__init__(pool_maxsize=POOL_SIZE)
+        self.warc_file = warc_file
+
+    def send(self, request, stream=False, **kwargs):
+        response = super().send(request, stream=stream, **kwargs)
+        # the body of a streamed response is not read; only its
+        # headers are needed (see _url_after_redirects)
+        body = b"" if stream else response.content
+        self.warc_file.append(request.method, request.url, response, body)
+        return response
+
+
+class ReplayAdapter(HTTPAdapter):
+    def __init__(self, warc_file):
+        super().__init__()
+        self.responses = {
+            (method, url): (status, reason, headers, body)
+            for method, url, status, reason, headers, body in warc_file.records()
+        }
+
+    def send(self, request, **kwargs):
+        try:
+            status, reason, headers, body = self.responses[
+                (request.method, request.url)
+            ]
+        except KeyError:
+            raise requests.ConnectionError(
+                f"Not recorded: {request.method} {request.url}", request=request
+            )
+
+        raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers=headers,
+            status=status,
+            reason=reason,
+            preload_content=False,
+            decode_content=False,
+        )
+        return self.build_response(request, raw)
@@ -0,0 +1,179 @@
+"""
+
+    Adds the LingoRank difficulty (see DifficultyLingoRank) of the
+    articles in LANGUAGES without making the crawler wait for the
+    external service.
+
+    The articles are enqueued once they are saved. A pool of WORKERS
+    threads requests their ranks, retrying every failed request at most
+    RETRIES times. The crawler, which is the single DB writer, saves the
+    ranks that arrived whenever it calls save_finished, and waits at
+    most WAIT_AT_THE_END seconds for the rest at the end of the crawl.
+
+    The ranks are cached by the digest of the content: an article whose
+    content was already ranked (e.g. the same article under another url)
+    costs no request, and several articles with the same content that
+    are waiting share one request.
+
+    The articles whose rank could not be retrieved are ranked later
+    by tools/fill_lingo_ranks.py.
+
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as wait_for_futures
+
+import requests
+from sentry_sdk import capture_exception as capture_to_sentry
+
+from zeeguu.core import log
+from zeeguu.core.language.services import lingo_rank_service
+from zeeguu.core.util import text_hash
+
+LANGUAGES = ["fr"]
+WORKERS = 4
+RETRIES = 3
+RETRY_BACKOFF = 2  # seconds; doubled after every retry
+# how long the crawler waits at the end for the ranks that did not
+# arrive yet; the ones that take longer are left to fill_lingo_ranks
+WAIT_AT_THE_END = 120  # seconds
+
+
+def _retrieve_with_retries(content):
+    for attempt in range(RETRIES + 1):
+        try:
+            return lingo_rank_service.retrieve_lingo_rank(content)
+        except (requests.exceptions.RequestException, ValueError):
+            if attempt == RETRIES:
+                raise
+            time.sleep(RETRY_BACKOFF * 2**attempt)
+
+
+class LingoRankQueue:
+    def __init__(self, workers=WORKERS):
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="lingo_rank")
+        self._lock = threading.Lock()
+        # content digest -> ids of the articles that wait for its rank
+        self._waiting = {}
+        self._futures = set()
+        # (content digest, rank or None if it failed, article ids)
+        self._finished = []
+
+    def enqueue(self, article):
+        from zeeguu.core.model import DifficultyLingoRank
+
+        digest = text_hash(article.content)
+        cached = DifficultyLingoRank.value_for_content(digest)
+
+        with self._lock:
+            if cached is not None:
+                self._finished.append((digest, cached, [article.id]))
+                return
+            if digest in self._waiting:
+                self._waiting[digest].append(article.id)
+                return
+            self._waiting[digest] = [article.id]
+
+            self._futures = {each for each in self._futures if not each.done()}
+            self._futures.add(self._pool.submit(self._rank, digest, article.content))
+
+    def _rank(self, digest, content):
+        # runs in a worker; the result is recorded before the future is
+        # done, such that wait always finds it
+        try:
+            rank = _retrieve_with_retries(content)
+        except Exception as e:
+            capture_to_sentry(e)
+            log(f"LingoRank failed for content {digest}: {e}")
+            rank = None
+
+        with self._lock:
+            self._finished.append((digest, rank, self._waiting.pop(digest)))
+
+    def pending(self):
+        with self._lock:
+            return sum(1 for each in self._futures if not each.done())
+
+    def save_finished(self, session, indexer=None):
+        """
+        Saves the ranks that arrived until now, without waiting for the
+        others; their articles are also added to :param indexer, if given
+
+        :return: the number of articles that got their rank
+        """
+        from zeeguu.core.model import Article, DifficultyLingoRank
+
+        with self._lock:
+            finished, self._finished = self._finished, []
+
+        ranked = []
+        for digest, rank, article_ids in finished:
+            if rank is None:
+                continue
+            for article in Article.query.filter(Article.id.in_(article_ids)):
+                session.add(DifficultyLingoRank(article, rank, digest))
+                ranked.append(article)
+
+        if not ranked:
+            return 0
+
+        try:
+            session.commit()
+        except Exception:
+            session.rollback()
+            # they are saved by the next call
+            with self._lock:
+                self._finished = finished + self._finished
+            raise
+
+        if indexer:
+            for article in ranked:
+                indexer.add(article)
+        return len(ranked)
+
+    def wait(self, session, indexer=None, timeout=None):
+        """
+        Waits at most :param timeout seconds for the pending ranks,
+        and saves them like save_finished
+        """
+        with self._lock:
+            futures = list(self._futures)
+        wait_for_futures(futures, timeout)
+        return self.save_finished(session, indexer)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = LingoRankQueue()
+        return _queue
+
+
+def enqueue(article):
+    if article.language.code in LANGUAGES:
+        queue().enqueue(article)
+
+
+def save_finished(session, indexer=None):
+    return queue().save_finished(session, indexer)
+
+
+def wait(session, indexer=None, timeout=None):
+    return queue().wait(session, indexer, timeout)
+
+
+def clear():
+    """
+    Forgets the ranks that were not saved yet
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is not None:
+            _queue._pool.shutdown(wait=False)
+        _queue = None
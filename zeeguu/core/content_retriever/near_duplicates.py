@@ -0,0 +1,155 @@
+"""
+
+    Recognizes the copies of the same story (e.g. a wire story that is
+    syndicated by several of our feeds, under different urls) before
+    they are saved as new articles.
+
+    Every article gets a 64 bit SimHash of the shingles (word trigrams)
+    of its text (see ArticleFingerprint). Copies of the same text have
+    hashes that differ in at most a few bits, while unrelated texts
+    differ in about half of them.
+
+    To find the near duplicates of a hash without comparing it with all
+    the others, the hashes of a language are indexed by each of their
+    BANDS 16 bit bands: if two hashes differ in at most MAX_DISTANCE
+    < BANDS bits, at least one of their bands is identical.
+
+    The index of a language starts with the articles published in the
+    last WINDOW_DAYS and is refreshed incrementally, by fingerprint id,
+    before every lookup. Every EVICTION_INTERVAL the refresh also forgets
+    the articles that fell out of the window, such that the index of a
+    long running crawler does not keep growing.
+
+"""
+
+import hashlib
+import re
+import threading
+from datetime import datetime, timedelta
+
+import zeeguu.core
+
+SHINGLE_SIZE = 3
+MAX_DISTANCE = 3  # bits
+BANDS = 4
+WINDOW_DAYS = 30
+EVICTION_INTERVAL = timedelta(hours=1)
+
+_BAND_BITS = 64 // BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+
+def simhash(text):
+    """
+    :return: the SimHash of :param text, as an unsigned 64 bit number
+    """
+    words = re.findall(r"\w+", text.lower())
+    shingles = [
+        " ".join(words[i : i + SHINGLE_SIZE])
+        for i in range(max(1, len(words) - SHINGLE_SIZE + 1))
+    ]
+
+    weights = [0] * 64
+    for shingle in shingles:
+        h = int.from_bytes(
+            hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big"
+        )
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def _bands(h):
+    return [(h >> (band * _BAND_BITS)) & _BAND_MASK for band in range(BANDS)]
+
+
+class _LanguageFingerprints:
+    def __init__(self, language_id):
+        self.language_id = language_id
+        # one dict per band: value of the band -> [(article id, hash, published)]
+        self.bands = [{} for _ in range(BANDS)]
+        self.last_fingerprint_id = None
+        self.last_eviction = None
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        from zeeguu.core.model import Article, ArticleFingerprint
+
+        query = (
+            zeeguu.core.db.session.query(
+                ArticleFingerprint.id,
+                ArticleFingerprint.article_id,
+                ArticleFingerprint.simhash,
+                Article.published_time,
+            )
+            .join(Article)
+            .filter(ArticleFingerprint.language_id == self.language_id)
+        )
+
+        now = datetime.now()
+        since = now - timedelta(days=WINDOW_DAYS)
+        if self.last_fingerprint_id is None:
+            query = query.filter(Article.published_time >= since)
+            self.last_fingerprint_id = 0
+            self.last_eviction = now
+        else:
+            query = query.filter(ArticleFingerprint.id > self.last_fingerprint_id)
+            if now - self.last_eviction >= EVICTION_INTERVAL:
+                self.forget_published_before(since)
+                self.last_eviction = now
+
+        for id, article_id, signed_simhash, published in query.order_by(
+            ArticleFingerprint.id
+        ):
+            self.add(article_id, signed_simhash % 2**64, published or now)
+            self.last_fingerprint_id = max(self.last_fingerprint_id, id)
+
+    def add(self, article_id, h, published):
+        for band, value in enumerate(_bands(h)):
+            self.bands[band].setdefault(value, []).append((article_id, h, published))
+
+    def forget_published_before(self, since):
+        for band in self.bands:
+            for value, entries in list(band.items()):
+                kept = [each for each in entries if each[2] >= since]
+                if not kept:
+                    del band[value]
+                elif len(kept) < len(entries):
+                    band[value] = kept
+
+    def near_duplicate(self, h):
+        closest = None
+        closest_distance = MAX_DISTANCE + 1
+        for band, value in enumerate(_bands(h)):
+            for article_id, other, _ in self.bands[band].get(value, []):
+                d = distance(h, other)
+                if d < closest_distance:
+                    closest, closest_distance = article_id, d
+        return closest
+
+
+_indices = {}
+_indices_lock = threading.Lock()
+
+
+def near_duplicate_of(language, h):
+    """
+    :return: the id of an article of :param language whose hash differs
+    from :param h in at most MAX_DISTANCE bits, or None
+    """
+    with _indices_lock:
+        index = _indices.setdefault(language.id, _LanguageFingerprints(language.id))
+
+    with index.lock:
+        index.refresh()
+        return index.near_duplicate(h)
+
+
+def clear():
+    with _indices_lock:
+        _indices.clear()
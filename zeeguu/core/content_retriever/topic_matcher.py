@@ -0,0 +1,84 @@
+"""
+
+    Finds the topics of an article: a LocalizedTopic matches an article
+    when one of its keywords is in the url or in the title of the article
+    (see LocalizedTopic.matches_article).
+
+    Instead of going through every keyword of every localized topic
+    for every article, the keywords of a language are compiled in a
+    single regex, which finds all of them in one pass over the text.
+
+    The matchers are cached per language. They are rebuilt when a
+    LocalizedTopic is changed in this process, and MATCHER_TTL seconds
+    after they were built, for the changes made by other processes
+    (e.g. tools/add_standard_topics.py).
+
+"""
+
+import re
+
+from sqlalchemy import event
+
+from zeeguu.core.model import LocalizedTopic
+from zeeguu.core.util.ttl_cache import TTLCache
+
+MATCHER_TTL = 10 * 60  # seconds
+
+_matchers = TTLCache(100, MATCHER_TTL)
+
+
+class TopicMatcher:
+    def __init__(self, localized_topics):
+        topic_ids_of_keyword = {}
+        for each in localized_topics:
+            for keyword in (each.keywords or "").strip().split(" "):
+                if keyword != "":
+                    topic_ids_of_keyword.setdefault(keyword, set()).add(each.topic_id)
+
+        # at every position the lookahead finds the longest keyword that
+        # starts there; the other keywords that start there are its prefixes
+        keywords = sorted(topic_ids_of_keyword, key=len, reverse=True)
+        self._topic_ids = {
+            keyword: set().union(
+                *[ids for k, ids in topic_ids_of_keyword.items() if keyword.startswith(k)]
+            )
+            for keyword in keywords
+        }
+
+        self._pattern = None
+        if keywords:
+            self._pattern = re.compile(
+                "(?=(" + "|".join(re.escape(each) for each in keywords) + "))"
+            )
+
+    def topic_ids_in(self, *texts):
+        topic_ids = set()
+        if not self._pattern:
+            return topic_ids
+
+        for text in texts:
+            for match in self._pattern.finditer(text or ""):
+                topic_ids |= self._topic_ids[match.group(1)]
+        return topic_ids
+
+    def topic_ids_of(self, article):
+        return self.topic_ids_in(article.url.as_string(), article.title)
+
+
+def matcher_for(language):
+    matcher = _matchers.get(language.id)
+    if matcher is None:
+        matcher = TopicMatcher(LocalizedTopic.all_for_language(language))
+        _matchers.put(language.id, matcher)
+    return matcher
+
+
+def clear():
+    _matchers.clear()
+
+
+@event.listens_for(LocalizedTopic, "after_insert")
+@event.listens_for(LocalizedTopic, "after_update")
+@event.listens_for(LocalizedTopic, "after_delete")
+def _localized_topics_changed(mapper, connection, target):
+    clear()
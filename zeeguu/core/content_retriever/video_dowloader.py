@@ -3,12 +3,10 @@ import os
 import zeeguu
 import zeeguu.core.model
 from zeeguu.core.constants import SIMPLE_TIME_FORMAT
-from elasticsearch import Elasticsearch
-from zeeguu.core.elastic.settings import ES_CONN_STRING, ES_ZINDEX
 from sentry_sdk import capture_exception as capture_to_sentry
 from zeeguu.core.elastic.indexing import document_from_article
 from zeeguu.core import log
-from zeeguu.core.elastic.indexing import index_in_elasticsearch
+from zeeguu.core.elastic.bulk_indexer import BulkIndexer
 from zeeguu.core.model import Url, Article, Language
 import datetime
 
@@ -54,16 +52,17 @@ def download(filename, fr, to):
     ai_videos = get_videos_from_local_csv(filename)
 
     keys = list(ai_videos.keys())
-    for each in keys[fr:to]:
-        video_info = ai_videos[each]
+    with BulkIndexer(session) as indexer:
+        for each in keys[fr:to]:
+            video_info = ai_videos[each]
 
-        # stupid file format
-        video_info[TITLE] = video_info[TITLE].replace("&#39;", "'")
+            # stupid file format
+            video_info[TITLE] = video_info[TITLE].replace("&#39;", "'")
 
-        e = download_individual_video(video_info)
+            e = download_individual_video(video_info, indexer)
 
 
-def download_individual_video(video_info):
+def download_individual_video(video_info, indexer):
     print("Processing: " + video_info[URL])
 
     from zeeguu.core.model import Article
@@ -109,7 +108,7 @@ def download_individual_video(video_info):
     session.add(new_article)
     session.commit()
 
-    index_in_elasticsearch(new_article, session)
+    indexer.add(new_article)
 
 
 import sys
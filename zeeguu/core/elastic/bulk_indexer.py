@@ -0,0 +1,187 @@
+"""
+
+    Indexes articles in ES in bulk, instead of with one request each.
+
+    The documents are buffered and sent with the bulk helper when
+    max_docs of them were buffered, when max_seconds passed since the
+    previous flush, and when the indexer is closed. The time is checked
+    when a document is added and when flush_if_due is called; the
+    crawlers call it at every step, such that the documents that are
+    waiting don't depend on the next new article. The documents that
+    ES rejects are retried, with a backoff, at most max_retries times;
+    the ones that still fail are reported and kept in failed_ids.
+
+    The buffer follows the DB: the document of an article whose
+    changes are not committed yet waits for the commit of the session,
+    and is dropped if the session is rolled back instead; an article
+    that is not in the session anymore (e.g. because its save was
+    rolled back) is not indexed at all. This way ES never gets an
+    article that is not in the DB.
+
+        with BulkIndexer(session) as indexer:
+            for article in new_articles:
+                indexer.add(article)
+
+"""
+
+import time
+
+from elasticsearch.helpers import bulk
+from sentry_sdk import capture_message
+from sqlalchemy import event, inspect
+
+from zeeguu.core import log
+from zeeguu.core.elastic.client import es_client
+from zeeguu.core.elastic.indexing import document_from_article
+from zeeguu.core.model import Article
+from zeeguu.core.elastic.settings import (
+    ES_ZINDEX,
+    ES_INDEXING_TIMEOUT,
+    ES_BULK_SIZE,
+    ES_BULK_INTERVAL,
+    ES_BULK_RETRIES,
+)
+
+# seconds before the first retry; doubled for every next one
+RETRY_BACKOFF = 1
+
+
+class BulkIndexer:
+    def __init__(
+        self,
+        session,
+        max_docs=ES_BULK_SIZE,
+        max_seconds=ES_BULK_INTERVAL,
+        max_retries=ES_BULK_RETRIES,
+        index=ES_ZINDEX,
+    ):
+        self.session = session
+        self.index = index
+        self.max_docs = max_docs
+        self.max_seconds = max_seconds
+        self.max_retries = max_retries
+
+        # article id -> document
+        self._uncommitted = {}
+        self._buffer = {}
+        # the ids of the articles flushed in the current transaction
+        self._flushed = set()
+        self._last_flush = time.monotonic()
+
+        self.indexed = 0
+        self.failed_ids = []
+
+        event.listen(session, "after_flush", self._after_flush)
+        event.listen(session, "after_commit", self._after_commit)
+        event.listen(session, "after_rollback", self._after_rollback)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def add(self, article):
+        if not inspect(article).persistent:
+            # e.g. its save was rolled back
+            log(f"ES: not indexing article {article.id}, which is not in the DB")
+            return
+
+        # building the document can flush the session
+        doc = document_from_article(article, self.session)
+
+        if article.id in self._flushed or article in self.session.dirty:
+            self._uncommitted[article.id] = doc
+            self.flush_if_due()
+        else:
+            self.add_document(article.id, doc)
+
+    def add_document(self, article_id, doc):
+        """
+        For the documents of articles that are already committed
+        """
+        self._buffer[article_id] = doc
+        self.flush_if_due()
+
+    def flush(self):
+        documents, self._buffer = self._buffer, {}
+        self._last_flush = time.monotonic()
+
+        failed = {}
+        retries = 0
+        while documents:
+            failed = self._send(documents)
+            self.indexed += len(documents) - len(failed)
+
+            if not failed or retries == self.max_retries:
+                break
+
+            time.sleep(RETRY_BACKOFF * 2**retries)
+            retries += 1
+            documents = {id: documents[id] for id in failed}
+            log(f"ES: retrying {len(documents)} documents ({retries}/{self.max_retries})")
+
+        for id, error in failed.items():
+            log(f"ES: could not index article {id}: {error}")
+        if failed:
+            capture_message(f"ES: could not index articles {sorted(failed)}")
+            self.failed_ids.extend(failed)
+
+    def close(self):
+        event.remove(self.session, "after_flush", self._after_flush)
+        event.remove(self.session, "after_commit", self._after_commit)
+        event.remove(self.session, "after_rollback", self._after_rollback)
+
+        self.flush()
+        log(f"*** Indexed {self.indexed} articles in ES; {len(self.failed_ids)} failed")
+
+    def _send(self, documents):
+        """
+        :return: a dict with the id and error of every document that failed
+        """
+        actions = [
+            {"_index": self.index, "_id": id, "_source": doc}
+            for id, doc in documents.items()
+        ]
+        _, errors = bulk(
+            es_client(),
+            actions,
+            raise_on_error=False,
+            raise_on_exception=False,
+            request_timeout=ES_INDEXING_TIMEOUT,
+        )
+
+        failed = {}
+        for each in errors:
+            info = each["index"]
+            # when the whole request failed, the action is nested in the info
+            id = info.get("_id") or info["index"]["_id"]
+            failed[int(id)] = info.get("error", info.get("status"))
+        return failed
+
+    def flush_if_due(self):
+        """
+        Flushes if max_docs are buffered or max_seconds passed
+        """
+        if not self._buffer:
+            return
+        if (
+            len(self._buffer) >= self.max_docs
+            or time.monotonic() - self._last_flush >= self.max_seconds
+        ):
+            self.flush()
+
+    def _after_flush(self, session, _):
+        for each in list(session.new) + list(session.dirty):
+            if isinstance(each, Article):
+                self._flushed.add(each.id)
+
+    def _after_commit(self, _):
+        # no flushing here: ES requests don't belong in a session event
+        self._buffer.update(self._uncommitted)
+        self._uncommitted = {}
+        self._flushed = set()
+
+    def _after_rollback(self, _):
+        self._uncommitted = {}
+        self._flushed = set()
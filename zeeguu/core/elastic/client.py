@@ -0,0 +1,124 @@
+"""
+
+    The Elasticsearch client that is shared by the whole process.
+
+    Creating an Elasticsearch object creates a new pool of HTTP
+    connections; doing this for every request means a new TCP
+    connection (and handshake) per query. Instead, everybody
+    should use es_client(), which creates the client once and
+    then keeps returning it.
+
+    A connection pool should not be shared between a parent
+    and a forked child (e.g. the processes of the wsgi server
+    or of a multiprocessing pool), so when the pid changes a
+    new client is created for the new process.
+
+    Hooks registered with add_latency_hook are called after
+    every request with the method, path, status and duration
+    in seconds. The status is None if ES could not be reached.
+
+"""
+
+import os
+import threading
+
+from elasticsearch import Elasticsearch, Urllib3HttpConnection
+
+import zeeguu.core
+from zeeguu.core.elastic.settings import (
+    ES_CONN_STRING,
+    ES_POOL_SIZE,
+    ES_TIMEOUT,
+    ES_MAX_RETRIES,
+    ES_RETRY_ON_TIMEOUT,
+)
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+_latency_hooks = []
+
+
+def es_client():
+    global _client, _client_pid
+
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = Elasticsearch(
+                ES_CONN_STRING,
+                connection_class=_TimedConnection,
+                maxsize=ES_POOL_SIZE,
+                timeout=ES_TIMEOUT,
+                max_retries=ES_MAX_RETRIES,
+                retry_on_timeout=ES_RETRY_ON_TIMEOUT,
+            )
+            _client_pid = os.getpid()
+
+    return _client
+
+
+def add_latency_hook(hook):
+    _latency_hooks.append(hook)
+
+
+def remove_latency_hook(hook):
+    if hook in _latency_hooks:
+        _latency_hooks.remove(hook)
+
+
+def _report_latency(method, path, status, duration):
+    for hook in _latency_hooks:
+        try:
+            hook(method, path, status, duration)
+        except Exception as e:
+            # a broken hook must never break a query
+            zeeguu.core.warning(f"ES latency hook failed: {e}")
+
+
+def _log_latency(method, path, status, duration):
+    zeeguu.core.debug(f"ES {method} {path} ({status}) took {duration * 1000:.2f}ms")
+
+
+add_latency_hook(_log_latency)
+
+
+class _TimedConnection(Urllib3HttpConnection):
+    """
+    The transport already measures every request in order to log it;
+    we just pass the measurement on to the hooks.
+    """
+
+    def log_request_success(
+        self, method, full_url, path, body, status_code, response, duration
+    ):
+        super().log_request_success(
+            method, full_url, path, body, status_code, response, duration
+        )
+        _report_latency(method, path, status_code, duration)
+
+    def log_request_fail(
+        self,
+        method,
+        full_url,
+        path,
+        body,
+        duration,
+        status_code=None,
+        response=None,
+        exception=None,
+    ):
+        super().log_request_fail(
+            method,
+            full_url,
+            path,
+            body,
+            duration,
+            status_code=status_code,
+            response=response,
+            exception=exception,
+        )
+        _report_latency(method, path, status_code, duration)
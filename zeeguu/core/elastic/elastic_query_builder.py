@@ -1,5 +1,15 @@
+import copy
+import threading
+from collections import OrderedDict
+
 from elasticsearch_dsl import Search, Q, SF
 
+# the queries depend only on the reading preferences of a user; many users
+# share them, and a user asks again and again for the same recommendations
+MAX_CACHED_QUERIES = 1024
+_cached_queries = OrderedDict()
+_cached_queries_lock = threading.Lock()
+
 
 def match(key, value):
     return {"match": {key: value}}
@@ -172,3 +182,132 @@ def build_elastic_search_query(
     query = {"size": count, "query": weighted_query.to_dict()}
 
     return query
+
+
+def build_elastic_recommender_queries(
+    count,
+    topics,
+    unwanted_topics,
+    user_topics,
+    unwanted_user_topics,
+    language,
+    upper_bounds,
+    lower_bounds,
+    es_scale="3d",
+    es_decay=0.8,
+    es_weight=4.2,
+):
+    """
+
+    Returns both the recommender query and its second_try fallback.
+    They are cached by the preferences they were built from.
+
+    """
+
+    def build(second_try):
+        return build_elastic_recommender_query(
+            count,
+            topics,
+            unwanted_topics,
+            user_topics,
+            unwanted_user_topics,
+            language,
+            upper_bounds,
+            lower_bounds,
+            es_scale,
+            es_decay,
+            es_weight,
+            second_try=second_try,
+        )
+
+    preferences = (
+        "recommender",
+        count,
+        topics,
+        unwanted_topics,
+        user_topics,
+        unwanted_user_topics,
+        language.name if language else None,
+        upper_bounds,
+        lower_bounds,
+        es_scale,
+        es_decay,
+        es_weight,
+    )
+
+    return _cached(preferences, lambda: (build(False), build(True)))
+
+
+def build_elastic_search_queries(
+    count,
+    search_terms,
+    topics,
+    unwanted_topics,
+    user_topics,
+    unwanted_user_topics,
+    language,
+    upper_bounds,
+    lower_bounds,
+    es_scale="3d",
+    es_decay=0.8,
+    es_weight=4.2,
+):
+    """
+
+    Returns both the search query and its second_try fallback.
+    They are cached by the search terms and preferences they were built from.
+
+    """
+
+    def build(second_try):
+        return build_elastic_search_query(
+            count,
+            search_terms,
+            topics,
+            unwanted_topics,
+            user_topics,
+            unwanted_user_topics,
+            language,
+            upper_bounds,
+            lower_bounds,
+            es_scale,
+            es_decay,
+            es_weight,
+            second_try=second_try,
+        )
+
+    preferences = (
+        "search",
+        count,
+        search_terms,
+        topics,
+        unwanted_topics,
+        user_topics,
+        unwanted_user_topics,
+        language.name,
+        upper_bounds,
+        lower_bounds,
+        es_scale,
+        es_decay,
+        es_weight,
+    )
+
+    return _cached(preferences, lambda: (build(False), build(True)))
+
+
+def _cached(preferences, build):
+    # the API threads share the cache
+    with _cached_queries_lock:
+        queries = _cached_queries.get(preferences)
+        if queries is not None:
+            _cached_queries.move_to_end(preferences)
+
+    if queries is None:
+        queries = build()
+        with _cached_queries_lock:
+            _cached_queries[preferences] = queries
+            while len(_cached_queries) > MAX_CACHED_QUERIES:
+                _cached_queries.popitem(last=False)
+
+    # callers are free to modify what they get
+    return copy.deepcopy(queries)
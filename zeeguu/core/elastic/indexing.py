@@ -1,25 +1,26 @@
-from zeeguu.core.model import Topic
-from zeeguu.core.model.article import article_topic_map
 from zeeguu.core.model.difficulty_lingo_rank import DifficultyLingoRank
-from elasticsearch import Elasticsearch
-from zeeguu.core.elastic.settings import ES_CONN_STRING, ES_ZINDEX
+from zeeguu.core.elastic.client import es_client
+from zeeguu.core.elastic.settings import (
+    ES_ZINDEX,
+    ES_INDEXING_TIMEOUT,
+    ES_CARDS_FROM_INDEX,
+)
 
+# the card is only stored, not searched, so there's no point in
+# having ES analyze and index every one of its fields
+CARD_MAPPING = {"properties": {"card": {"type": "object", "enabled": False}}}
 
-def find_topics(article_id, session):
-    article_topic = (
-        session.query(Topic)
-        .join(article_topic_map)
-        .filter(article_topic_map.c.article_id == article_id)
-    )
-    topics = ""
-    for t in article_topic:
-        topics = topics + str(t.title) + " "
-
-    return topics.rstrip()
 
+def document_from_article(article, session, lr_difficulty=None):
+    """
+    :param lr_difficulty: the DifficultyLingoRank of the article,
+    if it was already loaded (see documents_from_articles)
+    """
+    # the topics of an article that was just crawled are already loaded
+    topics = article.topics_as_string().rstrip()
 
-def document_from_article(article, session):
-    topics = find_topics(article.id, session)
+    if lr_difficulty is None:
+        lr_difficulty = DifficultyLingoRank.value_for_article(article)
 
     doc = {
         "title": article.title,
@@ -31,24 +32,39 @@ def document_from_article(article, session):
         "topics": topics,
         "language": article.language.name,
         "fk_difficulty": article.fk_difficulty,
-        "lr_difficulty": DifficultyLingoRank.value_for_article(article),
+        "lr_difficulty": lr_difficulty,
         "url":article.url.as_string(),
         "video":article.video
     }
+
+    if ES_CARDS_FROM_INDEX:
+        doc["card"] = article.article_info()
+
     return doc
 
 
-def create_or_update(article, session):
-    es = Elasticsearch(ES_CONN_STRING)
+def documents_from_articles(articles, session):
+    """
+    Like document_from_article, for many articles, but with a single
+    query for their lingo rank difficulties; for the topics, the
+    articles should be loaded with selectinload(Article.topics)
 
-    doc = document_from_article(article, session)
+    :return: a dict from article id to document
+    """
+    lr_difficulties = dict(
+        session.query(DifficultyLingoRank.article_id, DifficultyLingoRank.difficulty)
+        .filter(DifficultyLingoRank.article_id.in_([each.id for each in articles]))
+        .all()
+    )
+    return {
+        each.id: document_from_article(each, session, lr_difficulties.get(each.id))
+        for each in articles
+    }
 
-    if es.exists(index=ES_ZINDEX, id=article.id):
-        es.delete(index=ES_ZINDEX, id=article.id)
 
-    res = es.index(index=ES_ZINDEX, id=article.id, body=doc)
+def put_card_mapping(index=ES_ZINDEX):
+    es_client().indices.put_mapping(index=index, body=CARD_MAPPING)
 
-    return res
 
 def index_in_elasticsearch(new_article, session):
     """
@@ -57,9 +73,14 @@ def index_in_elasticsearch(new_article, session):
     # as ElasticSearch isn't persistent data
     """
     try:
-        es = Elasticsearch(ES_CONN_STRING)
+        es = es_client()
         doc = document_from_article(new_article, session)
-        res = es.index(index=ES_ZINDEX, id=new_article.id, document=doc)
+        res = es.index(
+            index=ES_ZINDEX,
+            id=new_article.id,
+            document=doc,
+            request_timeout=ES_INDEXING_TIMEOUT,
+        )
         print("elastic res: " + res["result"])
     except Exception as e: 
         import traceback
@@ -67,7 +88,12 @@ def index_in_elasticsearch(new_article, session):
 
 
 def remove_from_index(article):
-    es = Elasticsearch(ES_CONN_STRING)
+    """
+    :return: True if the article was in the index
+    """
+    es = es_client()
     if es.exists(index=ES_ZINDEX, id=article.id):
-        es.delete(index=ES_ZINDEX, id=article.id)
-        deleted_from_es += 1
+        es.delete(index=ES_ZINDEX, id=article.id, request_timeout=ES_INDEXING_TIMEOUT)
+        return True
+    return False
+
@@ -7,3 +7,43 @@ ES_CONN_STRING = os.environ.get("ZEEGUU_ES_CONN_STRING", "http://127.0.0.1:9200"
 
 # what index to use in elasticsearch
 ES_ZINDEX = "zeeguu"
+
+# the client is shared by the whole process (see client.py);
+# this is the max number of connections it keeps alive to ES
+ES_POOL_SIZE = int(os.environ.get("ZEEGUU_ES_POOL_SIZE", 10))
+
+# retry policy; a request is retried on connection errors
+# and 502/503/504 and, if enabled, on timeouts
+ES_MAX_RETRIES = int(os.environ.get("ZEEGUU_ES_MAX_RETRIES", 3))
+ES_RETRY_ON_TIMEOUT = (
+    os.environ.get("ZEEGUU_ES_RETRY_ON_TIMEOUT", "true").lower() == "true"
+)
+
+# timeouts in seconds; the default one is for the client, the other
+# two are passed per call: searches are on the path of a user request
+# and should fail fast; indexing happens in the crawler and can wait
+ES_TIMEOUT = float(os.environ.get("ZEEGUU_ES_TIMEOUT", 10))
+ES_SEARCH_TIMEOUT = float(os.environ.get("ZEEGUU_ES_SEARCH_TIMEOUT", 5))
+ES_INDEXING_TIMEOUT = float(os.environ.get("ZEEGUU_ES_INDEXING_TIMEOUT", 30))
+
+# when true, the documents also store the article card (i.e. the
+# article_info dict) and the recommendation and topic filter endpoints
+# render their results straight from the index; the DB is then only
+# used for what's specific to the user (starred, opened, liked, ...)
+# before turning this on run put_card_mapping() from indexing.py
+# and reindex, otherwise the older documents are rendered from the DB
+# a stored card is not updated when the article changes after it was
+# indexed (e.g. its topics are edited); reindex the article (or run
+# tools/mysql_to_elastic.py) after such changes. Deleted and broken
+# articles are still filtered out against the DB
+ES_CARDS_FROM_INDEX = (
+    os.environ.get("ZEEGUU_ES_CARDS_FROM_INDEX", "false").lower() == "true"
+)
+
+# the crawler indexes the new articles in bulk: the documents are sent
+# when ES_BULK_SIZE of them were buffered, or ES_BULK_INTERVAL seconds
+# after the previous flush; a document that ES rejects (e.g. a 429 when
+# it's overloaded) is retried at most ES_BULK_RETRIES times
+ES_BULK_SIZE = int(os.environ.get("ZEEGUU_ES_BULK_SIZE", 100))
+ES_BULK_INTERVAL = float(os.environ.get("ZEEGUU_ES_BULK_INTERVAL", 30))
+ES_BULK_RETRIES = int(os.environ.get("ZEEGUU_ES_BULK_RETRIES", 3))
@@ -51,6 +51,8 @@ from .articles_cache import ArticlesCache
 from .article_difficulty_feedback import ArticleDifficultyFeedback
 
 from .feed import RSSFeed
+from .url_redirect import UrlRedirect
+from .feed_crawl import FeedCrawl
 
 from .topic import Topic
 from .topic_subscription import TopicSubscription
@@ -89,6 +91,7 @@ from .word_to_study import WordToStudy
 from .personal_copy import PersonalCopy
 
 from .difficulty_lingo_rank import DifficultyLingoRank
+from .article_fingerprint import ArticleFingerprint
 
 
 # Creating the DB tables if needed
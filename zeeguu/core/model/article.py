@@ -6,7 +6,7 @@ import time
 import sqlalchemy
 from langdetect import detect
 from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UnicodeText, Table
-from sqlalchemy.orm import relationship, backref
+from sqlalchemy.orm import relationship, backref, joinedload, selectinload
 from sqlalchemy.orm.exc import NoResultFound
 
 import zeeguu.core
@@ -112,6 +112,7 @@ class Article(db.Model):
         broken=0,
         deleted=0,
         video=0,
+        fk_difficulty=None,  # if it was already computed, e.g. by the crawler
     ):
 
         if not summary:
@@ -134,10 +135,11 @@ class Article(db.Model):
 
         self.convertHTML2TextIfNeeded()
 
-        fk_estimator = DifficultyEstimatorFactory.get_difficulty_estimator("fk")
-        fk_difficulty = fk_estimator.estimate_difficulty(
-            self.content, self.language, None
-        )["grade"]
+        if fk_difficulty is None:
+            fk_estimator = DifficultyEstimatorFactory.get_difficulty_estimator("fk")
+            fk_difficulty = fk_estimator.estimate_difficulty(
+                self.content, self.language, None
+            )["grade"]
 
         # easier to store integer in the DB
         # otherwise we have to use Decimal, and it's not supported on all dbs
@@ -410,6 +412,39 @@ class Article(db.Model):
     def find_by_id(cls, id: int):
         return Article.query.filter(Article.id == id).first()
 
+    @classmethod
+    def find_by_ids(cls, ids: list):
+        """
+
+            Bulk version of find_by_id: retrieves all the articles
+            with one IN (...) query and eager-loads the relationships
+            that article_info touches, such that rendering the
+            articles does not result in further lazy loads.
+
+            The result keeps the order of :param ids (e.g. the
+            score order of a search engine); ids that are not
+            in the DB are skipped.
+
+        """
+        from zeeguu.core.model import Url, RSSFeed
+
+        ids = [int(each) for each in ids]
+        if not ids:
+            return []
+
+        query = Article.query.filter(Article.id.in_(ids)).options(
+            joinedload(Article.language),
+            joinedload(Article.uploader),
+            joinedload(Article.url).joinedload(Url.domain),
+            joinedload(Article.rss_feed)
+            .joinedload(RSSFeed.image_url)
+            .joinedload(Url.domain),
+            selectinload(Article.topics),
+        )
+
+        by_id = {each.id: each for each in query.all()}
+        return [by_id[each] for each in ids if each in by_id]
+
     @classmethod
     def uploaded_by(cls, uploader_id: int):
         return Article.query.filter(Article.uploader_id == uploader_id).all()
@@ -0,0 +1,42 @@
+import zeeguu.core
+from sqlalchemy import Column, Integer, ForeignKey, BigInteger
+from sqlalchemy.orm import relationship
+
+
+db = zeeguu.core.db
+
+
+class ArticleFingerprint(db.Model):
+    """
+
+        The SimHash of the content of an article (see near_duplicates),
+        used to recognize the copies of the same story that are
+        published by several feeds under different urls.
+
+    """
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    from zeeguu.core.model.article import Article
+
+    article_id = Column(Integer, ForeignKey(Article.id), unique=True)
+    article = relationship(Article)
+
+    from zeeguu.core.model.language import Language
+
+    # redundant with the article, but the fingerprints of a
+    # language are loaded without having to join the article table
+    language_id = Column(Integer, ForeignKey(Language.id), index=True)
+
+    # the 64 bit hash, as a signed number, which is what BIGINT can store
+    simhash = Column(BigInteger)
+
+    def __init__(self, article, simhash) -> None:
+        super().__init__()
+        self.article = article
+        self.language_id = article.language.id
+        self.simhash = simhash - 2**64 if simhash >= 2**63 else simhash
+
+    @property
+    def unsigned_simhash(self):
+        return self.simhash % 2**64
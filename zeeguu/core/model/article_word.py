@@ -56,6 +56,50 @@ class ArticleWord(db.Model):
                 session.rollback()
                 return cls.query.filter(cls.word == word).one()
 
+    @classmethod
+    def add_words_of_article(cls, session, words, article):
+        """
+
+            Associates the :param article with all the :param words,
+            creating the ones that don't exist yet.
+
+            Instead of loading every word and appending the article to
+            its (possibly huge) articles collection, the existing words
+            are fetched in one query, the missing ones are inserted in
+            bulk, and so are the rows of the article_word_map.
+
+        """
+        words = set(words)
+        if not words:
+            return
+
+        # the article needs an id
+        session.flush()
+        connection = session.connection()
+
+        ids = cls._ids_of_words(session, words)
+        missing = words - set(ids)
+        if missing:
+            connection.execute(
+                cls.__table__.insert(), [{"word": each} for each in missing]
+            )
+            ids.update(cls._ids_of_words(session, missing))
+
+        connection.execute(
+            article_word_map.insert(),
+            [{"word_id": id, "article_id": article.id} for id in ids.values()],
+        )
+
+    @classmethod
+    def _ids_of_words(cls, session, words):
+        ids = {}
+        # if the same word was created twice, the oldest one is used
+        for id, word in (
+            session.query(cls.id, cls.word).filter(cls.word.in_(words)).order_by(cls.id)
+        ):
+            ids.setdefault(word, id)
+        return ids
+
     @classmethod
     def find_by_word(cls, word):
         try:
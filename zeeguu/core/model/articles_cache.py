@@ -1,11 +1,28 @@
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
 from sqlalchemy.orm import relationship
 
 import zeeguu.core
 
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, CHAR, UniqueConstraint
+from sqlalchemy import text
+
+from zeeguu.core.util import text_hash
 
 db = zeeguu.core.db
 
+# how long a request waits for another one which is
+# already computing the same cache, before giving up
+HASH_LOCK_TIMEOUT = 10  # seconds
+
+# e.g. "lan: de (1, 5.5) top: 3,7 sear: 12 filt:  sear-filt: 4"
+HASH_PATTERN = re.compile(
+    r"^lan: (\S+) \((-?[\d.]+), (-?[\d.]+)\)"
+    r" top: ([\d,]*) sear: ([\d,]*) filt: ([\d,]*) sear-filt: ([\d,]*)$"
+)
+
 
 class ArticlesCache(db.Model):
     """
@@ -18,8 +35,6 @@ class ArticlesCache(db.Model):
 
     """
 
-    __table_args__ = {"mysql_collate": "utf8_bin"}
-
     id = Column(Integer, primary_key=True)
 
     from zeeguu.core.model.article import Article
@@ -29,9 +44,19 @@ class ArticlesCache(db.Model):
 
     content_hash = Column(String(256))
 
+    # the content_hash is too long to be indexed together with the
+    # article_id; the digest is fixed width and can be
+    hash_digest = Column(CHAR(40), index=True)
+
+    __table_args__ = (
+        UniqueConstraint(hash_digest, article_id, name="_hash_article_unique"),
+        {"mysql_collate": "utf8_bin"},
+    )
+
     def __init__(self, article, hash):
         self.article = article
         self.content_hash = hash
+        self.hash_digest = text_hash(hash)
 
     def __repr__(self):
         return f"<Hash {self.content_hash}>"
@@ -68,10 +93,80 @@ class ArticlesCache(db.Model):
             + _join_ids(search_filters)
         )
 
+    @staticmethod
+    def preferences_from_hash(hash):
+        """
+
+            The inverse of calculate_hash.
+
+        :return: a dict with the language code, the level bounds and the ids
+        of the topics, searches, filters and search filters; None if the hash
+        can't be parsed (e.g. it was computed for more than one language)
+
+        """
+
+        def _split_ids(ids: str):
+            return [int(each) for each in ids.split(",") if each]
+
+        match = HASH_PATTERN.match(hash)
+        if not match:
+            return None
+
+        (
+            language_code,
+            level_min,
+            level_max,
+            topics,
+            searches,
+            filters,
+            search_filters,
+        ) = match.groups()
+
+        return dict(
+            language_code=language_code,
+            level_min=float(level_min),
+            level_max=float(level_max),
+            topic_ids=_split_ids(topics),
+            search_ids=_split_ids(searches),
+            filter_ids=_split_ids(filters),
+            search_filter_ids=_split_ids(search_filters),
+        )
+
+    @classmethod
+    def all_hashes(cls):
+        return [each[0] for each in db.session.query(cls.content_hash.distinct())]
+
+    @classmethod
+    def delete_for_articles_older_than(cls, session, days):
+        """
+
+            Articles drop out of the cache once they get old,
+            such that the cache does not need to be wiped
+            and recomputed regularly.
+
+        """
+        from zeeguu.core.model import Article
+
+        long_ago = datetime.now() - timedelta(days=days)
+        old_articles = session.query(Article.id).filter(
+            Article.published_time < long_ago
+        )
+
+        deleted = cls.query.filter(cls.article_id.in_(old_articles.subquery())).delete(
+            synchronize_session=False
+        )
+        session.commit()
+        return deleted
+
     @classmethod
     def get_articles_for_hash(cls, hash, limit):
         try:
-            result = cls.query.filter(cls.content_hash == hash).limit(limit)
+            # articles are added incrementally; the most recent ones first
+            result = (
+                cls.query.filter(cls.hash_digest == text_hash(hash))
+                .order_by(cls.article_id.desc())
+                .limit(limit)
+            )
             if result is None:
                 return None
             return [article_id.article for article_id in result]
@@ -83,8 +178,62 @@ class ArticlesCache(db.Model):
 
     @classmethod
     def check_if_hash_exists(cls, hash):
-        result = cls.query.filter(cls.content_hash == hash).first()
+        result = cls.query.filter(cls.hash_digest == text_hash(hash)).first()
         if result is None:
             return False
         else:
             return True
+
+    @classmethod
+    def add_all(cls, session, hashes_and_article_ids):
+        """
+
+            Adds all the (hash, article_id) pairs with a single insert;
+            the pairs that are already in the table are skipped, so it's
+            fine if two processes cache the same articles at the same time
+
+        """
+        rows = [
+            dict(content_hash=hash, hash_digest=text_hash(hash), article_id=article_id)
+            for hash, article_id in hashes_and_article_ids
+        ]
+        if not rows:
+            return
+
+        if db.engine.dialect.name == "mysql":
+            insert = cls.__table__.insert().prefix_with("IGNORE")
+        else:
+            insert = cls.__table__.insert().prefix_with("OR IGNORE")
+
+        session.connection().execute(insert, rows)
+        session.commit()
+
+    @classmethod
+    @contextmanager
+    def lock_for_hash(cls, hash, timeout=HASH_LOCK_TIMEOUT):
+        """
+
+            MySQL advisory lock, such that only one of several simultaneous
+            requests computes the cache for a given hash. The lock is held on
+            a dedicated connection, since the session might switch
+            connections on commit.
+
+            Yields whether the lock was acquired; on other databases
+            there is no locking and it always is.
+
+        """
+        if db.engine.dialect.name != "mysql":
+            yield True
+            return
+
+        # lock names are at most 64 characters
+        name = "articles_cache_" + text_hash(hash)
+        with db.engine.connect() as connection:
+            acquired = connection.execute(
+                text("SELECT GET_LOCK(:name, :timeout)"), name=name, timeout=timeout
+            ).scalar()
+            try:
+                yield acquired == 1
+            finally:
+                if acquired == 1:
+                    connection.execute(text("SELECT RELEASE_LOCK(:name)"), name=name)
@@ -306,9 +306,13 @@ class Bookmark(db.Model):
 
     @classmethod
     def find_all_for_user_and_article(cls, user, article):
+        return cls.find_all_for_user_and_article_id(user, article.id)
+
+    @classmethod
+    def find_all_for_user_and_article_id(cls, user, article_id):
         return (
             cls.query.join(Text)
-            .filter(Text.article_id == article.id)
+            .filter(Text.article_id == article_id)
             .filter(Bookmark.user == user)
             .all()
         )
@@ -0,0 +1,81 @@
+"""
+
+    Cache for the ids of the articles of a language or of a topic,
+    which take a while to compute.
+
+    The entries expire after ARTICLE_IDS_TTL and only MAX_CACHED_LISTS
+    of them are kept. The crawler runs in another process and can't
+    invalidate them, so an article it adds shows up in the API at the
+    latest ARTICLE_IDS_TTL later; the /cache_articles endpoint clears
+    and recomputes all of them right away.
+
+    The articles themselves are loaded lazily, a page at a time,
+    through LazyArticles.
+
+"""
+
+from zeeguu.core.util.ttl_cache import TTLCache
+
+MAX_CACHED_LISTS = 500
+ARTICLE_IDS_TTL = 60 * 60  # seconds
+
+DEFAULT_PAGE_SIZE = 100
+
+_article_ids = TTLCache(MAX_CACHED_LISTS, ARTICLE_IDS_TTL)
+
+
+def article_ids(key, compute):
+    """
+    :param key: a tuple that starts with "language" or "topic"
+    and the id of the language or topic
+    :param compute: called when the ids are not cached
+    """
+    cached = _article_ids.get(key)
+    if cached is None:
+        cached = tuple(compute())
+        _article_ids.put(key, cached)
+    return cached
+
+
+def forget(kind, id):
+    """
+    Drops the cached ids of one language or topic in this process
+    :param kind: "language" or "topic"
+    """
+    _article_ids.pop_matching(lambda key: key[0] == kind and key[1] == id)
+
+
+def clear():
+    _article_ids.clear()
+
+
+class LazyArticles:
+    """
+    A read-only sequence of Articles, loaded from the DB only as
+    they are indexed or iterated, at most page_size at a time
+    """
+
+    def __init__(self, ids, page_size=DEFAULT_PAGE_SIZE):
+        self.ids = ids
+        self.page_size = page_size
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        from zeeguu.core.model import Article
+
+        if isinstance(index, slice):
+            return Article.find_by_ids(self.ids[index])
+        return Article.find_by_id(self.ids[index])
+
+    def __iter__(self):
+        for start in range(0, len(self.ids), self.page_size):
+            yield from self[start : start + self.page_size]
+
+    def page(self, number):
+        """
+        :return: the articles of page :param number, counting from zero
+        """
+        start = number * self.page_size
+        return self[start : start + self.page_size]
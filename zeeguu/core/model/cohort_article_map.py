@@ -32,15 +32,23 @@ class CohortArticleMap(zeeguu.core.db.Model):
 
     @classmethod
     def get_articles_info_for_cohort(cls, cohort):
-        def _adapted_article_info(relation):
-            article_info = relation.article.article_info()
+        def _adapted_article_info(relation, article):
+            article_info = article.article_info()
             if relation.published_time:
                 article_info["published"] = datetime_to_json(relation.published_time)
             return article_info
 
+        relations = cls.query.filter_by(cohort=cohort).all()
+        # the articles, with the relationships that article_info
+        # needs, are loaded with one query rather than one by one
+        articles_by_id = {
+            each.id: each
+            for each in Article.find_by_ids([each.article_id for each in relations])
+        }
+
         articles = [
-            _adapted_article_info(relation)
-            for relation in cls.query.filter_by(cohort=cohort).all()
+            _adapted_article_info(relation, articles_by_id[relation.article_id])
+            for relation in relations
         ]
         return sorted(articles, key=lambda x: x["metrics"]["difficulty"])
 
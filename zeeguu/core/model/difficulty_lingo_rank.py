@@ -1,5 +1,5 @@
 import zeeguu.core
-from sqlalchemy import Column, Integer, ForeignKey, Float
+from sqlalchemy import Column, Integer, ForeignKey, Float, CHAR
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm.exc import NoResultFound
 
@@ -18,10 +18,15 @@ class DifficultyLingoRank(db.Model):
 
     difficulty = Column(Float)
 
-    def __init__(self, article, difficulty) -> None:
+    # the text_hash of the content of the article; the rank of the
+    # same content is not retrieved again (see lingo_rank_enrichment)
+    content_digest = Column(CHAR(40), index=True)
+
+    def __init__(self, article, difficulty, content_digest=None) -> None:
         super().__init__()
         self.article = article
         self.difficulty = difficulty
+        self.content_digest = content_digest
 
     @classmethod
     def value_for_article(cls, article):
@@ -29,3 +34,8 @@ class DifficultyLingoRank(db.Model):
             return cls.query.filter_by(article_id=article.id).one().difficulty
         except NoResultFound:
             return None
+
+    @classmethod
+    def value_for_content(cls, content_digest):
+        rank = cls.query.filter_by(content_digest=content_digest).first()
+        return rank.difficulty if rank else None
@@ -1,20 +1,66 @@
 # -*- coding: utf8 -*-
 
+import threading
 import time
 from datetime import datetime
 
 import feedparser
-import requests
 import sqlalchemy.orm.exc
 from sqlalchemy.orm.exc import NoResultFound
 
 import zeeguu.core
 from zeeguu.core.constants import SIMPLE_TIME_FORMAT
+from zeeguu.core.content_retriever.fetch import new_session
 from zeeguu.core.model.language import Language
 from zeeguu.core.model.url import Url
 
 db = zeeguu.core.db
 
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/56.0.2924.76 Safari/537.36"
+}  # This is chrome, you can set whatever browser you like
+
+# one session for all the feeds, such that the connections are kept alive
+# and reused across the feeds of the same host
+_http_session = new_session(HEADERS)
+FEED_TIMEOUT = 20  # seconds
+
+
+class FeedHTTPStats:
+    """
+    Counts what the conditional requests for the feeds saved
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.feeds_downloaded = 0
+        self.feeds_not_modified = 0
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
+
+    def downloaded(self, size):
+        with self._lock:
+            self.feeds_downloaded += 1
+            self.bytes_downloaded += size
+
+    def not_modified(self, previous_size):
+        with self._lock:
+            self.feeds_not_modified += 1
+            self.bytes_saved += previous_size or 0
+
+    def report(self):
+        zeeguu.core.log(
+            f"*** Feeds downloaded: {self.feeds_downloaded} "
+            f"({self.bytes_downloaded} bytes); not modified: "
+            f"{self.feeds_not_modified} ({self.bytes_saved} bytes saved)"
+        )
+
+
+feed_http_stats = FeedHTTPStats()
+
 
 class RSSFeed(db.Model):
     __table_args__ = {"mysql_collate": "utf8_bin"}
@@ -38,6 +84,16 @@ class RSSFeed(db.Model):
 
     last_crawled_time = db.Column(db.DateTime)
 
+    # the validators of the last response, for conditional requests
+    etag = db.Column(db.String(512))
+    last_modified = db.Column(db.String(64))
+    last_response_size = db.Column(db.Integer)
+
+    # when the feed should be crawled again, and how many crawls
+    # in a row failed until now (see crawl_schedule)
+    next_crawl_time = db.Column(db.DateTime)
+    crawl_failures = db.Column(db.Integer)
+
     deactivated = db.Column(db.Integer)
 
     def __init__(
@@ -102,7 +158,7 @@ class RSSFeed(db.Model):
             icon_name=self.icon_name,
         )
 
-    def feed_items(self, last_retrieval_time_from_DB=None):
+    def feed_items(self, last_retrieval_time_from_DB=None, metrics=None):
         """
 
         :return: a dictionary with info about that feed
@@ -110,14 +166,78 @@ class RSSFeed(db.Model):
         and including: title, url, content, summary, time
         """
 
+        validators = self.http_validators()
+        items = self.feed_items_at(
+            self.url.as_string(), last_retrieval_time_from_DB, validators, metrics
+        )
+        self.update_http_validators(validators)
+        return items
+
+    def http_validators(self):
+        return dict(
+            etag=self.etag,
+            last_modified=self.last_modified,
+            size=self.last_response_size,
+        )
+
+    def update_http_validators(self, validators):
+        self.etag = validators.get("etag")
+        self.last_modified = validators.get("last_modified")
+        self.last_response_size = validators.get("size")
+
+    @staticmethod
+    def feed_items_at(
+        feed_url, last_retrieval_time_from_DB=None, validators=None, metrics=None
+    ):
+        """
+
+            Same as feed_items, but does not touch the DB, so
+            it can be called from any thread (see concurrent_crawler)
+
+        :param validators: the dict of http_validators; if given the
+        request is conditional, and the dict is updated with the
+        validators of a successful response. When the feed was not
+        modified since, there are no items. The caller saves them in
+        the feed (see update_http_validators) only after it crawled
+        the items, such that the items of a failed crawl are not
+        skipped by the next one.
+
+        :param metrics: the CrawlMetrics of the feed, if any, get
+        the duration and the size of the request
+
+        """
+
         if not last_retrieval_time_from_DB:
             last_retrieval_time_from_DB = datetime(1980, 1, 1)
 
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/56.0.2924.76 Safari/537.36"
-        }  # This is chrome, you can set whatever browser you like
+        headers = {}
+        if validators:
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        start = time.monotonic()
+        response = _http_session.get(feed_url, headers=headers, timeout=FEED_TIMEOUT)
+        fetch_seconds = time.monotonic() - start
+
+        if response.status_code == 304:
+            zeeguu.core.log(f"*** Not modified since the last crawl: {feed_url}")
+            feed_http_stats.not_modified((validators or {}).get("size"))
+            if metrics:
+                metrics.fetched(fetch_seconds, 0, not_modified=True)
+            return []
+
+        feed_http_stats.downloaded(len(response.content))
+        if metrics:
+            metrics.fetched(fetch_seconds, len(response.content))
+        # e.g. the ETag of an error page must not make the next
+        # request conditional
+        if validators is not None and response.status_code == 200:
+            validators["etag"] = response.headers.get("ETag")
+            validators["last_modified"] = response.headers.get("Last-Modified")
+            validators["size"] = len(response.content)
 
-        response = requests.get(self.url.as_string(), headers=headers)
         feed_data = feedparser.parse(response.text)
 
         skipped_due_to_time = 0
@@ -236,6 +356,24 @@ class RSSFeed(db.Model):
             session.commit()
             return new
 
+    @classmethod
+    def due_for_crawling(cls, now=None):
+        """
+        :return: the active feeds whose next crawl time has come, and
+        the ones that were never scheduled
+        """
+        now = now or datetime.now()
+        return (
+            cls.query.filter(
+                sqlalchemy.or_(cls.deactivated == 0, cls.deactivated == None)
+            )
+            .filter(
+                sqlalchemy.or_(cls.next_crawl_time == None, cls.next_crawl_time <= now)
+            )
+            .order_by(cls.next_crawl_time)
+            .all()
+        )
+
     # although it seems to not be used by anybody,
     # this method is being used from the zeeguu-api
     @classmethod
@@ -0,0 +1,65 @@
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Boolean
+from sqlalchemy.orm import relationship
+
+import zeeguu.core
+
+db = zeeguu.core.db
+
+
+class FeedCrawl(db.Model):
+    """
+
+        What happened when a feed was crawled: how long the crawl took
+        and where that time went, how many items the feed had, and why
+        the ones that were not downloaded were skipped.
+
+        Written by the crawler (see crawl_metrics) and read by
+        tools/crawl_report.py, to find the feeds that cost the most
+        for what they bring.
+
+    """
+
+    __tablename__ = "feed_crawl"
+
+    id = Column(Integer, primary_key=True)
+
+    from zeeguu.core.model.feed import RSSFeed
+
+    rss_feed_id = Column(Integer, ForeignKey(RSSFeed.id), index=True)
+    rss_feed = relationship(RSSFeed)
+
+    started = Column(DateTime, index=True)
+    # seconds; from the start of the crawl of the feed to its last article
+    duration = Column(Float)
+
+    # the request for the feed itself
+    fetch_seconds = Column(Float)
+    bytes = Column(Integer)
+    not_modified = Column(Boolean)
+    error = Column(String(512))
+
+    # the items of the feed, published since the previous crawl
+    items = Column(Integer)
+    downloaded = Column(Integer)
+    skipped_already_in_db = Column(Integer)
+    skipped_low_quality = Column(Integer)
+    skipped_too_old = Column(Integer)
+    skipped_near_duplicate = Column(Integer)
+    skipped_banned = Column(Integer)
+    failed = Column(Integer)
+
+    # seconds, summed over the items
+    download_seconds = Column(Float)
+    parse_seconds = Column(Float)
+    difficulty_seconds = Column(Float)
+    db_seconds = Column(Float)
+    es_seconds = Column(Float)
+
+    def __init__(self, rss_feed, started, **metrics):
+        self.rss_feed = rss_feed
+        self.started = started
+        for name, value in metrics.items():
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return f"<FeedCrawl {self.rss_feed_id} at {self.started}: {self.downloaded} downloaded>"
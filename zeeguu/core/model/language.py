@@ -2,6 +2,8 @@ from sqlalchemy.orm.exc import NoResultFound
 from datetime import datetime
 
 import zeeguu.core
+from zeeguu.core.model import cached_article_ids
+from zeeguu.core.model.cached_article_ids import DEFAULT_PAGE_SIZE, LazyArticles
 
 db = zeeguu.core.db
 
@@ -163,32 +165,34 @@ class Language(db.Model):
         return cls.query.filter(Language.id == i).one()
 
     def get_articles(
-        self, after_date=None, most_recent_first=False, easiest_first=False
+        self,
+        after_date=None,
+        most_recent_first=False,
+        easiest_first=False,
+        page_size=DEFAULT_PAGE_SIZE,
     ):
-        from zeeguu.core.model import Article
+        """
 
-        if hasattr(Language, "cached_articles") and (
-            self.cached_articles.get(self.id, None)
-        ):
-            zeeguu.core.logp(
-                f"found {len(Language.cached_articles[self.id])} cached articles for {self.name}"
-            )
-            all_ids = Language.cached_articles[self.id]
-            return Article.query.filter(Article.id.in_(all_ids)).all()
+            The ids of the articles are cached (see cached_article_ids);
+            the articles are loaded lazily, page_size at a time
 
-        if not hasattr(Language, "cached_articles"):
-            Language.cached_articles = {}
+        :return: LazyArticles
 
-        zeeguu.core.logp(
-            "computing and caching the articles for language: " + self.name
-        )
-        Language.cached_articles[self.id] = [
-            each.id
-            for each in self._get_articles(after_date, most_recent_first, easiest_first)
-        ]
+        """
+        key = ("language", self.id, after_date, most_recent_first, easiest_first)
 
-        all_ids = Language.cached_articles[self.id]
-        return Article.query.filter(Article.id.in_(all_ids)).all()
+        def compute():
+            zeeguu.core.logp(
+                "computing and caching the articles for language: " + self.name
+            )
+            return [
+                each.id
+                for each in self._get_articles(
+                    after_date, most_recent_first, easiest_first
+                )
+            ]
+
+        return LazyArticles(cached_article_ids.article_ids(key, compute), page_size)
 
     def _get_articles(
         self, after_date=None, most_recent_first=False, easiest_first=False
@@ -26,8 +26,12 @@ class PersonalCopy(db.Model):
 
     @classmethod
     def exists_for(cls, user, article):
+        return cls.exists_for_article_id(user, article.id)
+
+    @classmethod
+    def exists_for_article_id(cls, user, article_id):
         return len(
-            PersonalCopy.query.filter_by(user_id=user.id, article_id=article.id).all()
+            PersonalCopy.query.filter_by(user_id=user.id, article_id=article_id).all()
         )
 
     @classmethod
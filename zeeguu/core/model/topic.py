@@ -2,6 +2,9 @@ import zeeguu.core
 
 from sqlalchemy import Column, Integer, String
 
+from zeeguu.core.model import cached_article_ids
+from zeeguu.core.model.cached_article_ids import DEFAULT_PAGE_SIZE, LazyArticles
+
 db = zeeguu.core.db
 
 
@@ -32,27 +35,33 @@ class Topic(db.Model):
             title=self.title,
         )
 
-    def all_articles(self, limit=2000):
+    def all_articles(self, limit=2000, page_size=DEFAULT_PAGE_SIZE):
+        """
 
-        from zeeguu.core.model import Article
+            The ids of the articles are cached (see cached_article_ids);
+            the articles are loaded lazily, page_size at a time
 
-        if hasattr(Topic, 'cached_articles') and (self.cached_articles.get(self.id, None)):
-            zeeguu.core.logp (f"Topic: getting the cached articles for topic: {self.title}")
-            all_ids = Topic.cached_articles[self.id]
-            return Article.query.filter(Article.id.in_(all_ids)).all()
+        :return: LazyArticles
 
-        if not hasattr(Topic, 'cached_articles'):
-            Topic.cached_articles = {}
+        """
+
+        from zeeguu.core.model import Article
 
-        zeeguu.core.logp("computing and caching the articles for topic: " + self.title)
-        Topic.cached_articles[self.id] = [each.id for each in
-                                          Article.query.order_by(Article.published_time.desc()).filter(Article.topics.any(id=self.id)).limit(limit)]
+        def compute():
+            zeeguu.core.logp("computing and caching the articles for topic: " + self.title)
+            query = (
+                zeeguu.core.db.session.query(Article.id)
+                .order_by(Article.published_time.desc())
+                .filter(Article.topics.any(id=self.id))
+                .limit(limit)
+            )
+            return [each[0] for each in query]
 
-        all_ids = Topic.cached_articles[self.id]
-        return Article.query.filter(Article.id.in_(all_ids)).all()
+        ids = cached_article_ids.article_ids(("topic", self.id, limit), compute)
+        return LazyArticles(ids, page_size)
 
     def clear_all_articles_cache(self):
-        Topic.cached_articles[self.id] = None
+        cached_article_ids.forget("topic", self.id)
 
     @classmethod
     def find(cls, name: str):
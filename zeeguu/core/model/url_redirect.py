@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, Integer, String, CHAR, DateTime
+
+import zeeguu.core
+from zeeguu.core.util import text_hash
+
+db = zeeguu.core.db
+
+
+class UrlRedirect(db.Model):
+    """
+
+    The url that a feed item url (often a tracking or a shortened
+    url) redirects to. Remembered by the crawler such that the
+    redirects of an item are resolved only once, no matter how
+    many times the item is seen in its feed.
+
+    The items stay in a feed only for a while, so the redirects are
+    deleted after MAX_AGE_IN_DAYS (see delete_older_than).
+
+    """
+
+    __table_args__ = {"mysql_collate": "utf8_bin"}
+
+    MAX_AGE_IN_DAYS = 30
+
+    id = Column(Integer, primary_key=True)
+
+    # the urls can be too long to be indexed; the digest is fixed width
+    original_digest = Column(CHAR(40), unique=True)
+    original = Column(String(2083))
+    final = Column(String(2083))
+
+    resolved_time = Column(DateTime, index=True)
+
+    def __init__(self, original, final):
+        self.original = original
+        self.original_digest = text_hash(original)
+        self.final = final
+        self.resolved_time = datetime.now()
+
+    def __repr__(self):
+        return f"<UrlRedirect {self.original} -> {self.final}>"
+
+    @classmethod
+    def final_url(cls, original):
+        """
+        :return: the url that :param original was resolved to, or None
+        if its redirects were never resolved
+        """
+        redirect = cls.query.filter_by(original_digest=text_hash(original)).first()
+        if redirect:
+            return redirect.final
+        return None
+
+    @classmethod
+    def remember(cls, session, original, final):
+        if cls.final_url(original) is not None:
+            return
+        session.add(cls(original, final))
+        session.commit()
+
+    @classmethod
+    def delete_older_than(cls, session, days=MAX_AGE_IN_DAYS):
+        """
+        :return: the number of deleted redirects
+        """
+        long_ago = datetime.now() - timedelta(days=days)
+        deleted = cls.query.filter(cls.resolved_time < long_ago).delete(
+            synchronize_session=False
+        )
+        session.commit()
+        return deleted
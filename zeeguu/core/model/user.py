@@ -49,6 +49,11 @@ class User(db.Model):
     cohort_id = Column(Integer, ForeignKey(Cohort.id))
     cohort = relationship(Cohort)
 
+    # changed with every change of the reading preferences, such that
+    # the recommendations cached for the previous ones, in any process,
+    # are not used anymore (see recommendation_cache)
+    preferences_version = db.Column(db.Integer, default=0)
+
     def __init__(
         self,
         email,
@@ -184,6 +189,8 @@ class User(db.Model):
         if session:
             session.add(language)
 
+        self._invalidate_cached_recommendations()
+
     def set_learned_language_level(self, language_code: str, level: str, session=None):
         learned_language = Language.find_or_create(language_code)
         from zeeguu.core.model import UserLanguage
@@ -193,6 +200,13 @@ class User(db.Model):
         if session:
             session.add(language)
 
+        self._invalidate_cached_recommendations()
+
+    def _invalidate_cached_recommendations(self):
+        from zeeguu.core.content_recommender import recommendation_cache
+
+        recommendation_cache.invalidate_for_user(self)
+
     def has_bookmarks(self):
         return self.bookmark_count() > 0
 
@@ -9,7 +9,7 @@ from sqlalchemy import (
     Boolean,
     or_,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, contains_eager, joinedload
 from sqlalchemy.orm.exc import NoResultFound
 
 import zeeguu.core
@@ -240,13 +240,147 @@ class UserArticle(zeeguu.core.db.Model):
         cls, user: User, article: Article, with_content=False, with_translations=True
     ):
 
-        from zeeguu.core.model import Bookmark
-
         # Initialize returned info with the default article info
         returned_info = article.article_info(with_content=with_content)
 
-        user_article_info = UserArticle.find(user, article)
+        cls._add_info_for_user(user, article.id, returned_info, with_translations)
+
+        return returned_info
+
+    @classmethod
+    def user_article_infos(
+        cls, user: User, articles: list, with_content=False, with_translations=True
+    ):
+        """
+
+            Same as calling user_article_info for each of the articles,
+            but the info of the user is retrieved for all of them at
+            once: three queries, instead of three per article
+
+        """
+
+        overlay = cls._user_info_for_articles(
+            user, [each.id for each in articles], with_translations
+        )
+
+        infos = []
+        for article in articles:
+            returned_info = article.article_info(with_content=with_content)
+            cls._add_info(returned_info, *overlay(article.id), with_translations)
+            infos.append(returned_info)
+
+        return infos
+
+    @classmethod
+    def user_article_infos_from_cards(cls, user: User, cards: list, with_translations=True):
+        """
+
+            Like user_article_infos, but starting from article cards,
+            i.e. article_info dicts that were stored elsewhere (e.g. in ES),
+            such that the articles themselves do not have to be loaded
+
+        """
+
+        overlay = cls._user_info_for_articles(
+            user, [card["id"] for card in cards], with_translations
+        )
+
+        infos = []
+        for card in cards:
+            returned_info = dict(card)
+            cls._add_info(returned_info, *overlay(card["id"]), with_translations)
+            infos.append(returned_info)
+
+        return infos
+
+    @classmethod
+    def _user_info_for_articles(cls, user, article_ids, with_translations):
+        """
+
+        :return: a function from article id to the user article,
+        the bookmarks of the user in that article, and whether the
+        user has a personal copy of it
+
+        """
+        from zeeguu.core.model import Bookmark, Text
+
+        article_ids = [int(each) for each in article_ids]
+        if not article_ids:
+            return lambda article_id: (None, [], False)
+
+        user_articles = {
+            each.article_id: each
+            for each in cls.query.filter(cls.user == user).filter(
+                cls.article_id.in_(article_ids)
+            )
+        }
+
+        translations = {}
+        if with_translations:
+            bookmarks = (
+                Bookmark.query.join(Text)
+                .filter(Text.article_id.in_(article_ids))
+                .filter(Bookmark.user == user)
+                .options(
+                    contains_eager(Bookmark.text),
+                    joinedload(Bookmark.origin),
+                    joinedload(Bookmark.translation),
+                )
+                .order_by(Bookmark.id)
+            )
+            for each in bookmarks:
+                translations.setdefault(each.text.article_id, []).append(each)
+
+        with_personal_copy = set(
+            each[0]
+            for each in zeeguu.core.db.session.query(PersonalCopy.article_id)
+            .filter(PersonalCopy.user_id == user.id)
+            .filter(PersonalCopy.article_id.in_(article_ids))
+        )
+
+        def overlay(article_id):
+            article_id = int(article_id)
+            return (
+                user_articles.get(article_id),
+                translations.get(article_id, []),
+                article_id in with_personal_copy,
+            )
+
+        return overlay
 
+    @classmethod
+    def _add_info_for_user(cls, user, article_id, returned_info, with_translations):
+        from zeeguu.core.model import Bookmark
+
+        try:
+            user_article_info = cls.query.filter_by(
+                user=user, article_id=article_id
+            ).one()
+        except NoResultFound:
+            user_article_info = None
+
+        translations = []
+        if user_article_info and with_translations:
+            translations = Bookmark.find_all_for_user_and_article_id(user, article_id)
+
+        has_personal_copy = bool(PersonalCopy.exists_for_article_id(user, article_id))
+
+        cls._add_info(
+            returned_info,
+            user_article_info,
+            translations,
+            has_personal_copy,
+            with_translations,
+        )
+
+    @staticmethod
+    def _add_info(
+        returned_info,
+        user_article_info,
+        translations,
+        has_personal_copy,
+        with_translations,
+    ):
         if not user_article_info:
             returned_info["starred"] = False
             returned_info["opened"] = False
@@ -267,14 +401,8 @@ class UserArticle(zeeguu.core.db.Model):
             )
 
             if with_translations:
-                translations = Bookmark.find_all_for_user_and_article(user, article)
                 returned_info["translations"] = [
                     each.serializable_dictionary() for each in translations
                 ]
 
-        if PersonalCopy.exists_for(user, article):
-            returned_info["has_personal_copy"] = True
-        else:
-            returned_info["has_personal_copy"] = False
-
-        return returned_info
+        returned_info["has_personal_copy"] = has_personal_copy
@@ -4,13 +4,68 @@
 import requests_mock
 import zeeguu.core.model
 
+from contextlib import contextmanager
 from faker import Faker
+from sqlalchemy import event
 
 from unittest import TestCase
+from unittest.mock import patch
 
 from zeeguu.core.test.test_data.mocking_the_web import mock_requests_get
 
 
+@contextmanager
+def recorded_queries():
+    """
+    Yields the list of the SQL statements that are executed in the block;
+    e.g. to check that their number does not grow with the input
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = zeeguu.core.db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+@contextmanager
+def failing_article_commits():
+    """
+    In the block, the commits that would save a new article raise,
+    like when the DB goes away in the middle of a crawl
+    """
+    session = zeeguu.core.db.session
+    flushed_articles = []
+
+    def record(session, _):
+        flushed_articles.extend(
+            each for each in session.new if isinstance(each, zeeguu.core.model.Article)
+        )
+
+    real_commit = session.commit
+
+    def commit():
+        new_articles = [
+            each for each in session.new if isinstance(each, zeeguu.core.model.Article)
+        ]
+        if flushed_articles or new_articles:
+            flushed_articles.clear()
+            raise Exception("the DB went away")
+        real_commit()
+
+    event.listen(session, "after_flush", record)
+    try:
+        with patch.object(session, "commit", commit):
+            yield
+    finally:
+        event.remove(session, "after_flush", record)
+
+
 class ModelTestMixIn(TestCase):
     db = zeeguu.core.db
 
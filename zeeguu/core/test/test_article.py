@@ -1,11 +1,15 @@
 from unittest import TestCase
 
-from zeeguu.core.test.model_test_mixin import ModelTestMixIn
+from zeeguu.core.test.model_test_mixin import ModelTestMixIn, recorded_queries
 
 import zeeguu.core
 from zeeguu.core.test.rules.article_rule import ArticleRule
 from zeeguu.core.test.rules.language_rule import LanguageRule
 from zeeguu.core.model import Topic, Article
+from zeeguu.core.content_recommender.elastic_recommender import (
+    _to_articles_from_ES_hits,
+    _to_cards_from_ES_hits,
+)
 from zeeguu.core.test.test_data.mocking_the_web import (
     url_plane_crashes,
     url_spiegel_militar,
@@ -41,3 +45,52 @@ class ArticleTest(ModelTestMixIn, TestCase):
     def test_load_article_without_language_information(self):
         art = Article.find_or_create(session, url_plane_crashes)
         assert art
+
+    def test_articles_from_ES_hits_keep_the_hit_order(self):
+        hits = [{"_id": str(self.article2.id)}, {"_id": str(self.article1.id)}]
+
+        articles = _to_articles_from_ES_hits(hits)
+
+        assert [each.id for each in articles] == [self.article2.id, self.article1.id]
+
+    def test_articles_from_ES_hits_skip_missing_ids(self):
+        hits = [{"_id": str(self.article1.id)}, {"_id": "987654321"}]
+
+        articles = _to_articles_from_ES_hits(hits)
+
+        assert [each.id for each in articles] == [self.article1.id]
+
+    def test_stored_cards_of_broken_or_deleted_articles_are_dropped(self):
+        hits = [
+            {"_id": str(each), "_source": {"card": {"id": each}}}
+            for each in [self.article1.id, self.article2.id, 987654321]
+        ]
+        self.article2.vote_broken()
+        session.commit()
+
+        cards = _to_cards_from_ES_hits(hits)
+
+        assert cards == [{"id": self.article1.id}]
+
+    def test_hydrating_ES_hits_takes_a_constant_number_of_queries(self):
+        health = Topic("health")
+        self.article1.add_topic(health)
+        session.add(self.article1)
+        session.commit()
+
+        more_articles = [ArticleRule().article for _ in range(5)]
+
+        few = [self.article1.id]
+        many = [self.article1.id, self.article2.id] + [a.id for a in more_articles]
+
+        assert self._queries_to_render(few) == self._queries_to_render(many)
+
+    def _queries_to_render(self, article_ids):
+        hits = [{"_id": each} for each in article_ids]
+        session.expunge_all()
+
+        with recorded_queries() as statements:
+            for each in _to_articles_from_ES_hits(hits):
+                each.article_info()
+
+        return len(statements)
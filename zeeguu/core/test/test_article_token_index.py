@@ -0,0 +1,96 @@
+from unittest.mock import patch
+
+from sqlalchemy import not_, or_
+
+import zeeguu.core
+from zeeguu.core.content_recommender import article_token_index
+from zeeguu.core.content_recommender.mysql_recommender import (
+    _exclude_articles_containing,
+)
+from zeeguu.core.model import Article
+from zeeguu.core.test.model_test_mixin import ModelTestMixIn
+from zeeguu.core.test.rules.article_rule import ArticleRule
+
+session = zeeguu.core.db.session
+
+
+class ArticleTokenIndexTest(ModelTestMixIn):
+    def setUp(self):
+        super().setUp()
+        article_token_index.clear()
+
+        self.football = ArticleRule().article
+        self.language = self.football.language
+        self.football.title = "football results"
+        self.football.content = "the match ended in a draw"
+
+        self.politics = ArticleRule().article
+        self.politics.language = self.language
+        self.politics.title = "new york elections"
+        self.politics.content = "the mayor's campaign"
+        session.commit()
+
+    def _ids(self, query):
+        return sorted(each.id for each in query.all())
+
+    def _articles_without(self, keywords):
+        query = Article.query.filter(Article.language == self.language)
+        return self._ids(_exclude_articles_containing(query, self.language, keywords))
+
+    def _articles_without_using_like(self, keywords):
+        query = Article.query.filter(Article.language == self.language)
+        for each in keywords:
+            query = query.filter(
+                not_(or_(Article.title.contains(each), Article.content.contains(each)))
+            )
+        return self._ids(query)
+
+    def test_same_results_as_like(self):
+        for keywords in [
+            ["football"],
+            ["ball"],
+            ["atch"],
+            ["new york"],
+            ["mayor's"],
+            ["ball", "mayor"],
+            ["cricket"],
+        ]:
+            assert self._articles_without(keywords) == self._articles_without_using_like(
+                keywords
+            ), keywords
+
+    def test_articles_crawled_after_the_refresh_are_filtered_too(self):
+        self._articles_without(["ball"])
+
+        newer = ArticleRule().article
+        newer.language = self.language
+        newer.title = "basketball"
+        session.commit()
+
+        assert newer.id not in self._articles_without(["ball"])
+
+    def test_the_refresh_forgets_the_oldest_articles(self):
+        with patch.object(article_token_index, "MAX_INDEXED_ARTICLES", 2), patch.object(
+            article_token_index, "REFRESH_INTERVAL", 0
+        ):
+            self._articles_without(["ball"])
+
+            newer = ArticleRule().article
+            newer.language = self.language
+            newer.title = "basketball"
+            session.commit()
+
+            assert self._articles_without(["ball"]) == [self.politics.id]
+            assert self._articles_without(["ball"]) == self._articles_without_using_like(
+                ["ball"]
+            )
+
+        index = article_token_index.index_for(self.language)
+        assert index.first_id == self.politics.id
+        assert "football" not in index.postings
+
+    def test_only_word_keywords_use_the_index(self):
+        assert article_token_index.can_be_answered_by_index("fodbold")
+        assert not article_token_index.can_be_answered_by_index("new york")
+        assert not article_token_index.can_be_answered_by_index("a_b")
+        assert not article_token_index.can_be_answered_by_index("")
@@ -0,0 +1,36 @@
+import zeeguu.core
+from zeeguu.core.content_retriever.article_downloader import add_searches
+from zeeguu.core.model import ArticleWord
+from zeeguu.core.test.model_test_mixin import ModelTestMixIn, recorded_queries
+from zeeguu.core.test.rules.article_rule import ArticleRule
+
+session = zeeguu.core.db.session
+
+
+class ArticleWordTest(ModelTestMixIn):
+    def setUp(self):
+        super().setUp()
+        self.article = ArticleRule().article
+
+    def test_words_are_created_once_and_associated(self):
+        ArticleWord.find_or_create(session, "bundestag")
+
+        ArticleWord.add_words_of_article(
+            session, ["bundestag", "wahl", "wahl", "merkel"], self.article
+        )
+        session.commit()
+
+        for word in ["bundestag", "wahl", "merkel"]:
+            assert ArticleWord.find_by_word(word).articles == [self.article]
+
+    def test_the_queries_do_not_depend_on_the_number_of_words(self):
+        def queries_for(title):
+            article = ArticleRule().article
+            with recorded_queries() as queries:
+                add_searches(title, "https://www.spiegel.de/politik/", article, session)
+            session.commit()
+            return len(queries)
+
+        few = queries_for("Wahl in Berlin")
+        many = queries_for("Die Wahl in Berlin und Hamburg wurde wiederholt heute")
+        assert few == many
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import zeeguu.core
+from zeeguu.core.content_recommender import article_word_index
+from zeeguu.core.model import ArticleWord
+from zeeguu.core.test.model_test_mixin import ModelTestMixIn
+from zeeguu.core.test.rules.article_rule import ArticleRule
+
+session = zeeguu.core.db.session
+
+
+class ArticleWordIndexTest(ModelTestMixIn):
+    def setUp(self):
+        super().setUp()
+        article_word_index.clear()
+
+        self.older = self._article_with_words(["fahrverbote", "diesel"], days_ago=2)
+        self.language = self.older.language
+        self.newer = self._article_with_words(["fahrrad", "diesel"], days_ago=1)
+
+    def _article_with_words(self, words, days_ago):
+        article = ArticleRule().article
+        if hasattr(self, "language"):
+            article.language = self.language
+        article.word_count = 100
+        article.published_time = datetime.now() - timedelta(days=days_ago)
+        for word in words:
+            ArticleWord.find_or_create(session, word).add_article(article)
+        session.commit()
+        return article
+
+    def _search(self, search, count=10):
+        return article_word_index.article_ids_for_search(self.language, search, count)
+
+    def test_prefix_matches_most_recent_first(self):
+        assert self._search("fahr") == [self.newer.id, self.older.id]
+
+    def test_all_terms_must_match(self):
+        assert self._search("fahrv diesel") == [self.older.id]
+        assert self._search("fahrrad fahrverbote") == []
+
+    def test_count_limits_the_results(self):
+        assert self._search("diesel", count=1) == [self.newer.id]
+
+    def test_refresh_adds_new_articles(self):
+        self._search("diesel")
+
+        newest = self._article_with_words(["diesel"], days_ago=0)
+        assert newest.id not in self._search("diesel")
+
+        with patch.object(article_word_index, "REFRESH_INTERVAL", 0):
+            assert self._search("diesel")[0] == newest.id
+
+    def test_the_refresh_forgets_the_oldest_articles(self):
+        with patch.object(article_word_index, "MAX_INDEXED_ARTICLES", 2), patch.object(
+            article_word_index, "REFRESH_INTERVAL", 0
+        ):
+            assert self._search("fahr") == [self.newer.id, self.older.id]
+
+            newest = self._article_with_words(["diesel"], days_ago=0)
+
+            assert self._search("diesel") == [newest.id, self.newer.id]
+            assert self._search("fahrverbote") == []
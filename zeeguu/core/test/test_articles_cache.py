@@ -0,0 +1,111 @@
+import zeeguu.core
+from zeeguu.core.content_recommender import mysql_recommender
+from zeeguu.core.model import ArticlesCache, Topic
+from zeeguu.core.test.model_test_mixin import ModelTestMixIn
+from zeeguu.core.test.rules.article_rule import ArticleRule
+from zeeguu.core.test.rules.user_rule import UserRule
+
+session = zeeguu.core.db.session
+
+
+class ArticlesCacheTest(ModelTestMixIn):
+    def setUp(self):
+        super().setUp()
+
+        self.user = UserRule().user
+        self.article = ArticleRule().article
+        self.user.set_learned_language(self.article.language.code, session)
+        session.commit()
+
+        self.topic = Topic("Sport")
+        session.add(self.topic)
+        session.commit()
+
+        mysql_recommender._parsed_preferences = {}
+
+    def test_preferences_from_hash(self):
+        hash = mysql_recommender._reading_preferences_hash(self.user)
+        preferences = ArticlesCache.preferences_from_hash(hash)
+
+        assert preferences["language_code"] == self.article.language.code
+        assert (preferences["level_min"], preferences["level_max"]) == tuple(
+            self.user.levels_for(self.article.language)
+        )
+        assert preferences["topic_ids"] == []
+
+    def test_new_article_is_added_to_matching_caches(self):
+        hash = mysql_recommender._reading_preferences_hash(self.user)
+        session.add(ArticlesCache(self.article, hash))
+        session.commit()
+
+        new_article = ArticleRule().article
+        new_article.language = self.article.language
+        session.commit()
+
+        added = mysql_recommender.add_to_matching_recommender_caches(
+            new_article, session
+        )
+
+        assert added == 1
+        assert new_article in ArticlesCache.get_articles_for_hash(hash, 10)
+
+    def test_new_article_is_added_to_caches_stored_since_the_last_article(self):
+        other_hash = "lan: " + self.article.language.code + " (-1, 11) top: "
+        other_hash += f"{self.topic.id} sear:  filt:  sear-filt: "
+        session.add(ArticlesCache(self.article, other_hash))
+        session.commit()
+        mysql_recommender.add_to_matching_recommender_caches(self.article, session)
+
+        hash = mysql_recommender._reading_preferences_hash(self.user)
+        session.add(ArticlesCache(self.article, hash))
+        session.commit()
+
+        new_article = ArticleRule().article
+        new_article.language = self.article.language
+        session.commit()
+
+        added = mysql_recommender.add_to_matching_recommender_caches(
+            new_article, session
+        )
+
+        assert added == 1
+        assert new_article in ArticlesCache.get_articles_for_hash(hash, 10)
+
+    def test_new_article_is_not_added_to_caches_of_other_topics(self):
+        hash = "lan: " + self.article.language.code + " (-1, 11) top: "
+        hash += f"{self.topic.id} sear:  filt:  sear-filt: "
+        session.add(ArticlesCache(self.article, hash))
+        session.commit()
+
+        new_article = ArticleRule().article
+        new_article.language = self.article.language
+        session.commit()
+
+        added = mysql_recommender.add_to_matching_recommender_caches(
+            new_article, session
+        )
+
+        assert added == 0
+
+    def test_adding_the_same_articles_twice_keeps_them_once(self):
+        hash = mysql_recommender._reading_preferences_hash(self.user)
+        other_article = ArticleRule().article
+
+        ArticlesCache.add_all(session, [(hash, self.article.id)])
+        ArticlesCache.add_all(
+            session, [(hash, self.article.id), (hash, other_article.id)]
+        )
+
+        cached = ArticlesCache.get_articles_for_hash(hash, 10)
+        assert sorted(each.id for each in cached) == sorted(
+            [self.article.id, other_article.id]
+        )
+
+    def test_recompute_is_idempotent(self):
+        hash = mysql_recommender._reading_preferences_hash(self.user)
+
+        mysql_recommender._recompute_recommender_cache(hash, session, self.user)
+        first = ArticlesCache.get_articles_for_hash(hash, 100)
+        mysql_recommender._recompute_recommender_cache(hash, session, self.user)
+
+        assert len(ArticlesCache.get_articles_for_hash(hash, 100)) == len(first)
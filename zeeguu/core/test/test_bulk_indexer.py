@@ -0,0 +1,134 @@
+from unittest.mock import patch
+
+from sqlalchemy.orm import make_transient
+
+import zeeguu.core
+from zeeguu.core.elastic import bulk_indexer
+from zeeguu.core.elastic.bulk_indexer import BulkIndexer
+from zeeguu.core.content_retriever import near_duplicates
+from zeeguu.core.content_retriever.article_downloader import download_from_feed
+from zeeguu.core.test.model_test_mixin import ModelTestMixIn, failing_article_commits
+from zeeguu.core.test.rules.article_rule import ArticleRule
+from zeeguu.core.test.rules.rss_feed_rule import RSSFeedRule
+
+session = zeeguu.core.db.session
+
+
+class BulkIndexerTest(ModelTestMixIn):
+    def setUp(self):
+        super().setUp()
+        near_duplicates.clear()
+        self.requests = []
+        self.failures = []
+
+        patcher = patch.object(bulk_indexer, "bulk", self._bulk)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patch.object(bulk_indexer, "RETRY_BACKOFF", 0).start()
+        self.addCleanup(patch.stopall)
+
+    def _bulk(self, client, actions, **kwargs):
+        ids = [each["_id"] for each in actions]
+        self.requests.append(ids)
+
+        failing = self.failures.pop(0) if self.failures else []
+        errors = [
+            {"index": {"_id": str(id), "status": 429, "error": "overloaded"}}
+            for id in ids
+            if id in failing
+        ]
+        return len(ids) - len(errors), errors
+
+    def _indexer(self, **kwargs):
+        indexer = BulkIndexer(session, **kwargs)
+        self.addCleanup(self._close, indexer)
+        return indexer
+
+    def _close(self, indexer):
+        try:
+            indexer.close()
+        except Exception:
+            pass
+
+    def test_documents_are_sent_in_bulk(self):
+        indexer = self._indexer(max_docs=2, max_seconds=60)
+        articles = [ArticleRule().article for _ in range(3)]
+
+        for each in articles:
+            indexer.add(each)
+        assert self.requests == [[articles[0].id, articles[1].id]]
+
+        indexer.close()
+        assert self.requests[1] == [articles[2].id]
+        assert indexer.indexed == 3
+
+    def test_rejected_documents_are_retried(self):
+        indexer = self._indexer(max_docs=10, max_seconds=60, max_retries=2)
+        first, second = ArticleRule().article, ArticleRule().article
+        self.failures = [[second.id], [second.id], [second.id]]
+
+        indexer.add(first)
+        indexer.add(second)
+        indexer.flush()
+
+        assert self.requests == [[first.id, second.id], [second.id], [second.id]]
+        assert indexer.indexed == 1
+        assert indexer.failed_ids == [second.id]
+
+    def test_uncommitted_articles_wait_for_the_commit(self):
+        indexer = self._indexer(max_docs=1, max_seconds=60)
+
+        article = ArticleRule().article
+        article.title = "a new title"
+        indexer.add(article)
+        assert self.requests == []
+
+        session.commit()
+        indexer.flush()
+        assert self.requests == [[article.id]]
+
+    def test_rolled_back_articles_are_not_indexed(self):
+        indexer = self._indexer(max_docs=1, max_seconds=60)
+
+        article = ArticleRule().article
+        article.title = "a title that is never committed"
+        indexer.add(article)
+        session.rollback()
+
+        indexer.flush()
+        assert self.requests == []
+
+    def test_committed_documents_are_sent_when_the_interval_passed(self):
+        indexer = self._indexer(max_docs=10, max_seconds=60)
+
+        article = ArticleRule().article
+        article.title = "a title that is committed later"
+        indexer.add(article)
+        session.commit()
+
+        indexer.flush_if_due()
+        assert self.requests == []
+
+        indexer._last_flush -= 60
+        indexer.flush_if_due()
+        assert self.requests == [[article.id]]
+
+    def test_articles_whose_save_failed_are_not_indexed(self):
+        indexer = self._indexer(max_docs=1, max_seconds=60)
+
+        feed = RSSFeedRule().feed1
+        with failing_article_commits():
+            download_from_feed(feed, session, 3, indexer=indexer)
+        indexer.close()
+
+        assert self.requests == []
+
+    def test_articles_that_are_not_in_the_db_are_not_indexed(self):
+        indexer = self._indexer(max_docs=1, max_seconds=60)
+
+        article = ArticleRule().article
+        make_transient(article)
+        indexer.add(article)
+        indexer.close()
+
+        assert self.requests == []
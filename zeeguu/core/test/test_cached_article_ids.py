@@ -0,0 +1,63 @@
+import time
+from unittest.mock import patch
+
+import zeeguu.core
+from zeeguu.core.model import cached_article_ids
+from zeeguu.core.test.model_test_mixin import ModelTestMixIn
+from zeeguu.core.test.rules.article_rule import ArticleRule
+
+session = zeeguu.core.db.session
+
+
+class CachedArticleIdsTest(ModelTestMixIn):
+    def setUp(self):
+        super().setUp()
+        cached_article_ids.clear()
+
+        self.article = self._article()
+        self.language = self.article.language
+
+    def _article(self):
+        article = ArticleRule().article
+        if hasattr(self, "language"):
+            article.language = self.language
+        article.word_count = 100
+        session.commit()
+        return article
+
+    def test_articles_are_loaded_a_page_at_a_time(self):
+        for _ in range(4):
+            self._article()
+
+        articles = self.language.get_articles(most_recent_first=True, page_size=2)
+
+        assert len(articles) == 5
+        assert len(articles.page(0)) == 2
+        assert len(articles.page(2)) == 1
+        assert [each.id for each in articles] == list(articles.ids)
+
+    def test_ids_are_cached_until_they_expire(self):
+        assert len(self.language.get_articles()) == 1
+
+        self._article()
+        assert len(self.language.get_articles()) == 1
+
+        later = time.time() + cached_article_ids.ARTICLE_IDS_TTL + 1
+        with patch("zeeguu.core.util.ttl_cache.time.time", return_value=later):
+            assert len(self.language.get_articles()) == 2
+
+    def test_forget_drops_only_the_given_language(self):
+        self.language.get_articles()
+        self._article()
+
+        cached_article_ids.forget("topic", self.language.id)
+        assert len(self.language.get_articles()) == 1
+
+        cached_article_ids.forget("language", self.language.id)
+        assert len(self.language.get_articles()) == 2
+
+    def test_the_arguments_are_part_of_the_key(self):
+        ids = self.language.get_articles(most_recent_first=True).ids
+        self._article()
+
+        assert self.language.get_articles(easiest_first=True).ids != ids
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import zeeguu.core
+from zeeguu.core.content_retriever.crawl_schedule import (
+    MAX_BACKOFF,
+    MAX_INTERVAL,
+    MIN_INTERVAL,
+    crawl_interval,
+    reschedule,
+)
+from zeeguu.core.model import Article, RSSFeed
+from zeeguu.core.test.model_test_mixin import ModelTestMixIn
+from zeeguu.core.test.rules.rss_feed_rule import RSSFeedRule
+from zeeguu.core.test.rules.url_rule import UrlRule
+
+session = zeeguu.core.db.session
+
+
+class CrawlScheduleTest(ModelTestMixIn):
+    def setUp(self):
+        super().setUp()
+        self.now = datetime.now()
+
+        rule = RSSFeedRule()
+        self.busy_feed = rule.feed1
+        self.quiet_feed = rule.feed_fr
+
+        for hours in range(0, 48, 2):
+            self._add_article(self.busy_feed, self.now - timedelta(hours=hours))
+        self.busy_feed.last_crawled_time = self.now
+        self.quiet_feed.last_crawled_time = self.now - timedelta(days=40)
+        session.commit()
+
+    def _add_article(self, feed, published):
+        article = Article(
+            UrlRule().url, "", "", "content", "", published, feed, feed.language
+        )
+        session.add(article)
+
+    def test_busy_feeds_are_crawled_more_often(self):
+        reschedule(session, {self.busy_feed: False, self.quiet_feed: False}, self.now)
+
+        busy_interval = self.busy_feed.next_crawl_time - self.now
+        quiet_interval = self.quiet_feed.next_crawl_time - self.now
+
+        assert MIN_INTERVAL <= busy_interval < timedelta(days=1)
+        assert quiet_interval == MAX_INTERVAL
+
+    def test_the_interval_is_clamped(self):
+        assert crawl_interval(100000, self.now, self.now) == MIN_INTERVAL
+        assert crawl_interval(0, None, self.now) == MAX_INTERVAL
+
+    def test_failing_feeds_back_off(self):
+        intervals = []
+        for _ in range(3):
+            reschedule(session, {self.busy_feed: True}, self.now)
+            intervals.append(self.busy_feed.next_crawl_time - self.now)
+
+        assert self.busy_feed.crawl_failures == 3
+        assert intervals[0] * 2 == intervals[1]
+        assert intervals[1] * 2 == intervals[2]
+
+        for _ in range(20):
+            reschedule(session, {self.busy_feed: True}, self.now)
+        assert self.busy_feed.next_crawl_time - self.now == MAX_BACKOFF
+
+        reschedule(session, {self.busy_feed: False}, self.now)
+        assert self.busy_feed.crawl_failures == 0
+
+    def test_only_the_due_feeds_are_crawled(self):
+        reschedule(session, {self.busy_feed: False}, self.now)
+
+        due = RSSFeed.due_for_crawling(self.now)
+        assert self.busy_feed not in due
+        assert self.quiet_feed in due
+
+        later = RSSFeed.due_for_crawling(self.busy_feed.next_crawl_time)
+        assert self.busy_feed in later
+
+        self.quiet_feed.deactivated = 1
+        session.commit()
+        assert self.quiet_feed not in RSSFeed.due_for_crawling(self.now)
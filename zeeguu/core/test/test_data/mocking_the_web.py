@@ -81,6 +81,8 @@ def mock_requests_get(m):
         content = f.read()
 
         m.get(url, text=content)
+        # the crawler resolves the redirects with a HEAD
+        m.head(url)
         f.close()
 
     for each in test_urls.keys():
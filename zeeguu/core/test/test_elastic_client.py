@@ -0,0 +1,46 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from zeeguu.core.elastic import client
+from zeeguu.core.elastic.client import (
+    es_client,
+    add_latency_hook,
+    remove_latency_hook,
+)
+
+
+class ElasticClientTest(TestCase):
+    def test_client_is_shared_within_a_process(self):
+        assert es_client() is es_client()
+
+    def test_forked_process_gets_its_own_client(self):
+        parent_client = es_client()
+
+        with patch("os.getpid", return_value=client._client_pid + 1):
+            child_client = es_client()
+
+        assert child_client is not parent_client
+
+    def test_latency_hooks_are_called(self):
+        reported = []
+
+        def hook(method, path, status, duration):
+            reported.append((method, path, status, duration))
+
+        add_latency_hook(hook)
+        try:
+            client._report_latency("GET", "/zeeguu/_search", 200, 0.01)
+        finally:
+            remove_latency_hook(hook)
+
+        assert reported == [("GET", "/zeeguu/_search", 200, 0.01)]
+
+    def test_broken_hook_does_not_break_the_query(self):
+        def broken_hook(method, path, status, duration):
+            raise Exception("oops")
+
+        add_latency_hook(broken_hook)
+        try:
+            client._report_latency("GET", "/zeeguu/_search", 200, 0.01)
+        finally:
+            remove_latency_hook(broken_hook)
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import patch
+
+from zeeguu.core.model import Language
+from zeeguu.core.elastic import elastic_query_builder
+from zeeguu.core.elastic.elastic_query_builder import (
+    build_elastic_recommender_queries,
+    build_elastic_search_queries,
+)
+
+
+class ElasticQueryBuilderTest(TestCase):
+    def setUp(self):
+        self.german = Language("de", "German")
+
+    def _recommender_queries(self):
+        return build_elastic_recommender_queries(
+            20, "sport politics", "health", "", "", self.german, 50, 10
+        )
+
+    def test_fallback_drops_the_difficulty_range(self):
+        query, fallback = self._recommender_queries()
+
+        assert "filter" in query["query"]["function_score"]["query"]["bool"]
+        assert "filter" not in fallback["query"]["function_score"]["query"]["bool"]
+
+    def test_cached_queries_can_be_modified_by_callers(self):
+        query, _ = self._recommender_queries()
+        query["size"] = 1000
+
+        query_again, _ = self._recommender_queries()
+
+        assert query_again["size"] == 20
+
+    def test_search_queries_depend_on_the_search_terms(self):
+        kids, _ = build_elastic_search_queries(
+            20, "kinder", "", "", "", "", self.german, 50, 10
+        )
+        schools, _ = build_elastic_search_queries(
+            20, "schule", "", "", "", "", self.german, 50, 10
+        )
+
+        assert kids != schools
+
+    def test_threads_share_the_cache_within_its_size(self):
+        def search(i):
+            return build_elastic_search_queries(
+                20, f"term{i % 50}", "", "", "", "", self.german, 50, 10
+            )
+
+        with patch.object(elastic_query_builder, "MAX_CACHED_QUERIES", 10):
+            with ThreadPoolExecutor(8) as pool:
+                results = list(pool.map(search, range(400)))
+
+            assert len(results) == 400
+            assert len(elastic_query_builder._cached_queries) <= 10
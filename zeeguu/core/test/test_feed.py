@@ -1,19 +1,36 @@
+import os
 from datetime import datetime, timedelta
 from unittest import TestCase
 
+import requests
+import requests_mock
+
+from zeeguu.core.model.feed import FEED_TIMEOUT, feed_http_stats
 from zeeguu.core.test.model_test_mixin import ModelTestMixIn
+from zeeguu.core.test.test_data.mocking_the_web import (
+    TESTDATA_FOLDER,
+    test_urls,
+    url_spiegel_rss,
+)
 
 from zeeguu.core.test.rules.rss_feed_rule import RSSFeedRule
 from zeeguu.core.content_retriever.article_downloader import download_from_feed
+from zeeguu.core.content_retriever.concurrent_crawler import crawl_feeds
+from zeeguu.core.content_retriever import near_duplicates
 
 
 class FeedTest(ModelTestMixIn, TestCase):
     def setUp(self):
         super().setUp()
+        near_duplicates.clear()
 
         self.spiegel = RSSFeedRule().feed1
         download_from_feed(self.spiegel, self.db.session, 3, False)
 
+        path = os.path.join(TESTDATA_FOLDER, test_urls[url_spiegel_rss])
+        with open(path, encoding="UTF-8") as f:
+            self.spiegel_rss = f.read()
+
     def test_feed_items(self):
         assert len(self.spiegel.get_articles()) == 3
         assert len(self.spiegel.get_articles(limit=2)) == 2
@@ -29,4 +46,63 @@ class FeedTest(ModelTestMixIn, TestCase):
         ordered_by_time = self.spiegel.get_articles(most_recent_first =True)
         assert ordered_by_time [0] . published_time >= ordered_by_time [1] . published_time
 
+    def test_validators_of_the_response_are_kept(self):
+        with requests_mock.Mocker() as m:
+            m.get(url_spiegel_rss, text="<rss></rss>", headers={"ETag": '"v1"'})
+            self.spiegel.feed_items()
+
+        assert self.spiegel.etag == '"v1"'
+        assert self.spiegel.last_response_size == len("<rss></rss>")
+
+    def test_no_items_when_the_feed_was_not_modified(self):
+        self.spiegel.etag = '"v1"'
+        self.spiegel.last_response_size = 1000
+        saved_before = feed_http_stats.bytes_saved
+
+        with requests_mock.Mocker() as m:
+            m.get(url_spiegel_rss, status_code=304)
+            assert self.spiegel.feed_items() == []
+            assert m.last_request.headers["If-None-Match"] == '"v1"'
+
+        assert feed_http_stats.bytes_saved == saved_before + 1000
+        assert self.spiegel.etag == '"v1"'
+
+    def test_validators_of_failed_responses_are_not_kept(self):
+        with requests_mock.Mocker() as m:
+            m.get(url_spiegel_rss, status_code=503, headers={"ETag": '"error"'})
+            self.spiegel.feed_items()
+
+        assert self.spiegel.etag is None
+
+    def test_validators_are_kept_only_when_all_the_items_are_crawled(self):
+        with requests_mock.Mocker(real_http=True) as m:
+            m.get(url_spiegel_rss, text=self.spiegel_rss, headers={"ETag": '"v2"'})
+            # the limit stops the crawl before the items
+            self.spiegel.last_crawled_time = datetime(2000, 1, 1)
+            download_from_feed(self.spiegel, self.db.session, 0, False)
+            assert self.spiegel.etag is None
+
+            m.get(url_spiegel_rss, text="<rss></rss>", headers={"ETag": '"v3"'})
+            download_from_feed(self.spiegel, self.db.session, 3, False)
+            assert self.spiegel.etag == '"v3"'
+
+    def test_a_feed_that_does_not_answer_fails_the_crawl(self):
+        with requests_mock.Mocker() as m:
+            m.get(url_spiegel_rss, exc=requests.exceptions.ReadTimeout)
+            metrics = download_from_feed(self.spiegel, self.db.session, 3, False)
+            assert m.last_request.timeout == FEED_TIMEOUT
+
+        assert "ReadTimeout" in metrics.error
+
+    def test_a_feed_that_does_not_answer_fails_the_concurrent_crawl(self):
+        with requests_mock.Mocker() as m:
+            m.get(url_spiegel_rss, exc=requests.exceptions.ReadTimeout)
+            stats = crawl_feeds(
+                [self.spiegel],
+                self.db.session,
+                min_interval=0,
+                save_in_elastic=False,
+                processes=0,
+            )
 
+        assert "ReadTimeout" in stats.feed_metrics[self.spiegel.id].error
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+
+import requests
+
+from zeeguu.core.content_retriever import fetch
+from zeeguu.core.content_retriever.article_downloader import _url_after_redirects
+from zeeguu.core.content_retriever.article_processing import download_html
+
+PAGE = "<html><body><p>Très bien</p></body></html>"
+
+
+class _Site(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/short":
+            self.send_response(301)
+            self.send_header("Location", "/article")
+            self.end_headers()
+            return
+
+        body = PAGE.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command == "GET":
+            self.wfile.write(body)
+
+    do_HEAD = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+class FetchTest(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Site)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.site = f"http://127.0.0.1:{self.server.server_port}"
+
+        fd, self.recording = tempfile.mkstemp(suffix=".warc")
+        os.close(fd)
+        self.addCleanup(os.remove, self.recording)
+        self.addCleanup(fetch.live)
+
+    def _stop_the_site(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_recorded_traffic_is_replayed_without_the_site(self):
+        fetch.record_to(self.recording)
+        html = download_html(self.site + "/article")
+        final_url = _url_after_redirects(self.site + "/short")
+        self._stop_the_site()
+
+        fetch.replay_from(self.recording)
+
+        assert download_html(self.site + "/article") == html == PAGE
+        assert _url_after_redirects(self.site + "/short") == final_url
+        assert final_url == self.site + "/article"
+
+    def test_requests_that_were_not_recorded_fail(self):
+        fetch.record_to(self.recording)
+        download_html(self.site + "/article")
+        self._stop_the_site()
+
+        fetch.replay_from(self.recording)
+
+        with self.assertRaises(requests.ConnectionError):
+            fetch.new_session({}).get(self.site + "/other")
@@ -3,6 +3,7 @@ from unittest import TestCase
 from zeeguu.core.test.model_test_mixin import ModelTestMixIn
 
 import zeeguu.core
+from zeeguu.core.test.rules.article_rule import ArticleRule
 from zeeguu.core.test.rules.rss_feed_rule import RSSFeedRule
 from zeeguu.core.test.test_data.mocking_the_web import (
     url_formation_professionelle,
@@ -10,9 +11,15 @@ from zeeguu.core.test.test_data.mocking_the_web import (
 )
 from zeeguu.core.elastic.indexing import document_from_article
 from zeeguu.core.content_retriever.article_downloader import download_feed_item
+from zeeguu.core.content_retriever import near_duplicates
+from zeeguu.core.content_retriever import lingo_rank_enrichment
+from zeeguu.core.model import DifficultyLingoRank
 
+import threading
 from datetime import datetime
 
+import requests
+
 from unittest.mock import patch
 
 
@@ -22,6 +29,9 @@ session = zeeguu.core.db.session
 class ArticleDownloaderTest(ModelTestMixIn, TestCase):
     def setUp(self):
         super().setUp()
+        near_duplicates.clear()
+        lingo_rank_enrichment.clear()
+        self.addCleanup(lingo_rank_enrichment.clear)
         self.dummy_feed_item = {
             "title": "Some Title",
             "published_datetime": datetime.now(),
@@ -39,10 +49,95 @@ class ArticleDownloaderTest(ModelTestMixIn, TestCase):
         art1 = download_feed_item(
             session, feed, self.dummy_feed_item, url_formation_professionelle
         )
+        lingo_rank_enrichment.wait(session)
 
         es_document = document_from_article(art1, session)
         assert es_document["lr_difficulty"] == 2.1
 
+    def test_download_does_not_wait_for_lingo_rank(self):
+        service_answers = threading.Event()
+
+        def slow_service(text):
+            service_answers.wait(5)
+            return 2.1
+
+        feed = RSSFeedRule().feed_fr
+        with patch(
+            "zeeguu.core.language.services.lingo_rank_service.retrieve_lingo_rank",
+            slow_service,
+        ):
+            art1 = download_feed_item(
+                session, feed, self.dummy_feed_item, url_formation_professionelle
+            )
+            assert lingo_rank_enrichment.save_finished(session) == 0
+            assert DifficultyLingoRank.value_for_article(art1) is None
+
+            service_answers.set()
+            assert lingo_rank_enrichment.wait(session, timeout=5) == 1
+
+        assert DifficultyLingoRank.value_for_article(art1) == 2.1
+
+    @patch.object(lingo_rank_enrichment, "RETRY_BACKOFF", 0)
+    def test_lingo_rank_is_retried(self):
+        answers = [requests.exceptions.Timeout(), ValueError("not a number"), 3.4]
+
+        def flaky_service(text):
+            answer = answers.pop(0)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+        feed = RSSFeedRule().feed_fr
+        with patch(
+            "zeeguu.core.language.services.lingo_rank_service.retrieve_lingo_rank",
+            flaky_service,
+        ):
+            art1 = download_feed_item(
+                session, feed, self.dummy_feed_item, url_formation_professionelle
+            )
+            lingo_rank_enrichment.wait(session)
+
+        assert DifficultyLingoRank.value_for_article(art1) == 3.4
+
+    @patch(
+        "zeeguu.core.language.services.lingo_rank_service.retrieve_lingo_rank",
+        return_value=2.1,
+    )
+    def test_lingo_rank_is_cached_by_content(self, lr_mock):
+        feed = RSSFeedRule().feed_fr
+        art1 = download_feed_item(
+            session, feed, self.dummy_feed_item, url_formation_professionelle
+        )
+        lingo_rank_enrichment.wait(session)
+
+        # the same content under another url
+        art2 = ArticleRule().article
+        art2.content = art1.content
+        art2.language = art1.language
+        session.commit()
+        lingo_rank_enrichment.enqueue(art2)
+        lingo_rank_enrichment.wait(session)
+
+        assert lr_mock.call_count == 1
+        assert DifficultyLingoRank.value_for_article(art2) == 2.1
+
+    @patch(
+        "zeeguu.core.language.services.lingo_rank_service.retrieve_lingo_rank",
+        return_value=2.1,
+    )
+    def test_ranks_are_kept_when_they_cannot_be_saved(self, lr_mock):
+        feed = RSSFeedRule().feed_fr
+        art1 = download_feed_item(
+            session, feed, self.dummy_feed_item, url_formation_professionelle
+        )
+
+        with patch.object(session, "commit", side_effect=Exception("DB is gone")):
+            with self.assertRaises(Exception):
+                lingo_rank_enrichment.wait(session, timeout=5)
+
+        assert lingo_rank_enrichment.save_finished(session) == 1
+        assert DifficultyLingoRank.value_for_article(art1) == 2.1
+
     def test_download_german_article(self):
 
         feed = RSSFeedRule().feed1
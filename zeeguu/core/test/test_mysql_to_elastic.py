@@ -0,0 +1,37 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+from tools import mysql_to_elastic
+from zeeguu.core.elastic import bulk_indexer
+from zeeguu.core.test.model_test_mixin import ModelTestMixIn
+from zeeguu.core.test.rules.article_rule import ArticleRule
+
+
+class MysqlToElasticTest(ModelTestMixIn):
+    def setUp(self):
+        super().setUp()
+        self.requests = []
+
+        patch.object(bulk_indexer, "bulk", self._bulk).start()
+        patch.object(mysql_to_elastic, "BATCH_SIZE", 2).start()
+        patch.object(mysql_to_elastic, "ES_CARDS_FROM_INDEX", False).start()
+        self.addCleanup(patch.stopall)
+
+        fd, self.checkpoint = tempfile.mkstemp()
+        os.close(fd)
+        os.remove(self.checkpoint)
+
+    def _bulk(self, client, actions, **kwargs):
+        self.requests.append([each["_id"] for each in actions])
+        return len(self.requests[-1]), []
+
+    def test_articles_are_indexed_in_batches(self):
+        articles = [ArticleRule().article for _ in range(5)]
+
+        failed = mysql_to_elastic.reindex(processes=1, checkpoint=self.checkpoint)
+
+        assert failed == []
+        assert sorted(sum(self.requests, [])) == sorted(each.id for each in articles)
+        assert max(len(each) for each in self.requests) == 2
+        assert not os.path.exists(self.checkpoint)
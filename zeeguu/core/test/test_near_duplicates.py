@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import zeeguu.core
+from zeeguu.core.content_retriever import near_duplicates
+from zeeguu.core.content_retriever.article_downloader import (
+    SkippedAsNearDuplicate,
+    download_feed_item,
+)
+from zeeguu.core.content_retriever.article_processing import process_article
+from zeeguu.core.content_retriever.near_duplicates import simhash, distance
+from zeeguu.core.test.model_test_mixin import ModelTestMixIn
+from zeeguu.core.test.rules.rss_feed_rule import RSSFeedRule
+from zeeguu.core.test.test_data.mocking_the_web import (
+    url_diesel_fahrverbote,
+    url_spiegel_militar,
+)
+
+session = zeeguu.core.db.session
+
+
+class NearDuplicatesTest(ModelTestMixIn):
+    def setUp(self):
+        super().setUp()
+        near_duplicates.clear()
+
+        self.feed = RSSFeedRule().feed1
+        self.feed_item = {
+            "title": "Some Title",
+            "published_datetime": datetime.now(),
+            "summary": "Some Summary",
+        }
+
+    def test_copies_have_close_hashes(self):
+        story = process_article(url_diesel_fahrverbote, "", "de").content
+        other_story = process_article(url_spiegel_militar, "", "de").content
+        edited_copy = "Berlin (dpa) - " + story.replace("Diesel", "Dieselautos", 1)
+
+        assert distance(simhash(story), simhash(edited_copy)) <= near_duplicates.MAX_DISTANCE
+        assert distance(simhash(story), simhash(other_story)) > near_duplicates.MAX_DISTANCE
+
+    def test_copies_are_not_saved_twice(self):
+        processed = process_article(url_diesel_fahrverbote, "", "de")
+        original = download_feed_item(
+            session, self.feed, self.feed_item, url_diesel_fahrverbote, processed
+        )
+
+        processed.url = "https://www.syndicated.de/diesel"
+        with self.assertRaises(SkippedAsNearDuplicate) as skipped:
+            download_feed_item(
+                session, self.feed, self.feed_item, processed.url, processed
+            )
+        assert skipped.exception.canonical_article_id == original.id
+
+        other = download_feed_item(session, self.feed, self.feed_item, url_spiegel_militar)
+        assert other is not None
+
+    def test_articles_that_fell_out_of_the_window_are_forgotten(self):
+        self.feed_item["published_datetime"] = datetime.now() - timedelta(days=10)
+        processed = process_article(url_diesel_fahrverbote, "", "de")
+        download_feed_item(
+            session, self.feed, self.feed_item, url_diesel_fahrverbote, processed
+        )
+        language = self.feed.language
+        assert near_duplicates.near_duplicate_of(language, processed.simhash)
+
+        with patch.object(near_duplicates, "WINDOW_DAYS", 5), patch.object(
+            near_duplicates, "EVICTION_INTERVAL", timedelta(0)
+        ):
+            assert near_duplicates.near_duplicate_of(language, processed.simhash) is None
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+from zeeguu.core.content_recommender import recommendation_cache
+
+
+def _user(id, language_code="de", preferences_version=0):
+    return SimpleNamespace(
+        id=id,
+        learned_language=SimpleNamespace(code=language_code),
+        preferences_version=preferences_version,
+    )
+
+
+def _constraints(user):
+    return (user.learned_language, 50, 10, "sport", "", "", "")
+
+
+class RecommendationCacheTest(TestCase):
+    def setUp(self):
+        recommendation_cache.clear()
+        self.computed = 0
+
+    def _recommendations_for(self, user):
+        _, preferences_hash = recommendation_cache.user_constraints(user, _constraints)
+        return recommendation_cache.recommendations(
+            preferences_hash, 20, self._compute
+        )
+
+    def _compute(self):
+        self.computed += 1
+        return [{"_id": "1"}, {"_id": "2"}]
+
+    def test_recommendations_are_computed_once(self):
+        user = _user(1)
+        before = recommendation_cache.cache_stats()["recommendations"]
+
+        self._recommendations_for(user)
+        self._recommendations_for(user)
+
+        after = recommendation_cache.cache_stats()["recommendations"]
+        assert self.computed == 1
+        assert after["hits"] == before["hits"] + 1
+        assert after["misses"] == before["misses"] + 1
+
+    def test_users_with_the_same_preferences_share_recommendations(self):
+        self._recommendations_for(_user(1))
+        self._recommendations_for(_user(2))
+
+        assert self.computed == 1
+
+    def test_different_languages_have_different_recommendations(self):
+        self._recommendations_for(_user(1, "de"))
+        self._recommendations_for(_user(2, "fr"))
+
+        assert self.computed == 2
+
+    def test_invalidation_recomputes_the_constraints(self):
+        user = _user(1)
+        computed_constraints = []
+
+        def constraints(user):
+            computed_constraints.append(user)
+            return _constraints(user)
+
+        recommendation_cache.user_constraints(user, constraints)
+        recommendation_cache.user_constraints(user, constraints)
+        assert len(computed_constraints) == 1
+
+        recommendation_cache.invalidate_for_user(user)
+
+        recommendation_cache.user_constraints(user, constraints)
+        assert len(computed_constraints) == 2
+
+    def test_preferences_changed_in_another_process_are_noticed(self):
+        computed_constraints = []
+
+        def constraints(user):
+            computed_constraints.append(user)
+            return _constraints(user)
+
+        recommendation_cache.user_constraints(_user(1), constraints)
+
+        # the same user, loaded after another process committed a change
+        recommendation_cache.user_constraints(
+            _user(1, preferences_version=1), constraints
+        )
+        assert len(computed_constraints) == 2
+
+    def test_entries_expire(self):
+        user = _user(1)
+        self._recommendations_for(user)
+
+        with patch("time.time", return_value=10**12):
+            self._recommendations_for(user)
+
+        assert self.computed == 2
@@ -1,14 +1,35 @@
 import newspaper
+import requests
+from datetime import datetime
+from unittest.mock import patch
 
 import zeeguu.core
-from zeeguu.core.test.model_test_mixin import ModelTestMixIn
+from zeeguu.core.test.model_test_mixin import ModelTestMixIn, failing_article_commits
+from zeeguu.core.test.rules.article_rule import ArticleRule
 from zeeguu.core.test.rules.language_rule import LanguageRule
 from zeeguu.core.test.rules.rss_feed_rule import RSSFeedRule
 from zeeguu.core.test.rules.user_rule import UserRule
 from zeeguu.core.content_retriever.content_cleaner import cleanup_non_content_bits
-from zeeguu.core.content_retriever.article_downloader import download_from_feed, strip_article_title_word
+from zeeguu.core.content_retriever.article_downloader import (
+    download_from_feed,
+    strip_article_title_word,
+    known_article,
+    url_after_redirects,
+    _url_after_redirects,
+)
+from zeeguu.core.content_retriever.concurrent_crawler import crawl_feeds, DomainRateLimiter
 from zeeguu.core.content_retriever.quality_filter import sufficient_quality
-from zeeguu.core.model import Topic, LocalizedTopic, ArticleWord
+from zeeguu.core.content_retriever import topic_matcher
+from zeeguu.core.content_retriever import near_duplicates
+from zeeguu.core.content_retriever.article_processing import process_article
+from zeeguu.core.model import (
+    Article,
+    ArticleWord,
+    FeedCrawl,
+    LocalizedTopic,
+    Topic,
+    UrlRedirect,
+)
 
 from zeeguu.core.test.test_data.mocking_the_web import *
 
@@ -16,6 +37,8 @@ from zeeguu.core.test.test_data.mocking_the_web import *
 class TestRetrieveAndCompute(ModelTestMixIn):
     def setUp(self):
         super().setUp()
+        topic_matcher.clear()
+        near_duplicates.clear()
 
         self.user = UserRule().user
         self.lan = LanguageRule().de
@@ -29,6 +52,187 @@ class TestRetrieveAndCompute(ModelTestMixIn):
         assert len(articles) == 2
         assert articles[0].fk_difficulty
 
+    def testConcurrentCrawlGetsTheSameArticles(self):
+        feed = RSSFeedRule().feed1
+        stats = crawl_feeds(
+            [feed], zeeguu.core.db.session, limit=3, min_interval=0, save_in_elastic=False
+        )
+
+        articles = feed.get_articles(limit=5)
+
+        assert stats.downloaded == len(articles) == 3
+        assert articles[0].fk_difficulty
+
+    def testConcurrentCrawlCanProcessInTheCallingThread(self):
+        feed = RSSFeedRule().feed1
+        stats = crawl_feeds(
+            [feed],
+            zeeguu.core.db.session,
+            limit=3,
+            min_interval=0,
+            save_in_elastic=False,
+            processes=0,
+        )
+
+        assert stats.downloaded == len(feed.get_articles(limit=5)) == 3
+
+    def testTheCrawlOfAFeedIsMeasured(self):
+        feed = RSSFeedRule().feed1
+        download_from_feed(feed, zeeguu.core.db.session, 3, False)
+
+        crawl = FeedCrawl.query.filter_by(rss_feed_id=feed.id).one()
+
+        assert crawl.downloaded == 3
+        assert crawl.items >= 3
+        assert crawl.bytes > 0
+        assert crawl.fetch_seconds > 0
+        assert crawl.parse_seconds > 0
+        assert crawl.duration >= crawl.parse_seconds + crawl.db_seconds
+
+    def testTheConcurrentCrawlOfAFeedIsMeasured(self):
+        feed = RSSFeedRule().feed1
+        crawl_feeds(
+            [feed],
+            zeeguu.core.db.session,
+            limit=3,
+            min_interval=0,
+            save_in_elastic=False,
+            processes=0,
+        )
+
+        crawl = FeedCrawl.query.filter_by(rss_feed_id=feed.id).one()
+
+        assert crawl.downloaded == 3
+        assert crawl.items >= 3
+        assert crawl.download_seconds > 0
+
+    def testCrawlsThatDownloadNothingHaveADuration(self):
+        feed = RSSFeedRule().feed1
+        download_from_feed(feed, zeeguu.core.db.session, 3, False)
+        feed.last_crawled_time = datetime(2000, 1, 1)
+        download_from_feed(feed, zeeguu.core.db.session, 3, False)
+        feed.last_crawled_time = datetime(2000, 1, 1)
+        crawl_feeds(
+            [feed],
+            zeeguu.core.db.session,
+            limit=3,
+            min_interval=0,
+            save_in_elastic=False,
+            processes=0,
+        )
+
+        first, *again = FeedCrawl.query.filter_by(rss_feed_id=feed.id).all()
+        assert len(again) == 2
+        for crawl in again:
+            assert crawl.downloaded == 0
+            assert crawl.skipped_already_in_db >= 3
+            assert crawl.duration >= crawl.fetch_seconds > 0
+
+    def testArticlesThatCouldNotBeSavedAreCountedAsFailed(self):
+        feed = RSSFeedRule().feed1
+        with failing_article_commits():
+            metrics = download_from_feed(feed, zeeguu.core.db.session, 3, False)
+
+        assert metrics.downloaded == 0
+        assert metrics.failed > 0
+        assert Article.query.count() == 0
+
+    def testItemsWhoseRedirectsFailDoNotFailTheFeed(self):
+        feed = RSSFeedRule().feed1
+        with patch(
+            "zeeguu.core.content_retriever.article_downloader.url_after_redirects",
+            side_effect=requests.exceptions.TooManyRedirects(),
+        ):
+            metrics = download_from_feed(feed, zeeguu.core.db.session, 3, False)
+
+        assert metrics.error is None
+        assert metrics.failed == metrics.items > 0
+
+    def testProcessedArticlesHaveTheDifficultyOfTheArticle(self):
+        import pickle
+
+        processed = process_article(url_diesel_fahrverbote, "", "de")
+        article = Article(
+            None, "", "", processed.content, processed.summary, None, None, self.lan
+        )
+
+        assert not processed.low_quality_reason
+        assert processed.fk_difficulty == article.fk_difficulty
+        assert pickle.loads(pickle.dumps(processed)) == processed
+
+    def testDomainRateLimiterSpacesTheRequestsToADomain(self):
+        now = [100.0]
+        limiter = DomainRateLimiter(1.0, clock=lambda: now[0])
+        for each in ["spiegel 1", "spiegel 2", "spiegel 3"]:
+            limiter.add("https://www.spiegel.de/a", each)
+        limiter.add("https://www.dr.dk/b", "dr")
+
+        # a busy domain does not hold back the others
+        assert {limiter.take(), limiter.take()} == {"spiegel 1", "dr"}
+        assert limiter.take() is None
+        assert limiter.seconds_until_next() == 1.0
+
+        now[0] += 1.0
+        assert limiter.take() == "spiegel 2"
+        assert limiter.take() is None
+
+        now[0] += 1.0
+        assert limiter.take() == "spiegel 3"
+        assert limiter.seconds_until_next() is None
+
+    def testRedirectsFallBackToGetWhenHeadIsRefused(self):
+        import requests_mock
+
+        with requests_mock.Mocker() as m:
+            m.head("http://short.ly/a", status_code=405)
+            m.get(
+                "http://short.ly/a",
+                status_code=302,
+                headers={"Location": "https://www.spiegel.de/a.html"},
+            )
+            m.get("https://www.spiegel.de/a.html", text="the article")
+
+            assert _url_after_redirects("http://short.ly/a") == "https://www.spiegel.de/a.html"
+
+    def testRedirectsAreResolvedOnlyOnce(self):
+        import requests_mock
+
+        with requests_mock.Mocker() as m:
+            short = m.head(
+                "http://short.ly/b",
+                status_code=301,
+                headers={"Location": "https://www.spiegel.de/b.html"},
+            )
+            m.head("https://www.spiegel.de/b.html")
+
+            for _ in range(2):
+                url = url_after_redirects(zeeguu.core.db.session, "http://short.ly/b")
+                assert url == "https://www.spiegel.de/b.html"
+
+            assert short.call_count == 1
+            assert UrlRedirect.final_url("http://short.ly/b") == url
+
+    def testKnownArticlesAreRecognizedBeforeResolvingTheirRedirects(self):
+        article = ArticleRule().article
+        article_url = article.url.as_string()
+        UrlRedirect.remember(zeeguu.core.db.session, "http://short.ly/c", article_url)
+
+        assert known_article(article_url)
+        assert known_article("http://short.ly/c")
+        assert not known_article("http://short.ly/d")
+
+    def testOldRedirectsAreDeleted(self):
+        session = zeeguu.core.db.session
+        UrlRedirect.remember(session, "http://short.ly/old", "https://www.dr.dk/old")
+        UrlRedirect.remember(session, "http://short.ly/new", "https://www.dr.dk/new")
+        old = UrlRedirect.query.filter_by(original="http://short.ly/old").one()
+        old.resolved_time = datetime(2000, 1, 1)
+        session.commit()
+
+        assert UrlRedirect.delete_older_than(session) == 1
+        assert UrlRedirect.final_url("http://short.ly/old") is None
+        assert UrlRedirect.final_url("http://short.ly/new") == "https://www.dr.dk/new"
+
     def testDownloadWithTopic(self):
         feed = RSSFeedRule().feed1
         topic = Topic("Spiegel")
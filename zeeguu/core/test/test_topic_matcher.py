@@ -0,0 +1,63 @@
+import zeeguu.core
+from zeeguu.core.content_retriever import topic_matcher
+from zeeguu.core.content_retriever.topic_matcher import TopicMatcher, matcher_for
+from zeeguu.core.model import Topic, LocalizedTopic, Url
+from zeeguu.core.test.model_test_mixin import ModelTestMixIn
+from zeeguu.core.test.rules.article_rule import ArticleRule
+
+session = zeeguu.core.db.session
+
+
+class TopicMatcherTest(ModelTestMixIn):
+    def setUp(self):
+        super().setUp()
+        topic_matcher.clear()
+
+        self.article = ArticleRule().article
+        self.language = self.article.language
+
+    def _localized_topic(self, title, keywords):
+        topic = Topic(title)
+        localized_topic = LocalizedTopic(topic, self.language, title, keywords)
+        session.add(localized_topic)
+        session.commit()
+        return localized_topic
+
+    def _article_at(self, url, title):
+        self.article.url = Url.find_or_create(session, url)
+        self.article.title = title
+        return self.article
+
+    def test_same_topics_as_matches_article(self):
+        localized_topics = [
+            self._localized_topic("Sport", "football ball /sport/"),
+            self._localized_topic("Feet", "foot"),
+            self._localized_topic("Politics", "election politik"),
+            self._localized_topic("Empty", " "),
+        ]
+        matcher = TopicMatcher(localized_topics)
+
+        for url, title in [
+            ("https://www.dr.dk/sport/fodbold", "Football results"),
+            ("https://www.dr.dk/nyheder/a", "football and basketball"),
+            ("https://www.spiegel.de/politik/a", "the election"),
+            ("https://www.spiegel.de/kultur/a", "nothing to see here"),
+        ]:
+            article = self._article_at(url, title)
+            expected = set(
+                each.topic_id
+                for each in localized_topics
+                if each.matches_article(article)
+            )
+            assert matcher.topic_ids_of(article) == expected, (url, title)
+
+    def test_the_matcher_is_rebuilt_when_the_topics_change(self):
+        article = self._article_at("https://www.dr.dk/sport/fodbold", "Goal!")
+        assert matcher_for(self.language).topic_ids_of(article) == set()
+
+        sport = self._localized_topic("Sport", "/sport/")
+        assert matcher_for(self.language).topic_ids_of(article) == {sport.topic_id}
+
+        sport.keywords = "/kultur/"
+        session.commit()
+        assert matcher_for(self.language).topic_ids_of(article) == set()
@@ -1,13 +1,16 @@
+import json
+import random
 from unittest import TestCase
 
-from zeeguu.core.test.model_test_mixin import ModelTestMixIn
+from zeeguu.core.test.model_test_mixin import ModelTestMixIn, recorded_queries
 
 import zeeguu.core
 from zeeguu.core.test.rules.article_rule import ArticleRule
+from zeeguu.core.test.rules.bookmark_rule import BookmarkRule
 from zeeguu.core.test.rules.language_rule import LanguageRule
 from zeeguu.core.test.rules.user_article_rule import UserArticleRule
 from zeeguu.core.test.rules.user_rule import UserRule
-from zeeguu.core.model import Topic
+from zeeguu.core.model import Topic, PersonalCopy
 from zeeguu.core.model.user_article import UserArticle
 
 session = zeeguu.core.db.session
@@ -31,3 +34,51 @@ class UserArticleTest(ModelTestMixIn, TestCase):
     def test_all_starred_or_liked_articles(self):
         self.article.star_for_user(session, self.user)
         assert 1 == len(UserArticle.all_starred_or_liked_articles_of_user(self.user))
+
+    def test_user_article_infos_from_cards_are_same_as_from_articles(self):
+        from_article = UserArticle.user_article_info(self.user, self.article)
+        from_card = UserArticle.user_article_infos_from_cards(
+            self.user, [self.article.article_info()]
+        )[0]
+
+        # this one is random for articles the user has interacted with
+        from_article.pop("relative_difficulty", None)
+        from_card.pop("relative_difficulty", None)
+
+        assert from_article == from_card
+
+    def _articles_with_user_info(self):
+        self.article.star_for_user(session, self.user)
+        bookmark = BookmarkRule(self.user).bookmark
+        bookmark.text.article = self.article
+
+        with_personal_copy = ArticleRule().article
+        session.add(PersonalCopy(self.user, with_personal_copy))
+        session.commit()
+
+        return [self.article, with_personal_copy, ArticleRule().article]
+
+    def test_user_article_infos_are_same_as_one_by_one(self):
+        articles = self._articles_with_user_info()
+
+        random.seed(0)
+        one_by_one = [UserArticle.user_article_info(self.user, a) for a in articles]
+        random.seed(0)
+        batched = UserArticle.user_article_infos(self.user, articles)
+
+        assert json.dumps(batched) == json.dumps(one_by_one)
+        assert batched[0]["translations"]
+        assert batched[1]["has_personal_copy"]
+
+    def test_user_article_infos_take_the_same_queries_for_more_articles(self):
+        articles = self._articles_with_user_info()
+        # the first time, some relationships are lazy loaded
+        UserArticle.user_article_infos(self.user, articles)
+
+        assert self._queries_for(articles[:1]) == self._queries_for(articles)
+
+    def _queries_for(self, articles):
+        with recorded_queries() as statements:
+            UserArticle.user_article_infos(self.user, articles)
+
+        return len(statements)